@@ -0,0 +1,259 @@
+"""
+Almacén persistente de recomendaciones en SQLite, direccionado por contenido
+
+La clave de cada resultado es un hash de la huella de la base de conocimientos
+(BaseConocimiento.huella) y de los datos del cliente: respuestas del cuestionario,
+plazo y condiciones. Si ni el cliente ni la base cambian, la clave es la misma entre
+ejecuciones y el resultado se lee en lugar de recalcularse; cualquier cambio en la
+base cambia la huella y deja de encontrar los resultados antiguos, que acaban
+desalojados por la cota de tamaño.
+
+La distribución recomendada es monto × pesos, así que se guardan los pesos y el
+monto no forma parte de la clave: un cliente que solo cambia el monto sigue
+acertando y el resultado es idéntico al calculado. Los vectores de pesos se guardan
+una sola vez (hay pocos distintos: dependen del perfil, del tramo de plazo y de las
+condiciones) y cada cliente guarda solo su perfil y una referencia al vector.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+# (perfil, ids de instrumentos con peso, pesos); los arreglos se comparten entre resultados iguales
+Resultado = Tuple[int, np.ndarray, np.ndarray]
+
+TAMANO_CONSULTA = 500  # claves por sentencia IN (...), por debajo del límite de variables de SQLite
+
+
+class AlmacenResultados:
+    """Caché persistente de resultados con lecturas y escrituras por lotes y desalojo LRU"""
+
+    def __init__(self, ruta: str, max_entradas: int = 10_000_000):
+        """
+        Args:
+            ruta: Archivo SQLite (se crea si no existe; ':memory:' para uno temporal)
+            max_entradas: Resultados máximos; al superarlos se desalojan los usados hace más tiempo
+        """
+        if max_entradas < 1:
+            raise ValueError("El almacén debe admitir al menos una entrada")
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        # La conexión se comparte entre hilos protegida por el candado
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._candado = threading.Lock()
+        with self._conexion:
+            self._conexion.execute('PRAGMA journal_mode=WAL')
+            self._conexion.execute('PRAGMA synchronous=NORMAL')
+            self._conexion.execute(
+                'CREATE TABLE IF NOT EXISTS resultados ('
+                ' clave BLOB PRIMARY KEY, perfil INTEGER NOT NULL, vector BLOB NOT NULL, uso INTEGER NOT NULL)'
+                ' WITHOUT ROWID')
+            self._conexion.execute('CREATE INDEX IF NOT EXISTS resultados_uso ON resultados (uso)')
+            # Para comprobar al desalojar si un vector sigue referenciado sin recorrer la tabla
+            self._conexion.execute('CREATE INDEX IF NOT EXISTS resultados_vector ON resultados (vector)')
+            self._conexion.execute(
+                'CREATE TABLE IF NOT EXISTS vectores (vector BLOB PRIMARY KEY, ids BLOB NOT NULL, pesos BLOB NOT NULL)'
+                ' WITHOUT ROWID')
+        self._entradas, self._uso = self._conexion.execute(
+            'SELECT COUNT(*), COALESCE(MAX(uso), 0) FROM resultados').fetchone()
+        self.aciertos = 0
+        self.fallos = 0
+        self.escrituras = 0
+        self.desalojos = 0
+        self.segundos_lectura = 0.0
+        self.segundos_escritura = 0.0
+
+    @staticmethod
+    def clave(huella: str, respuestas: Dict[str, int], plazo: int, condiciones: Iterable[str]) -> bytes:
+        """
+        Clave de contenido de una consulta
+
+        Las condiciones se ordenan y deduplican: la ruta por lotes no depende de su orden.
+        """
+        contenido = json.dumps([huella, sorted(respuestas.items()), int(plazo), sorted(set(condiciones))])
+        return hashlib.blake2b(contenido.encode('utf-8'), digest_size=16).digest()
+
+    def __len__(self) -> int:
+        return self._entradas
+
+    def obtener_muchos(self, claves: Sequence[bytes]) -> Dict[bytes, Resultado]:
+        """Lee los resultados guardados de `claves` y los marca como usados"""
+        inicio = time.perf_counter()
+        filas: Dict[bytes, Tuple[int, bytes]] = {}
+        vectores: Dict[bytes, Tuple[np.ndarray, np.ndarray]] = {}
+        with self._candado:
+            self._uso += 1
+            with self._conexion:
+                for desde in range(0, len(claves), TAMANO_CONSULTA):
+                    tramo = list(claves[desde:desde + TAMANO_CONSULTA])
+                    marcas = ','.join('?' * len(tramo))
+                    filas.update((clave, (perfil, vector)) for clave, perfil, vector in self._conexion.execute(
+                        f'SELECT clave, perfil, vector FROM resultados WHERE clave IN ({marcas})', tramo))
+                    self._conexion.execute(f'UPDATE resultados SET uso = ? WHERE clave IN ({marcas})',
+                                           [self._uso] + tramo)
+                referencias = list({vector for _, vector in filas.values()})
+                for desde in range(0, len(referencias), TAMANO_CONSULTA):
+                    tramo = referencias[desde:desde + TAMANO_CONSULTA]
+                    marcas = ','.join('?' * len(tramo))
+                    for vector, ids, pesos in self._conexion.execute(
+                            f'SELECT vector, ids, pesos FROM vectores WHERE vector IN ({marcas})', tramo):
+                        vectores[vector] = (np.frombuffer(ids, dtype=np.int32), np.frombuffer(pesos, dtype=np.float64))
+            encontrados = {clave: (perfil,) + vectores[vector] for clave, (perfil, vector) in filas.items()}
+            aciertos = sum(clave in encontrados for clave in claves)
+            self.aciertos += aciertos
+            self.fallos += len(claves) - aciertos
+            self.segundos_lectura += time.perf_counter() - inicio
+        return encontrados
+
+    def guardar_muchos(self, entradas: Iterable[Tuple[bytes, Resultado]]):
+        """Guarda pares (clave, (perfil, ids, pesos)) y desaloja lo más antiguo si se supera el máximo"""
+        inicio = time.perf_counter()
+        with self._candado:
+            self._uso += 1
+            filas, vectores, referencias = [], {}, {}
+            for clave, (perfil, ids, pesos) in entradas:
+                # Los resultados que comparten arreglos comparten vector: se serializa y resume una vez.
+                # Se guardan los propios arreglos para que su id no se reutilice mientras dure el
+                # lote (con un generador, los arreglos ya consumidos se liberarían)
+                compartido = referencias.get(id(pesos))
+                if compartido is not None and compartido[0] is ids and compartido[1] is pesos:
+                    vector = compartido[2]
+                else:
+                    datos_ids = np.asarray(ids, dtype=np.int32).tobytes()
+                    datos_pesos = np.asarray(pesos, dtype=np.float64).tobytes()
+                    vector = hashlib.blake2b(datos_ids + datos_pesos, digest_size=16).digest()
+                    referencias[id(pesos)] = (ids, pesos, vector)
+                    vectores[vector] = (vector, datos_ids, datos_pesos)
+                filas.append((clave, int(perfil), vector, self._uso))
+            with self._conexion:
+                self._conexion.executemany(
+                    'INSERT OR IGNORE INTO vectores (vector, ids, pesos) VALUES (?, ?, ?)', vectores.values())
+                # Misma clave, mismo contenido: las claves repetidas no se reescriben
+                cursor = self._conexion.executemany(
+                    'INSERT OR IGNORE INTO resultados (clave, perfil, vector, uso) VALUES (?, ?, ?, ?)', filas)
+                nuevas = max(cursor.rowcount, 0)
+                self._entradas += nuevas
+                self.escrituras += nuevas
+                sobran = self._entradas - self.max_entradas
+                if sobran > 0:
+                    desalojados = self._conexion.execute(
+                        'SELECT clave, vector FROM resultados ORDER BY uso LIMIT ?', (sobran,)).fetchall()
+                    self._conexion.executemany(
+                        'DELETE FROM resultados WHERE clave = ?', [(clave,) for clave, _ in desalojados])
+                    # Solo los vectores de los resultados desalojados pueden haber quedado huérfanos
+                    self._conexion.executemany(
+                        'DELETE FROM vectores WHERE vector = ? AND NOT EXISTS '
+                        '(SELECT 1 FROM resultados WHERE vector = ?)',
+                        [(vector, vector) for vector in {vector for _, vector in desalojados}])
+                    self._entradas -= sobran
+                    self.desalojos += sobran
+            self.segundos_escritura += time.perf_counter() - inicio
+
+    def limpiar(self):
+        with self._candado, self._conexion:
+            self._conexion.execute('DELETE FROM resultados')
+            self._conexion.execute('DELETE FROM vectores')
+            self._entradas = 0
+
+    def cerrar(self):
+        self._conexion.close()
+
+    def __enter__(self) -> 'AlmacenResultados':
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def estadisticas(self) -> Dict[str, float]:
+        """Resumen de aciertos y tiempos de E/S, como CacheLRU.estadisticas"""
+        consultas = self.aciertos + self.fallos
+        return {
+            'entradas': self._entradas,
+            'max_entradas': self.max_entradas,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'escrituras': self.escrituras,
+            'desalojos': self.desalojos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            'segundos_lectura': self.segundos_lectura,
+            'segundos_escritura': self.segundos_escritura,
+        }
+
+
+def recomendar_lote_con_almacen(sistema: SistemaInversion,
+                                almacen: AlmacenResultados,
+                                respuestas: Sequence[Dict[str, int]],
+                                montos: Sequence[float],
+                                plazos: Sequence[int],
+                                condiciones: Sequence[List[str]]) -> Tuple[List[PerfilRiesgo], np.ndarray]:
+    """
+    evaluar_perfil + recomendar_inversiones_lote calculando solo los clientes que no están en el almacén
+
+    Las filas con condiciones fuera de orden canónico (ver SistemaInversion.orden_canonico)
+    no pasan por el almacén, cuya clave no distingue el orden: se calculan con
+    recomendar_inversiones.
+
+    Returns:
+        (perfiles, matriz cliente×instrumento de montos), idénticos a los de
+        SistemaInversion.recomendar_inversiones_listas
+    """
+    base = sistema.base
+    claves = [almacen.clave(base.huella, r, p, c) if sistema.orden_canonico(c) else None
+              for r, p, c in zip(respuestas, plazos, condiciones)]
+    guardados = almacen.obtener_muchos([clave for clave in claves if clave is not None])
+    pesos = np.zeros((len(claves), len(base)))
+    perfiles: List[PerfilRiesgo] = [None] * len(claves)
+    pendientes = []
+    # Los clientes con el mismo vector de pesos se rellenan juntos
+    grupos: Dict[int, Tuple[np.ndarray, np.ndarray, List[int]]] = {}
+    for k, clave in enumerate(claves):
+        if clave is None:
+            perfiles[k] = sistema.evaluar_perfil(respuestas[k])
+            # Con monto 1 son los pesos; el monto se aplica al final como en el resto de filas
+            for nombre, peso in sistema.recomendar_inversiones(perfiles[k], 1.0, plazos[k], condiciones[k]).items():
+                pesos[k, base.indice[nombre]] = peso
+            continue
+        resultado = guardados.get(clave)
+        if resultado is None:
+            pendientes.append(k)
+            continue
+        perfil, ids, valores = resultado
+        perfiles[k] = PerfilRiesgo(perfil)
+        grupos.setdefault(id(ids), (ids, valores, []))[2].append(k)
+    for ids, valores, filas in grupos.values():
+        pesos[np.ix_(filas, ids)] = valores
+
+    if pendientes:
+        # Los pesos solo dependen del perfil, del tramo de plazo y de las condiciones:
+        # cada combinación distinta se calcula (y se guarda como vector) una sola vez
+        nuevos_perfiles = [sistema.evaluar_perfil(respuestas[k]) for k in pendientes]
+        tramos = np.searchsorted(base.plazos_distintos, [plazos[k] for k in pendientes], side='right').tolist()
+        combinaciones: Dict[tuple, int] = {}
+        representantes = []  # posición en `pendientes` del primer cliente de cada combinación
+        fila_combinacion = []
+        for i, (k, perfil, tramo) in enumerate(zip(pendientes, nuevos_perfiles, tramos)):
+            combinacion = (perfil, tramo, frozenset(condiciones[k]))
+            if combinacion not in combinaciones:
+                combinaciones[combinacion] = len(representantes)
+                representantes.append(i)
+            fila_combinacion.append(combinaciones[combinacion])
+        # Con monto 1 el lote devuelve los pesos normalizados, sin redondeo adicional
+        calculados = sistema.recomendar_inversiones_lote(
+            [nuevos_perfiles[i] for i in representantes], np.ones(len(representantes)),
+            [plazos[pendientes[i]] for i in representantes],
+            sistema.mascara_condiciones([condiciones[pendientes[i]] for i in representantes]))
+        pesos[pendientes] = calculados[fila_combinacion]
+        vectores = [(ids, calculados[fila, ids]) for fila, ids in enumerate(map(np.flatnonzero, calculados))]
+        entradas = {}
+        for k, perfil, fila in zip(pendientes, nuevos_perfiles, fila_combinacion):
+            perfiles[k] = perfil
+            entradas[claves[k]] = (perfil.value,) + vectores[fila]
+        almacen.guardar_muchos(entradas.items())
+    pesos *= np.asarray(montos, dtype=np.float64)[:, None]
+    return perfiles, pesos
@@ -0,0 +1,284 @@
+"""
+Backtesting de las recomendaciones sobre series históricas de rendimientos
+
+Reproduce una línea temporal de condiciones de mercado sobre rendimientos diarios
+de los instrumentos y rebalancea periódicamente a la cartera recomendada. Como los
+pesos solo dependen del perfil, del plazo y de las condiciones, la simulación se hace
+una vez por combinación distinta (perfil, plazo) y el valor de cada cliente es su
+monto por la curva de su combinación.
+
+Formatos de entrada:
+    rendimientos CSV: columna `fecha` y una columna por instrumento con el rendimiento diario
+    rendimientos NPZ: arreglos `rendimientos` (días×instrumentos), `nombres` y opcionalmente `fechas`
+    condiciones CSV: columnas `fecha` y `condiciones` (separadas por ';'); cada fila rige
+        desde su fecha hasta la siguiente
+
+Uso: python backtest.py rendimientos.csv condiciones.csv [--frecuencia 21] [--clientes 1000]
+"""
+import argparse
+import csv
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+DIAS_POR_ANO = 252
+SEPARADOR_CONDICIONES = ';'
+
+
+def cargar_rendimientos(ruta: str) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Lee una serie de rendimientos diarios
+
+    Returns:
+        (fechas, nombres de instrumentos, matriz días×instrumentos)
+    """
+    if ruta.endswith('.npy'):
+        raise ValueError(f"{ruta}: un .npy no guarda los nombres de los instrumentos; use un .npz")
+    if ruta.endswith('.npz'):
+        with np.load(ruta, allow_pickle=False) as datos:
+            rendimientos = np.asarray(datos['rendimientos'], dtype=np.float64)
+            fechas = datos['fechas'] if 'fechas' in datos else np.arange(len(rendimientos))
+            return np.asarray(fechas).astype(str), datos['nombres'].tolist(), rendimientos
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        lector = csv.reader(archivo)
+        cabecera = next(lector)
+        if cabecera[0] != 'fecha':
+            raise ValueError(f"{ruta}: la primera columna debe ser 'fecha'")
+        filas = list(lector)
+    fechas = np.array([fila[0] for fila in filas])
+    rendimientos = np.array([fila[1:] for fila in filas], dtype=np.float64).reshape(len(filas), len(cabecera) - 1)
+    return fechas, cabecera[1:], rendimientos
+
+
+def cargar_condiciones(ruta: str) -> List[Tuple[str, List[str]]]:
+    """Lee la línea temporal de condiciones como [(fecha de inicio, condiciones)] ordenada por fecha"""
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        tramos = [(registro['fecha'], [c for c in (registro.get('condiciones') or '').split(SEPARADOR_CONDICIONES) if c])
+                  for registro in csv.DictReader(archivo)]
+    return sorted(tramos, key=lambda tramo: tramo[0])
+
+
+@dataclass
+class ResultadoBacktest:
+    """
+    Curvas de valor por combinación (perfil, plazo) y su correspondencia con los clientes
+
+    Las curvas empiezan en 1.0 el día anterior al primer rendimiento, así que tienen
+    un punto más que `fechas`.
+    """
+    fechas: np.ndarray
+    combinaciones: np.ndarray          # combinaciones×2 con (perfil, plazo)
+    curvas: np.ndarray                 # combinaciones×(días+1)
+    rotacion: np.ndarray               # combinaciones×rebalanceos, fracción de la cartera negociada
+    dias_rebalanceo: np.ndarray
+    combinacion_cliente: np.ndarray    # índice de combinación de cada cliente
+    montos: np.ndarray = field(repr=False)
+
+    def valores(self, clientes: Optional[Union[slice, np.ndarray]] = None) -> np.ndarray:
+        """Valor diario de los clientes (clientes×(días+1)); conviene pedirlo por tramos"""
+        seleccion = slice(None) if clientes is None else clientes
+        return self.montos[seleccion, None] * self.curvas[self.combinacion_cliente[seleccion]]
+
+    def rendimientos_diarios(self) -> np.ndarray:
+        return self.curvas[:, 1:] / self.curvas[:, :-1] - 1
+
+    def drawdowns(self) -> np.ndarray:
+        """Caída desde el máximo previo de cada curva (combinaciones×(días+1), valores ≤ 0)"""
+        return self.curvas / np.maximum.accumulate(self.curvas, axis=1) - 1
+
+    def rendimiento_movil(self, ventana: int = DIAS_POR_ANO) -> np.ndarray:
+        """Rendimiento acumulado en cada ventana de `ventana` días (combinaciones×(días+1-ventana))"""
+        return self.curvas[:, ventana:] / self.curvas[:, :-ventana] - 1
+
+    def volatilidad_movil(self, ventana: int = DIAS_POR_ANO) -> np.ndarray:
+        """Volatilidad anualizada en ventanas móviles, con sumas acumuladas (combinaciones×(días+1-ventana))"""
+        r = self.rendimientos_diarios()
+        ceros = np.zeros((len(r), 1))
+        suma = np.concatenate((ceros, np.cumsum(r, axis=1)), axis=1)
+        suma_cuadrados = np.concatenate((ceros, np.cumsum(r * r, axis=1)), axis=1)
+        media = (suma[:, ventana:] - suma[:, :-ventana]) / ventana
+        varianza = (suma_cuadrados[:, ventana:] - suma_cuadrados[:, :-ventana]) / ventana - media ** 2
+        return np.sqrt(np.maximum(varianza, 0.0) * ventana / (ventana - 1) * DIAS_POR_ANO)
+
+    def drawdown_movil(self, ventana: int = DIAS_POR_ANO) -> np.ndarray:
+        """
+        Peor caída desde el máximo dentro de cada ventana (combinaciones×(días+1-ventana))
+
+        Avanza todas las ventanas a la vez un día por paso con su máximo acumulado, así
+        que solo ocupa dos arreglos del tamaño del resultado en lugar del tensor
+        combinaciones×días×ventana.
+        """
+        curvas = self.curvas
+        n = max(curvas.shape[1] - ventana, 0)
+        maximo = curvas[:, :n].copy()
+        caida = np.zeros_like(maximo)
+        for k in range(1, ventana + 1):
+            valor = curvas[:, k:k + n]
+            np.maximum(maximo, valor, out=maximo)
+            np.minimum(caida, valor / maximo - 1, out=caida)
+        return caida
+
+    def metricas(self) -> dict:
+        """Métricas por combinación: rendimiento total y anualizado, volatilidad, máxima caída y rotación"""
+        dias = self.curvas.shape[1] - 1
+        total = self.curvas[:, -1] - 1
+        r = self.rendimientos_diarios()
+        return {
+            'rendimiento_total': total,
+            'rendimiento_anualizado': (1 + total) ** (DIAS_POR_ANO / max(dias, 1)) - 1,
+            'volatilidad': r.std(axis=1, ddof=1) * np.sqrt(DIAS_POR_ANO) if dias > 1 else np.zeros(len(total)),
+            'maxima_caida': self.drawdowns().min(axis=1),
+            'rotacion_media': self.rotacion.mean(axis=1) if self.rotacion.shape[1] else np.zeros(len(total)),
+        }
+
+    def metricas_clientes(self) -> dict:
+        """Las métricas de cada cliente (son las de su combinación) y su ganancia en dinero"""
+        por_cliente = {nombre: valores[self.combinacion_cliente] for nombre, valores in self.metricas().items()}
+        por_cliente['ganancia'] = self.montos * por_cliente['rendimiento_total']
+        return por_cliente
+
+    def resumen(self) -> str:
+        """Texto con los resultados agregados, en el estilo de explicar_recomendacion"""
+        metricas = self.metricas_clientes()
+        perfiles = {perfil.value: perfil.name for perfil in PerfilRiesgo}
+        texto = f"Backtest de {len(self.montos):,} clientes durante {len(self.fechas):,} días "
+        texto += f"({len(self.dias_rebalanceo)} rebalanceos):\n"
+        texto += f"- Ganancia total: ${metricas['ganancia'].sum():,.2f}\n"
+        for valor, nombre in perfiles.items():
+            clientes = self.combinaciones[self.combinacion_cliente, 0] == valor
+            if clientes.any():
+                texto += (f"- {nombre}: rendimiento anualizado medio {metricas['rendimiento_anualizado'][clientes].mean() * 100:.2f}%, "
+                          f"máxima caída media {metricas['maxima_caida'][clientes].mean() * 100:.2f}%\n")
+        return texto
+
+
+class Backtester:
+    """Rebalancea periódicamente a la cartera recomendada sobre rendimientos históricos"""
+
+    def __init__(self,
+                 sistema: SistemaInversion,
+                 fechas: Sequence[str],
+                 nombres: Sequence[str],
+                 rendimientos: np.ndarray,
+                 condiciones: Sequence[Tuple[str, List[str]]] = ()):
+        """
+        Args:
+            sistema: Sistema experto con la base de conocimientos
+            fechas: Fecha de cada fila de `rendimientos` (ordenadas, comparables como texto ISO)
+            nombres: Instrumento de cada columna de `rendimientos`
+            rendimientos: Rendimientos diarios días×instrumentos
+            condiciones: Línea temporal [(fecha de inicio, condiciones)] como la de cargar_condiciones
+        """
+        self.sistema = sistema
+        self.fechas = np.asarray(fechas).astype(str)
+        base = sistema.base
+        columnas = {nombre: j for j, nombre in enumerate(nombres)}
+        faltan = [nombre for nombre in base.nombres if nombre not in columnas]
+        if faltan:
+            raise ValueError(f"Faltan series de rendimientos para {len(faltan)} instrumentos: {', '.join(faltan[:5])}")
+        # Columnas reordenadas según la base
+        self.rendimientos = np.asarray(rendimientos, dtype=np.float64)[:, [columnas[nombre] for nombre in base.nombres]]
+        if len(self.rendimientos) != len(self.fechas):
+            raise ValueError("Hay distinto número de fechas que de filas de rendimientos")
+
+        # Máscara día×condición: cada tramo rige desde su fecha hasta el siguiente
+        self.mascara = np.zeros((len(self.fechas), len(base.condiciones)), dtype=bool)
+        if condiciones:
+            inicios = np.searchsorted(self.fechas, [fecha for fecha, _ in condiciones])
+            tramos = sistema.mascara_condiciones([lista for _, lista in condiciones])
+            vigente = np.searchsorted(inicios, np.arange(len(self.fechas)), side='right') - 1
+            definido = vigente >= 0
+            self.mascara[definido] = tramos[vigente[definido]]
+
+    def dias_rebalanceo(self, frecuencia: int, al_cambiar_condiciones: bool = True) -> np.ndarray:
+        """Días en que se fija la cartera: el primero, cada `frecuencia` días y, si se pide, al cambiar las condiciones"""
+        if frecuencia < 1:
+            raise ValueError(f"La frecuencia de rebalanceo debe ser de al menos un día: {frecuencia}")
+        dias = set(range(0, len(self.fechas), frecuencia))
+        if al_cambiar_condiciones and len(self.fechas) > 1:
+            cambios = np.flatnonzero((self.mascara[1:] != self.mascara[:-1]).any(axis=1)) + 1
+            dias.update(cambios.tolist())
+        return np.array(sorted(dias), dtype=np.int64)
+
+    def ejecutar(self,
+                 perfiles: Union[Sequence[PerfilRiesgo], np.ndarray],
+                 montos: Union[Sequence[float], np.ndarray],
+                 plazos: Union[Sequence[int], np.ndarray],
+                 frecuencia: int = 21,
+                 al_cambiar_condiciones: bool = True) -> ResultadoBacktest:
+        """
+        Ejecuta el backtest de una población de clientes
+
+        Args:
+            perfiles, montos, plazos: Datos de cada cliente, como en recomendar_inversiones_lote
+            frecuencia: Días entre rebalanceos
+            al_cambiar_condiciones: Rebalancear también cuando cambian las condiciones de mercado
+
+        Returns:
+            ResultadoBacktest con una curva por combinación (perfil, plazo)
+        """
+        if not isinstance(perfiles, np.ndarray):
+            perfiles = [p.value if isinstance(p, PerfilRiesgo) else p for p in perfiles]
+        perfiles = np.asarray(perfiles, dtype=np.int64)
+        plazos = np.asarray(plazos, dtype=np.int64)
+        combinaciones, combinacion_cliente = np.unique(np.stack((perfiles, plazos), axis=1), axis=0, return_inverse=True)
+        n_combinaciones = len(combinaciones)
+        dias = self.dias_rebalanceo(frecuencia, al_cambiar_condiciones)
+
+        curvas = np.empty((n_combinaciones, len(self.fechas) + 1))
+        curvas[:, 0] = 1.0
+        rotacion = np.empty((n_combinaciones, len(dias)))
+        valor = np.ones(n_combinaciones)
+        actuales = np.zeros((n_combinaciones, self.rendimientos.shape[1]))  # pesos a la deriva antes de rebalancear
+        unos = np.ones(n_combinaciones)
+        for k, inicio in enumerate(dias.tolist()):
+            fin = dias[k + 1] if k + 1 < len(dias) else len(self.fechas)
+            # Una sola llamada por lotes: todas las combinaciones comparten las condiciones del día
+            objetivo = self.sistema.recomendar_inversiones_lote(
+                combinaciones[:, 0], unos, combinaciones[:, 1],
+                np.broadcast_to(self.mascara[inicio], (n_combinaciones, self.mascara.shape[1])))
+            rotacion[:, k] = np.abs(objetivo - actuales).sum(axis=1) / 2 if k else objetivo.sum(axis=1)
+            # Sin instrumentos válidos la cartera queda en efectivo (crecimiento 1)
+            efectivo = 1.0 - objetivo.sum(axis=1)
+            crecimiento = np.cumprod(1.0 + self.rendimientos[inicio:fin], axis=0)
+            tramo = crecimiento @ objetivo.T + efectivo         # días del tramo × combinaciones
+            curvas[:, inicio + 1:fin + 1] = valor[:, None] * tramo.T
+            valor = curvas[:, fin]
+            actuales = objetivo * crecimiento[-1] / tramo[-1][:, None]
+
+        return ResultadoBacktest(
+            fechas=self.fechas,
+            combinaciones=combinaciones,
+            curvas=curvas,
+            rotacion=rotacion,
+            dias_rebalanceo=dias,
+            combinacion_cliente=combinacion_cliente.reshape(-1),
+            montos=np.asarray(montos, dtype=np.float64),
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Backtest de las recomendaciones sobre rendimientos históricos')
+    parser.add_argument('rendimientos', help='CSV o NPZ de rendimientos diarios')
+    parser.add_argument('condiciones', nargs='?', help='CSV con la línea temporal de condiciones')
+    parser.add_argument('--frecuencia', type=int, default=21, help='Días entre rebalanceos')
+    parser.add_argument('--clientes', type=int, default=1_000, help='Clientes sintéticos a simular')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fechas, nombres, rendimientos = cargar_rendimientos(args.rendimientos)
+    condiciones = cargar_condiciones(args.condiciones) if args.condiciones else []
+    backtester = Backtester(SistemaInversion(), fechas, nombres, rendimientos, condiciones)
+    rng = np.random.default_rng(args.semilla)
+    resultado = backtester.ejecutar(rng.integers(1, 4, size=args.clientes),
+                                    rng.uniform(1_000, 1_000_000, size=args.clientes),
+                                    rng.integers(1, 31, size=args.clientes),
+                                    frecuencia=args.frecuencia)
+    print(resultado.resumen())
+
+
+if __name__ == '__main__':
+    main()
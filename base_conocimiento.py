@@ -0,0 +1,290 @@
+import hashlib
+import json
+from functools import cached_property
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+class TablaObservable(dict):
+    """
+    Diccionario que avisa de cualquier modificación, incluidas las de sus diccionarios anidados
+
+    `al_modificar` recibe la clave de primer nivel afectada, o None si cambió toda la tabla.
+    """
+
+    def __init__(self, datos: Dict, al_modificar: Callable[[Optional[str]], None], clave_raiz: Optional[str] = None):
+        self._al_modificar = al_modificar
+        self._clave_raiz = clave_raiz
+        super().__init__((clave, self._envolver(clave, valor)) for clave, valor in datos.items())
+
+    def _envolver(self, clave, valor):
+        # Los diccionarios anidados notifican con la clave de primer nivel de la que cuelgan
+        if isinstance(valor, dict):
+            raiz = clave if self._clave_raiz is None else self._clave_raiz
+            return TablaObservable(valor, self._al_modificar, raiz)
+        return valor
+
+    def _notificar(self, clave=None):
+        self._al_modificar(clave if self._clave_raiz is None else self._clave_raiz)
+
+    def __setitem__(self, clave, valor):
+        super().__setitem__(clave, self._envolver(clave, valor))
+        self._notificar(clave)
+
+    def __delitem__(self, clave):
+        super().__delitem__(clave)
+        self._notificar(clave)
+
+    def pop(self, clave, *args):
+        existia = clave in self
+        valor = super().pop(clave, *args)
+        if existia:
+            self._notificar(clave)
+        return valor
+
+    def popitem(self):
+        clave, valor = super().popitem()
+        self._notificar(clave)
+        return clave, valor
+
+    def setdefault(self, clave, valor=None):
+        if clave not in self:
+            self[clave] = valor
+        return super().__getitem__(clave)
+
+    def update(self, *args, **kwargs):
+        for clave, valor in dict(*args, **kwargs).items():
+            self[clave] = valor
+
+    def __ior__(self, otro):
+        self.update(otro)
+        return self
+
+    def clear(self):
+        super().clear()
+        self._notificar()
+
+    def __reduce__(self):
+        # Al serializar se pierde la observación: se reconstruye como dict normal
+        return dict, (dict(self),)
+
+
+class BaseConocimiento:
+    """
+    Base de conocimientos compilada a arreglos contiguos
+
+    Los nombres de instrumentos y condiciones se internan a identificadores enteros
+    (su posición), los atributos de cada instrumento se guardan en arreglos tipados y
+    los ajustes de las reglas de mercado en una matriz densa condición×instrumento.
+
+    Los arreglos pueden venir mapeados en memoria desde disco (ver base_en_disco); las
+    estructuras de Python que dependen del tamaño del catálogo (tuplas de nombres,
+    índices) solo se construyen cuando se piden.
+    """
+
+    def __init__(self,
+                 nombres: Iterable[str],
+                 condiciones: Iterable[str],
+                 riesgo: np.ndarray,
+                 rendimiento_esperado: np.ndarray,
+                 liquidez: np.ndarray,
+                 plazo_minimo: np.ndarray,
+                 perfil_recomendado: np.ndarray,
+                 ajustes: np.ndarray,
+                 origen: Optional[str] = None):
+        self._nombres = nombres if isinstance(nombres, np.ndarray) else tuple(nombres)
+        self.condiciones = tuple(condiciones)
+        self.riesgo = self._solo_lectura(riesgo, np.float64)
+        self.rendimiento_esperado = self._solo_lectura(rendimiento_esperado, np.float64)
+        self.liquidez = self._solo_lectura(liquidez, np.float64)
+        self.plazo_minimo = self._solo_lectura(plazo_minimo, np.int64)
+        self.perfil_recomendado = self._solo_lectura(perfil_recomendado, np.int8) # valor del PerfilRiesgo
+        self.ajustes = self._solo_lectura(ajustes, np.float64).reshape(len(self.condiciones), len(self.riesgo))
+        self.origen = origen # ruta del archivo del que se cargó, si lo hay
+
+    @staticmethod
+    def _solo_lectura(arreglo, dtype) -> np.ndarray:
+        arreglo = np.ascontiguousarray(arreglo, dtype=dtype)
+        arreglo.flags.writeable = False
+        return arreglo
+
+    @classmethod
+    def compilar(cls, instrumentos: Dict[str, Dict], reglas_mercado: Dict[str, Dict[str, float]]) -> 'BaseConocimiento':
+        """Compila las tablas de diccionarios de SistemaInversion"""
+        infos = list(instrumentos.values())
+        return cls(
+            nombres=instrumentos.keys(),
+            condiciones=reglas_mercado.keys(),
+            riesgo=[info['riesgo'] for info in infos],
+            rendimiento_esperado=[info['rendimiento_esperado'] for info in infos],
+            liquidez=[info['liquidez'] for info in infos],
+            plazo_minimo=[info['plazo_minimo'] for info in infos],
+            perfil_recomendado=[info['perfil_recomendado'].value for info in infos],
+            ajustes=[[ajustes.get(nombre, 0.0) for nombre in instrumentos] for ajustes in reglas_mercado.values()],
+        )
+
+    def __len__(self) -> int:
+        return len(self.riesgo)
+
+    def _heredar(self, anterior: 'BaseConocimiento', *propiedades: str) -> 'BaseConocimiento':
+        """Reutiliza las propiedades en caché de `anterior` que el cambio no afecta"""
+        for propiedad in propiedades:
+            if propiedad in anterior.__dict__:
+                self.__dict__[propiedad] = anterior.__dict__[propiedad]
+        return self
+
+    def _fragmentos_sin(self, anterior: 'BaseConocimiento', nombre: str):
+        # Los fragmentos ya formateados siguen valiendo salvo el del instrumento modificado
+        if 'fragmentos_explicacion' in anterior.__dict__:
+            fragmentos = FragmentosExplicacion(self)
+            fragmentos.update(anterior.fragmentos_explicacion)
+            fragmentos.pop(nombre, None)
+            self.__dict__['fragmentos_explicacion'] = fragmentos
+
+    def con_instrumento(self,
+                        nombre: str,
+                        riesgo: float,
+                        rendimiento_esperado: float,
+                        liquidez: float,
+                        plazo_minimo: int,
+                        perfil_recomendado: int,
+                        ajustes: Iterable[float]) -> 'BaseConocimiento':
+        """
+        Copia de la base con el instrumento añadido al final o reemplazado en su posición
+
+        Args:
+            nombre, riesgo, ...: Atributos del instrumento (perfil por su valor entero)
+            ajustes: Ajuste de cada condición para el instrumento, en el orden de `condiciones`
+        """
+        columna = np.asarray(list(ajustes), dtype=np.float64).reshape(len(self.condiciones), 1)
+        valores = (riesgo, rendimiento_esperado, liquidez, plazo_minimo, perfil_recomendado)
+        i = self.indice.get(nombre)
+        if i is None:
+            nombres = self.nombres + (nombre,)
+            columnas = [np.append(arreglo, valor) for arreglo, valor in zip(self._columnas(), valores)]
+            ajustes_nuevos = np.concatenate((self.ajustes, columna), axis=1)
+        else:
+            nombres = self._nombres
+            columnas = [arreglo.copy() for arreglo in self._columnas()]
+            for arreglo, valor in zip(columnas, valores):
+                arreglo[i] = valor
+            ajustes_nuevos = self.ajustes.copy()
+            ajustes_nuevos[:, i] = columna[:, 0]
+        nueva = BaseConocimiento(nombres, self.condiciones, *columnas, ajustes=ajustes_nuevos)
+        nueva._heredar(self, 'indice_condiciones')
+        if i is None:
+            indice = dict(self.indice)
+            indice[nombre] = len(indice)
+            nueva.__dict__['indice'] = indice
+        else:
+            nueva._heredar(self, 'nombres', 'indice')
+        nueva._fragmentos_sin(self, nombre)
+        return nueva
+
+    def sin_instrumento(self, nombre: str) -> 'BaseConocimiento':
+        """Copia de la base sin el instrumento `nombre`"""
+        i = self.indice[nombre]
+        nombres = self.nombres[:i] + self.nombres[i + 1:]
+        columnas = [np.delete(arreglo, i) for arreglo in self._columnas()]
+        nueva = BaseConocimiento(nombres, self.condiciones, *columnas, ajustes=np.delete(self.ajustes, i, axis=1))
+        nueva._heredar(self, 'indice_condiciones')
+        nueva._fragmentos_sin(self, nombre)
+        return nueva
+
+    def con_condicion(self, condicion: str, ajustes: Iterable[float]) -> 'BaseConocimiento':
+        """Copia de la base con la fila de ajustes de `condicion` añadida al final o reemplazada"""
+        fila = np.asarray(list(ajustes), dtype=np.float64).reshape(1, len(self))
+        j = self.indice_condiciones.get(condicion)
+        if j is None:
+            condiciones = self.condiciones + (condicion,)
+            ajustes_nuevos = np.concatenate((self.ajustes, fila), axis=0)
+        else:
+            condiciones = self.condiciones
+            ajustes_nuevos = self.ajustes.copy()
+            ajustes_nuevos[j] = fila[0]
+        nueva = BaseConocimiento(self._nombres, condiciones, *self._columnas(), ajustes=ajustes_nuevos)
+        # Las columnas de instrumentos son las mismas: se comparten índices, requisitos y fragmentos
+        nueva._heredar(self, 'nombres', 'indice', 'plazos_distintos', 'requisitos', 'fragmentos_explicacion')
+        if j is not None:
+            nueva._heredar(self, 'indice_condiciones')
+        return nueva
+
+    def sin_condicion(self, condicion: str) -> 'BaseConocimiento':
+        """Copia de la base sin la fila de ajustes de `condicion`"""
+        j = self.indice_condiciones[condicion]
+        condiciones = self.condiciones[:j] + self.condiciones[j + 1:]
+        nueva = BaseConocimiento(self._nombres, condiciones, *self._columnas(), ajustes=np.delete(self.ajustes, j, axis=0))
+        nueva._heredar(self, 'nombres', 'indice', 'plazos_distintos', 'requisitos', 'fragmentos_explicacion')
+        return nueva
+
+    def _columnas(self) -> Tuple[np.ndarray, ...]:
+        return (self.riesgo, self.rendimiento_esperado, self.liquidez, self.plazo_minimo, self.perfil_recomendado)
+
+    @cached_property
+    def huella(self) -> str:
+        """Resumen SHA-256 del contenido: cambia si cambia cualquier instrumento, condición o ajuste"""
+        resumen = hashlib.sha256(json.dumps([list(self.nombres), list(self.condiciones)]).encode('utf-8'))
+        for arreglo in self._columnas() + (self.ajustes,):
+            resumen.update(arreglo.dtype.str.encode('ascii'))
+            resumen.update(np.ascontiguousarray(arreglo))
+        return resumen.hexdigest()
+
+    @cached_property
+    def nombres(self) -> Tuple[str, ...]:
+        """Nombre de cada instrumento, en orden de id"""
+        if isinstance(self._nombres, np.ndarray):
+            return tuple(self._nombres.tolist())
+        return self._nombres
+
+    @cached_property
+    def indice(self) -> Dict[str, int]:
+        """Identificador entero de cada instrumento"""
+        return {nombre: i for i, nombre in enumerate(self.nombres)}
+
+    @cached_property
+    def indice_condiciones(self) -> Dict[str, int]:
+        """Identificador entero de cada condición de mercado"""
+        return {condicion: j for j, condicion in enumerate(self.condiciones)}
+
+    @cached_property
+    def factores(self) -> np.ndarray:
+        """Matriz condición×instrumento de multiplicadores (1 + ajuste)"""
+        factores = 1 + self.ajustes
+        factores.flags.writeable = False
+        return factores
+
+    @cached_property
+    def filas_factores(self) -> Tuple[Tuple[float, ...], ...]:
+        """Multiplicadores por condición como tuplas de floats para la ruta escalar"""
+        return tuple(tuple(fila) for fila in self.factores.tolist())
+
+    @cached_property
+    def fragmentos_explicacion(self) -> 'FragmentosExplicacion':
+        """Texto fijo (rendimiento y riesgo) de cada instrumento en explicar_recomendacion"""
+        return FragmentosExplicacion(self)
+
+    @cached_property
+    def plazos_distintos(self) -> Tuple[int, ...]:
+        """Valores distintos de plazo_minimo ordenados, que delimitan los tramos de plazo"""
+        return tuple(sorted(set(self.plazo_minimo.tolist())))
+
+    @cached_property
+    def requisitos(self) -> Tuple[Tuple[int, int], ...]:
+        """Pares (plazo_minimo, valor del perfil recomendado) por instrumento para la ruta escalar"""
+        return tuple(zip(self.plazo_minimo.tolist(), self.perfil_recomendado.tolist()))
+
+
+class FragmentosExplicacion(dict):
+    """Caché perezosa nombre → fragmento de explicación, que se llena al pedir cada instrumento"""
+
+    def __init__(self, base: BaseConocimiento):
+        super().__init__()
+        self._base = base
+
+    def __missing__(self, nombre: str) -> str:
+        i = self._base.indice[nombre]
+        fragmento = (f"  Rendimiento esperado: {self._base.rendimiento_esperado[i]*100:.1f}%\n"
+                     f"  Nivel de riesgo: {self._base.riesgo[i]*100:.1f}%\n\n")
+        self[nombre] = fragmento
+        return fragmento
@@ -0,0 +1,172 @@
+"""
+Base de conocimientos en disco, en formato columnar de archivos .npy mapeados en memoria
+
+Un directorio de base contiene un .npy por columna (nombres, riesgo,
+rendimiento_esperado, liquidez, plazo_minimo, perfil_recomendado), la lista de
+condiciones y la matriz de ajustes condición×instrumento. Al cargarla con
+`mmap_mode='r'` el arranque no depende del tamaño del catálogo y los procesos que
+abren el mismo directorio comparten las páginas en memoria.
+
+Uso:
+    python base_en_disco.py json catalogo.json base/
+    python base_en_disco.py csv instrumentos.csv reglas.csv base/
+"""
+import argparse
+import csv
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from base_conocimiento import BaseConocimiento
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+FORMATO = 1
+COLUMNAS = ('nombres', 'condiciones', 'riesgo', 'rendimiento_esperado', 'liquidez',
+            'plazo_minimo', 'perfil_recomendado', 'ajustes')
+
+
+def guardar_base(base: BaseConocimiento, ruta: str):
+    """Escribe `base` en el directorio `ruta`"""
+    os.makedirs(ruta, exist_ok=True)
+    columnas = {
+        'nombres': np.array(base.nombres, dtype=str) if len(base) else np.array([], dtype='U1'),
+        'condiciones': np.array(base.condiciones, dtype=str) if base.condiciones else np.array([], dtype='U1'),
+        'riesgo': base.riesgo,
+        'rendimiento_esperado': base.rendimiento_esperado,
+        'liquidez': base.liquidez,
+        'plazo_minimo': base.plazo_minimo,
+        'perfil_recomendado': base.perfil_recomendado,
+        'ajustes': base.ajustes,
+    }
+    for nombre, columna in columnas.items():
+        np.save(os.path.join(ruta, f'{nombre}.npy'), np.ascontiguousarray(columna))
+    with open(os.path.join(ruta, 'base.json'), 'w', encoding='utf-8') as archivo:
+        json.dump({'formato': FORMATO, 'instrumentos': len(base), 'condiciones': len(base.condiciones)}, archivo)
+
+
+def cargar_base(ruta: str, mmap: bool = True) -> BaseConocimiento:
+    """
+    Carga la base del directorio `ruta`
+
+    Args:
+        ruta: Directorio escrito por guardar_base
+        mmap: Si es True, los arreglos se mapean en memoria en lugar de leerse
+    """
+    with open(os.path.join(ruta, 'base.json'), encoding='utf-8') as archivo:
+        metadatos = json.load(archivo)
+    if metadatos.get('formato') != FORMATO:
+        raise ValueError(f"Formato de base no soportado en {ruta}: {metadatos.get('formato')}")
+    columnas = {
+        nombre: np.load(os.path.join(ruta, f'{nombre}.npy'), mmap_mode='r' if mmap else None)
+        for nombre in COLUMNAS
+    }
+    # Las condiciones son pocas: se leen como tupla de str
+    columnas['condiciones'] = columnas['condiciones'].tolist()
+    return BaseConocimiento(origen=os.path.abspath(ruta), **columnas)
+
+
+def cargar_sistema(ruta: str, **kwargs) -> SistemaInversion:
+    """SistemaInversion sobre la base del directorio `ruta`; `kwargs` se pasan al constructor"""
+    return SistemaInversion(base=cargar_base(ruta), **kwargs)
+
+
+def _perfil(valor) -> int:
+    """Acepta el perfil por nombre ('MODERADO') o por valor (2)"""
+    if isinstance(valor, str) and not valor.isdigit():
+        return PerfilRiesgo[valor.strip().upper()].value
+    return PerfilRiesgo(int(valor)).value
+
+
+def _compilar(nombres: List[str], columnas: Dict[str, list], reglas: Dict[str, Dict[str, float]]) -> BaseConocimiento:
+    indice = {nombre: i for i, nombre in enumerate(nombres)}
+    ajustes = np.zeros((len(reglas), len(nombres)), dtype=np.float64)
+    for j, ajustes_condicion in enumerate(reglas.values()):
+        for instrumento, ajuste in ajustes_condicion.items():
+            ajustes[j, indice[instrumento]] = float(ajuste)
+    return BaseConocimiento(
+        nombres=nombres,
+        condiciones=list(reglas),
+        riesgo=columnas['riesgo'],
+        rendimiento_esperado=columnas['rendimiento_esperado'],
+        liquidez=columnas['liquidez'],
+        plazo_minimo=columnas['plazo_minimo'],
+        perfil_recomendado=columnas['perfil_recomendado'],
+        ajustes=ajustes,
+    )
+
+
+def convertir_json(ruta_json: str, ruta_destino: str) -> BaseConocimiento:
+    """
+    Convierte un catálogo JSON con la forma de las tablas de SistemaInversion
+
+    {"instrumentos": {nombre: {"riesgo": ..., "perfil_recomendado": "MODERADO", ...}},
+     "reglas_mercado": {condicion: {instrumento: ajuste}}}
+    """
+    with open(ruta_json, encoding='utf-8') as archivo:
+        catalogo = json.load(archivo)
+    instrumentos = catalogo['instrumentos']
+    columnas = {
+        campo: [info[campo] for info in instrumentos.values()]
+        for campo in ('riesgo', 'rendimiento_esperado', 'liquidez', 'plazo_minimo')
+    }
+    columnas['perfil_recomendado'] = [_perfil(info['perfil_recomendado']) for info in instrumentos.values()]
+    base = _compilar(list(instrumentos), columnas, catalogo.get('reglas_mercado', {}))
+    guardar_base(base, ruta_destino)
+    return base
+
+
+def convertir_csv(ruta_instrumentos: str, ruta_reglas: Optional[str], ruta_destino: str) -> BaseConocimiento:
+    """
+    Convierte un catálogo en CSV
+
+    Args:
+        ruta_instrumentos: CSV con columnas nombre, riesgo, rendimiento_esperado, liquidez,
+            plazo_minimo y perfil_recomendado
+        ruta_reglas: CSV en formato largo con columnas condicion, instrumento, ajuste (opcional)
+        ruta_destino: Directorio donde se guarda la base
+    """
+    nombres = []
+    columnas = {campo: [] for campo in ('riesgo', 'rendimiento_esperado', 'liquidez', 'plazo_minimo', 'perfil_recomendado')}
+    with open(ruta_instrumentos, newline='', encoding='utf-8') as archivo:
+        for registro in csv.DictReader(archivo):
+            nombres.append(registro['nombre'])
+            columnas['riesgo'].append(float(registro['riesgo']))
+            columnas['rendimiento_esperado'].append(float(registro['rendimiento_esperado']))
+            columnas['liquidez'].append(float(registro['liquidez']))
+            columnas['plazo_minimo'].append(int(registro['plazo_minimo']))
+            columnas['perfil_recomendado'].append(_perfil(registro['perfil_recomendado']))
+
+    reglas: Dict[str, Dict[str, float]] = {}
+    if ruta_reglas:
+        with open(ruta_reglas, newline='', encoding='utf-8') as archivo:
+            for registro in csv.DictReader(archivo):
+                reglas.setdefault(registro['condicion'], {})[registro['instrumento']] = float(registro['ajuste'])
+
+    base = _compilar(nombres, columnas, reglas)
+    guardar_base(base, ruta_destino)
+    return base
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Convierte un catálogo de instrumentos al formato en disco')
+    subparsers = parser.add_subparsers(dest='origen', required=True)
+    desde_json = subparsers.add_parser('json', help='Catálogo JSON con instrumentos y reglas_mercado')
+    desde_json.add_argument('catalogo')
+    desde_json.add_argument('destino')
+    desde_csv = subparsers.add_parser('csv', help='CSV de instrumentos y CSV largo de reglas')
+    desde_csv.add_argument('instrumentos')
+    desde_csv.add_argument('reglas', nargs='?')
+    desde_csv.add_argument('destino')
+    args = parser.parse_args(argv)
+
+    if args.origen == 'json':
+        base = convertir_json(args.catalogo, args.destino)
+    else:
+        base = convertir_csv(args.instrumentos, args.reglas, args.destino)
+    print(f"Base guardada en {args.destino}: {len(base):,} instrumentos, {len(base.condiciones)} condiciones")
+
+
+if __name__ == '__main__':
+    main()
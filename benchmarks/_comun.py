@@ -0,0 +1,21 @@
+"""Utilidades compartidas por los benchmarks del sistema experto"""
+import os
+import sys
+import time
+from typing import Callable
+
+# Permitir ejecutar los benchmarks desde cualquier directorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos_sinteticos import generar_catalogo, generar_inversores, sistema_sintetico  # noqa: E402
+from sistema_inversion import PerfilRiesgo, SistemaInversion  # noqa: E402
+
+
+def medir(funcion: Callable[[], object], repeticiones: int = 3) -> float:
+    """Devuelve el mejor tiempo (en segundos) de varias ejecuciones de `funcion`"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
@@ -0,0 +1,67 @@
+"""
+Actualizaciones incrementales frente a reconstruir la base compilada y la red de decisión
+
+Uso: python benchmarks/bench_actualizaciones.py [--instrumentos N] [--condiciones N]
+"""
+import argparse
+
+from _comun import PerfilRiesgo, medir, sistema_sintetico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--instrumentos', type=int, default=20_000)
+    parser.add_argument('--condiciones', type=int, default=10)
+    args = parser.parse_args()
+
+    condiciones = tuple(f'condicion_{j}' for j in range(args.condiciones))
+    sistema = sistema_sintetico(args.instrumentos, condiciones, capacidad_cache=4096)
+    info = {'riesgo': 0.3, 'rendimiento_esperado': 0.08, 'liquidez': 0.5, 'plazo_minimo': 2,
+            'perfil_recomendado': PerfilRiesgo.MODERADO}
+
+    def preparar():
+        sistema.red_decision
+        sistema.indice
+        sistema.base.filas_factores
+
+    def reconstruir():
+        # Modificar la tabla directamente invalida todo: base, red y caché se rehacen
+        sistema.instrumentos['directo'] = dict(info)
+        preparar()
+        del sistema.instrumentos['directo']
+        preparar()
+
+    def incremental_instrumento():
+        sistema.agregar_instrumento('incremental', info, {condiciones[0]: 0.1})
+        sistema.eliminar_instrumento('incremental')
+
+    def incremental_condicion():
+        sistema.agregar_condicion('condicion_nueva', {sistema.base.nombres[0]: 0.2})
+        sistema.eliminar_condicion('condicion_nueva')
+
+    preparar()
+    completo = medir(reconstruir) / 2
+    instrumento = medir(incremental_instrumento, repeticiones=5) / 2
+    condicion = medir(incremental_condicion, repeticiones=5) / 2
+
+    # Caché tras cambiar una condición: las entradas que no la usan siguen sirviendo
+    consultas = [(perfil, plazo, [condiciones[j]]) for perfil in PerfilRiesgo for plazo in range(1, 11)
+                 for j in range(1, args.condiciones)]
+    for perfil, plazo, lista in consultas:
+        sistema.recomendar_inversiones(perfil, 1000.0, plazo, lista)
+    sistema.actualizar_condicion(condiciones[1], {sistema.base.nombres[0]: -0.1})
+    antes = sistema.cache_pesos.estadisticas()
+    for perfil, plazo, lista in consultas:
+        sistema.recomendar_inversiones(perfil, 1000.0, plazo, lista)
+    despues = sistema.cache_pesos.estadisticas()
+    aciertos = despues['aciertos'] - antes['aciertos']
+
+    print(f"{args.instrumentos:,} instrumentos, {args.condiciones} condiciones (red, índice y base ya construidos)")
+    print(f"  reconstrucción completa:        {completo * 1000:9.2f} ms por cambio")
+    print(f"  agregar/eliminar instrumento:   {instrumento * 1000:9.2f} ms por cambio")
+    print(f"  agregar/eliminar condición:     {condicion * 1000:9.2f} ms por cambio")
+    print(f"  caché tras actualizar 1 condición: {aciertos}/{len(consultas)} consultas siguen acertando")
+
+
+if __name__ == '__main__':
+    main()
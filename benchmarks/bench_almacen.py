@@ -0,0 +1,73 @@
+"""
+Ejecución nocturna repetida con el almacén persistente de resultados
+
+Primera ejecución (almacén vacío) frente a una segunda en la que solo cambia una
+fracción de los clientes, y frente a procesar sin almacén.
+
+Uso: python benchmarks/bench_almacen.py [--clientes N] [--instrumentos N] [--cambiados F]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from _comun import sistema_sintetico
+
+from almacen_resultados import AlmacenResultados, recomendar_lote_con_almacen
+
+PREGUNTAS = ('edad', 'experiencia', 'tolerancia_perdida', 'objetivo')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clientes', type=int, default=50_000)
+    parser.add_argument('--instrumentos', type=int, default=5_000)
+    parser.add_argument('--cambiados', type=float, default=0.02, help='Fracción de clientes que cambia entre noches')
+    parser.add_argument('--tam-lote', type=int, default=10_000)
+    args = parser.parse_args()
+
+    sistema = sistema_sintetico(args.instrumentos)
+    rng = np.random.default_rng(0)
+    respuestas = [dict(zip(PREGUNTAS, fila)) for fila in rng.integers(1, 4, size=(args.clientes, len(PREGUNTAS))).tolist()]
+    montos = rng.uniform(1_000, 1_000_000, size=args.clientes).round(2).tolist()
+    plazos = rng.integers(1, 31, size=args.clientes).tolist()
+    condiciones = [[c for c in sistema.base.condiciones if rng.random() < 0.5] for _ in range(args.clientes)]
+
+    def noche(almacen, montos):
+        for desde in range(0, args.clientes, args.tam_lote):
+            hasta = desde + args.tam_lote
+            if almacen is None:
+                perfiles = [sistema.evaluar_perfil(r) for r in respuestas[desde:hasta]]
+                sistema.recomendar_inversiones_lote(perfiles, montos[desde:hasta], plazos[desde:hasta],
+                                                    sistema.mascara_condiciones(condiciones[desde:hasta]))
+            else:
+                recomendar_lote_con_almacen(sistema, almacen, respuestas[desde:hasta], montos[desde:hasta],
+                                            plazos[desde:hasta], condiciones[desde:hasta])
+
+    print(f"{args.clientes:,} clientes, {args.instrumentos} instrumentos, "
+          f"{args.cambiados:.0%} de clientes cambiados en la segunda noche")
+    inicio = time.perf_counter()
+    noche(None, montos)
+    print(f"  sin almacén:                 {time.perf_counter() - inicio:8.2f} s")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'resultados.sqlite')
+        for titulo in ('primera noche (vacío)', 'segunda noche'):
+            with AlmacenResultados(ruta) as almacen:
+                inicio = time.perf_counter()
+                noche(almacen, montos)
+                total = time.perf_counter() - inicio
+                resumen = almacen.estadisticas()
+            print(f"  {titulo + ':':<28}{total:8.2f} s  aciertos {resumen['tasa_aciertos']:6.1%}  "
+                  f"E/S {resumen['segundos_lectura']:.2f} s lectura + {resumen['segundos_escritura']:.2f} s escritura")
+            # Los montos cambian cada noche (no afectan a la clave); una fracción cambia también de plazo
+            montos = [monto * 1.01 for monto in montos]
+            for k in rng.choice(args.clientes, size=int(args.clientes * args.cambiados), replace=False).tolist():
+                plazos[k] = plazos[k] % 30 + 1
+        print(f"  tamaño del almacén:          {os.path.getsize(ruta) / 2**20:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
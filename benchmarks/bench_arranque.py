@@ -0,0 +1,70 @@
+"""
+Benchmark de arranque en frío con `python -X importtime`
+
+Mide, en procesos nuevos, el tiempo de importación y de construcción de
+SistemaInversion y de VentanaInversion, con la red de decisión diferida (como
+arrancan ahora) y forzando su construcción (como arrancaban antes).
+
+Uso: python benchmarks/bench_arranque.py [--repeticiones N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ESCENARIOS = {
+    'SistemaInversion (red diferida)':
+        "import sistema_inversion; sistema_inversion.SistemaInversion()",
+    'SistemaInversion (red construida)':
+        "import sistema_inversion; sistema_inversion.SistemaInversion().red_decision",
+    'VentanaInversion (red diferida)':
+        "from PyQt5.QtWidgets import QApplication; app = QApplication([]); "
+        "import main; main.VentanaInversion()",
+    'VentanaInversion (red construida)':
+        "from PyQt5.QtWidgets import QApplication; app = QApplication([]); "
+        "import main; main.VentanaInversion().sistema.red_decision",
+}
+
+CRONOMETRO = "import time; _inicio = time.perf_counter(); {codigo}; " \
+             "import sys; print(time.perf_counter() - _inicio, 'networkx' in sys.modules)"
+
+
+def ejecutar(codigo: str):
+    """Ejecuta `codigo` en un proceso nuevo y devuelve (ms de importación, ms totales, networkx cargado)"""
+    entorno = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', CRONOMETRO.format(codigo=codigo)],
+                             cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True)
+    # Solo las líneas de primer nivel (sin sangría en el nombre) suman el tiempo acumulado total
+    importacion_us = 0
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        if not nombre[1:].startswith(' '):
+            importacion_us += int(acumulado)
+    total, networkx = proceso.stdout.split()
+    return importacion_us / 1000, float(total) * 1000, networkx == 'True'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'escenario':<36} {'import (ms)':>12} {'total (ms)':>11} {'networkx':>9}")
+    for nombre, codigo in ESCENARIOS.items():
+        try:
+            medidas = [ejecutar(codigo) for _ in range(args.repeticiones)]
+        except subprocess.CalledProcessError as error:
+            print(f"{nombre:<36} no disponible ({error.stderr.strip().splitlines()[-1]})")
+            continue
+        importacion = statistics.median(m[0] for m in medidas)
+        total = statistics.median(m[1] for m in medidas)
+        print(f"{nombre:<36} {importacion:>12.1f} {total:>11.1f} {'sí' if medidas[0][2] else 'no':>9}")
+
+
+if __name__ == '__main__':
+    main()
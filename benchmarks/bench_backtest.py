@@ -0,0 +1,56 @@
+"""
+Backtest de una década de rendimientos diarios sintéticos sobre miles de clientes
+
+Uso: python benchmarks/bench_backtest.py [--dias N] [--instrumentos N] [--clientes N]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from _comun import generar_inversores, sistema_sintetico
+
+from backtest import Backtester
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--dias', type=int, default=2_520)
+    parser.add_argument('--instrumentos', type=int, default=1_000)
+    parser.add_argument('--clientes', type=int, default=10_000)
+    parser.add_argument('--frecuencia', type=int, default=21)
+    args = parser.parse_args()
+
+    sistema = sistema_sintetico(args.instrumentos)
+    base = sistema.base
+    rng = np.random.default_rng(0)
+    rendimientos = rng.normal(base.rendimiento_esperado / 252, base.riesgo / np.sqrt(252),
+                              size=(args.dias, args.instrumentos))
+    fechas = [f'd{dia:05d}' for dia in range(args.dias)]
+    # Un régimen de mercado nuevo cada ~6 meses
+    condiciones = [(fechas[dia], [c for c in base.condiciones if rng.random() < 0.4])
+                   for dia in range(0, args.dias, 126)]
+    perfiles, montos, plazos, _ = generar_inversores(sistema, args.clientes)
+
+    inicio = time.perf_counter()
+    backtester = Backtester(sistema, fechas, base.nombres, rendimientos, condiciones)
+    preparacion = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    resultado = backtester.ejecutar(perfiles, montos, plazos, frecuencia=args.frecuencia)
+    simulacion = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    resultado.metricas_clientes()
+    resultado.volatilidad_movil()
+    resultado.drawdown_movil()
+    metricas = time.perf_counter() - inicio
+
+    print(f"{args.dias:,} días × {args.instrumentos:,} instrumentos, {args.clientes:,} clientes "
+          f"({len(resultado.combinaciones)} combinaciones perfil/plazo, {len(resultado.dias_rebalanceo)} rebalanceos)")
+    print(f"  preparación:                  {preparacion:8.2f} s")
+    print(f"  simulación:                   {simulacion:8.2f} s")
+    print(f"  métricas y ventanas móviles:  {metricas:8.2f} s")
+    print(resultado.resumen())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark de la latencia por llamada de recomendar_inversiones
+
+Compara la implementación original sobre diccionarios anidados con la ruta
+actual sobre la base de conocimientos compilada.
+
+Uso: python benchmarks/bench_base_compilada.py
+"""
+import timeit
+
+from _comun import SistemaInversion
+
+from sistema_inversion import PerfilRiesgo
+
+
+def recomendar_con_diccionarios(sistema, perfil, monto, plazo, condiciones_mercado):
+    """Ruta original de recomendar_inversiones sobre los diccionarios"""
+    recomendaciones = {}
+    instrumentos_validos = {
+        nombre: info for nombre, info in sistema.instrumentos.items()
+        if info['plazo_minimo'] <= plazo and
+        info['perfil_recomendado'].value <= perfil.value + 1
+    }
+    for nombre, info in instrumentos_validos.items():
+        score = 1.0
+        if info['perfil_recomendado'] == perfil:
+            score *= 1.2
+        for condicion in condiciones_mercado:
+            if condicion in sistema.reglas_mercado:
+                score *= (1 + sistema.reglas_mercado[condicion][nombre])
+        recomendaciones[nombre] = score
+    # Suma de izquierda a derecha, como sum() antes de Python 3.12
+    total = 0.0
+    for score in recomendaciones.values():
+        total += score
+    for instrumento in recomendaciones:
+        recomendaciones[instrumento] = (recomendaciones[instrumento] / total) * monto
+    return recomendaciones
+
+
+def main():
+    sistema = SistemaInversion()
+    casos = [
+        (PerfilRiesgo.CONSERVADOR, 50_000.0, 2, ['recesion']),
+        (PerfilRiesgo.MODERADO, 100_000.0, 5, ['alta_inflacion', 'crecimiento_economico']),
+        (PerfilRiesgo.AGRESIVO, 250_000.0, 10, list(sistema.reglas_mercado)),
+    ]
+    repeticiones = 100_000
+
+    print(f"{'caso':<40} {'antes (us)':>11} {'después (us)':>13}")
+    for perfil, monto, plazo, condiciones in casos:
+        assert recomendar_con_diccionarios(sistema, perfil, monto, plazo, condiciones) == \
+            sistema.recomendar_inversiones(perfil, monto, plazo, condiciones)
+        antes = min(timeit.repeat(
+            lambda: recomendar_con_diccionarios(sistema, perfil, monto, plazo, condiciones),
+            number=repeticiones, repeat=3)) / repeticiones
+        despues = min(timeit.repeat(
+            lambda: sistema.recomendar_inversiones(perfil, monto, plazo, condiciones),
+            number=repeticiones, repeat=3)) / repeticiones
+        nombre = f"{perfil.name}, {plazo} años, {len(condiciones)} condiciones"
+        print(f"{nombre:<40} {antes * 1e6:>11.2f} {despues * 1e6:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Carga en frío y memoria: base mapeada desde disco frente a tablas como literal de diccionario
+
+Para cada tamaño de catálogo genera un módulo Python con las tablas escritas como
+literal (el enfoque de SistemaInversion.__init__) y un directorio de base en disco, y
+mide en procesos nuevos el tiempo hasta tener el sistema listo, el de la primera
+recomendación por lotes y la memoria residente máxima.
+
+Uso: python benchmarks/bench_base_en_disco.py [--instrumentos N ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from _comun import generar_catalogo
+
+from base_en_disco import guardar_base
+from base_conocimiento import BaseConocimiento
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEDICION = """
+import resource, sys, time
+sys.path.insert(0, {raiz!r}); sys.path.insert(0, {directorio!r})
+import numpy as np
+inicio = time.perf_counter()
+{carga}
+listo = time.perf_counter()
+sistema.recomendar_inversiones_lote(np.full(10, 2), np.full(10, 1e5), np.full(10, 10), np.zeros((10, 3), bool))
+fin = time.perf_counter()
+print(listo - inicio, fin - listo, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+CARGA_LITERAL = """
+from sistema_inversion import SistemaInversion
+import tablas_literal
+sistema = SistemaInversion()
+sistema.instrumentos = tablas_literal.INSTRUMENTOS
+sistema.reglas_mercado = tablas_literal.REGLAS_MERCADO
+"""
+
+CARGA_DISCO = """
+from base_en_disco import cargar_sistema
+sistema = cargar_sistema({ruta!r})
+"""
+
+
+def escribir_literal(ruta: str, instrumentos, reglas):
+    """Escribe las tablas como literal de Python, igual que en SistemaInversion.__init__"""
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write('from sistema_inversion import PerfilRiesgo\n\nINSTRUMENTOS = {\n')
+        for nombre, info in instrumentos.items():
+            archivo.write(f"    {nombre!r}: {{'riesgo': {info['riesgo']!r}, "
+                          f"'rendimiento_esperado': {info['rendimiento_esperado']!r}, "
+                          f"'liquidez': {info['liquidez']!r}, 'plazo_minimo': {info['plazo_minimo']!r}, "
+                          f"'perfil_recomendado': PerfilRiesgo.{info['perfil_recomendado'].name}}},\n")
+        archivo.write('}\n\nREGLAS_MERCADO = {\n')
+        for condicion, ajustes in reglas.items():
+            archivo.write(f'    {condicion!r}: {ajustes!r},\n')
+        archivo.write('}\n')
+
+
+def medir_proceso(codigo: str, directorio: str):
+    salida = subprocess.run([sys.executable, '-c', MEDICION.format(raiz=RAIZ, directorio=directorio, carga=codigo)],
+                            capture_output=True, text=True, check=True).stdout.split()
+    return float(salida[0]), float(salida[1]), int(salida[2]) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--instrumentos', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'instrumentos':>12} {'enfoque':<18} {'carga (ms)':>11} {'1er lote (ms)':>14} {'RSS máx (MB)':>13}")
+    for n in args.instrumentos:
+        with tempfile.TemporaryDirectory() as directorio:
+            instrumentos, reglas = generar_catalogo(n)
+            escribir_literal(os.path.join(directorio, 'tablas_literal.py'), instrumentos, reglas)
+            ruta_base = os.path.join(directorio, 'base')
+            guardar_base(BaseConocimiento.compilar(instrumentos, reglas), ruta_base)
+
+            # La primera importación del literal compila el .pyc; se mide la segunda
+            medir_proceso(CARGA_LITERAL, directorio)
+            for enfoque, codigo in (('literal (.pyc)', CARGA_LITERAL),
+                                    ('disco (mmap)', CARGA_DISCO.format(ruta=ruta_base))):
+                carga, lote, rss = medir_proceso(codigo, directorio)
+                print(f"{n:>12,} {enfoque:<18} {carga * 1000:>11.1f} {lote * 1000:>14.1f} {rss:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
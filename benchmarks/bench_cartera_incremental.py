@@ -0,0 +1,46 @@
+"""
+Repreciado de una cartera grande tras cambiar una condición de mercado
+
+Compara recalcular todas las recomendaciones con recomendar_inversiones_lote frente a
+aplicar solo la columna de la regla que cambia con CarteraIncremental.
+
+Uso: python benchmarks/bench_cartera_incremental.py [--clientes N]
+"""
+import argparse
+
+import numpy as np
+
+from _comun import SistemaInversion, generar_inversores, medir
+
+from cartera_incremental import CarteraIncremental
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clientes', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    sistema = SistemaInversion()
+    perfiles, montos, plazos, _ = generar_inversores(sistema, args.clientes)
+    n_condiciones = len(sistema.reglas_mercado)
+    con_recesion = np.zeros((args.clientes, n_condiciones), dtype=bool)
+    con_recesion[:, sistema.base.indice_condiciones['recesion']] = True
+
+    cartera = CarteraIncremental(sistema, perfiles, montos, plazos)
+    completo = medir(lambda: sistema.recomendar_inversiones_lote(perfiles, montos, plazos, con_recesion))
+    cambio = medir(lambda: (cartera.activar('recesion'), cartera.desactivar('recesion')), repeticiones=5) / 2
+    renormalizar = medir(cartera.asignaciones)
+
+    cartera.activar('recesion')
+    esperado = sistema.recomendar_inversiones_lote(perfiles, montos, plazos, con_recesion)
+    error = np.abs(cartera.asignaciones() - esperado).max()
+
+    print(f"{args.clientes:,} clientes, cambio de una condición")
+    print(f"  recálculo completo:        {completo * 1000:8.1f} ms")
+    print(f"  aplicar columna de regla:  {cambio * 1000:8.1f} ms")
+    print(f"  renormalizar asignaciones: {renormalizar * 1000:8.1f} ms")
+    print(f"  error absoluto máximo frente al recálculo: {error:.2e}")
+
+
+if __name__ == '__main__':
+    main()
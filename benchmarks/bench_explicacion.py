@@ -0,0 +1,79 @@
+"""
+Benchmark de explicar_recomendacion sobre 100k explicaciones
+
+Compara la construcción original con `str +=` con la actual basada en fragmentos
+cacheados, tanto generando cadenas como escribiendo en un archivo por lotes.
+
+Uso: python benchmarks/bench_explicacion.py [--explicaciones N]
+"""
+import argparse
+import os
+import tempfile
+
+from _comun import SistemaInversion, generar_inversores, medir
+
+from sistema_inversion import PerfilRiesgo
+
+
+def explicar_original(sistema, recomendaciones, perfil, condiciones_mercado):
+    """Implementación original de explicar_recomendacion"""
+    explicacion = f"Recomendación para perfil {perfil.name}:\n\n"
+    explicacion += "Distribución recomendada:\n"
+    for instrumento, monto in recomendaciones.items():
+        info = sistema.instrumentos[instrumento]
+        explicacion += f"- {instrumento}: ${monto:,.2f}\n"
+        explicacion += f"  Rendimiento esperado: {info['rendimiento_esperado']*100:.1f}%\n"
+        explicacion += f"  Nivel de riesgo: {info['riesgo']*100:.1f}%\n\n"
+    if condiciones_mercado:
+        explicacion += "\nFactores de mercado considerados:\n"
+        for condicion in condiciones_mercado:
+            explicacion += f"- {condicion}\n"
+    return explicacion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--explicaciones', type=int, default=100_000)
+    args = parser.parse_args()
+
+    sistema = SistemaInversion()
+    condiciones = list(sistema.reglas_mercado)
+    perfiles, montos, plazos, mascara = generar_inversores(sistema, args.explicaciones)
+    lote = []
+    for i in range(args.explicaciones):
+        perfil = PerfilRiesgo(int(perfiles[i]))
+        activas = [c for c, activa in zip(condiciones, mascara[i]) if activa]
+        lote.append((sistema.recomendar_inversiones(perfil, float(montos[i]), int(plazos[i]), activas), perfil, activas))
+
+    assert all(explicar_original(sistema, *caso) == sistema.explicar_recomendacion(*caso) for caso in lote)
+
+    t_original = medir(lambda: [explicar_original(sistema, *caso) for caso in lote])
+    t_actual = medir(lambda: [sistema.explicar_recomendacion(*caso) for caso in lote])
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'explicaciones.txt')
+
+        def escribir_original():
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write('\n'.join(explicar_original(sistema, *caso) for caso in lote))
+
+        def escribir_actual():
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                sistema.escribir_explicaciones(archivo, lote)
+
+        t_escribir_original = medir(escribir_original)
+        with open(ruta, encoding='utf-8') as archivo:
+            esperado = archivo.read()
+        t_escribir_actual = medir(escribir_actual)
+        with open(ruta, encoding='utf-8') as archivo:
+            assert archivo.read() == esperado
+
+    print(f"{args.explicaciones:,} explicaciones (salida idéntica byte a byte)")
+    print(f"{'modo':<22} {'original (s)':>13} {'actual (s)':>11} {'aceleración':>12}")
+    print(f"{'cadenas':<22} {t_original:>13.3f} {t_actual:>11.3f} {t_original / t_actual:>11.2f}x")
+    print(f"{'escritura a archivo':<22} {t_escribir_original:>13.3f} {t_escribir_actual:>11.3f} "
+          f"{t_escribir_original / t_escribir_actual:>11.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark del procesamiento en flujo: filas/s y memoria máxima según el tamaño del archivo
+
+Uso: python benchmarks/bench_flujo.py [--filas N ...]
+"""
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from _comun import SistemaInversion
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def generar_csv(ruta: str, filas: int, condiciones, semilla: int = 0):
+    """Escribe un CSV sintético de cuestionarios por bloques"""
+    rng = np.random.default_rng(semilla)
+    with open(ruta, 'w', newline='') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(['id', 'tolerancia_riesgo', 'horizonte_temporal', 'experiencia_previa',
+                           'monto', 'plazo', 'condiciones'])
+        for inicio in range(0, filas, 100_000):
+            n = min(100_000, filas - inicio)
+            respuestas = rng.integers(1, 4, size=(n, 3)).tolist()
+            montos = rng.uniform(1_000, 1_000_000, size=n).round(2).tolist()
+            plazos = rng.integers(1, 31, size=n).tolist()
+            mascaras = (rng.random((n, len(condiciones))) < 0.5).tolist()
+            escritor.writerows(
+                [inicio + i] + respuestas[i] + [montos[i], plazos[i],
+                                                ';'.join(c for c, activa in zip(condiciones, mascaras[i]) if activa)]
+                for i in range(n))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    condiciones = list(SistemaInversion().reglas_mercado)
+    print(f"{'filas':>10} {'formato':>8} {'filas/s':>10} {'RSS máx (MB)':>13}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for filas in args.filas:
+            entrada = os.path.join(directorio, f'entrada_{filas}.csv')
+            generar_csv(entrada, filas, condiciones)
+            for formato in ('csv', 'jsonl'):
+                salida = os.path.join(directorio, f'salida_{filas}.{formato}')
+                proceso = subprocess.run(
+                    [sys.executable, '-c',
+                     'import resource, sys, flujo_recomendaciones as f; f.main(sys.argv[1:]); '
+                     'print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)',
+                     entrada, salida],
+                    cwd=RAIZ, capture_output=True, text=True, check=True)
+                resumen, rss = proceso.stderr.strip().splitlines()[-2:]
+                velocidad = resumen.split('(')[-1].split()[0]
+                print(f"{filas:>10,} {formato:>8} {velocidad:>10} {int(rss) / 1024:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Latencia del bucle de eventos de VentanaInversion durante un análisis largo
+
+Simula un análisis de varios segundos (una explicación costosa en CPU) y mide con
+un QTimer el mayor retraso entre ticks del bucle de eventos mientras el análisis
+corre en el pool de hilos. El objetivo es mantenerlo por debajo de 16 ms.
+
+Uso: QT_QPA_PLATFORM=offscreen python benchmarks/bench_gui_latencia.py [--segundos S]
+"""
+import argparse
+import time
+
+import _comun  # noqa: F401  (añade la raíz del repositorio al path)
+
+from PyQt5.QtCore import QElapsedTimer, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from main import VentanaInversion
+from sistema_inversion import SistemaInversion
+
+
+class SistemaLento(SistemaInversion):
+    """SistemaInversion cuya explicación ocupa la CPU durante `segundos`"""
+
+    def __init__(self, segundos: float):
+        super().__init__()
+        self.segundos = segundos
+
+    def explicar_recomendacion(self, *args, **kwargs):
+        fin = time.perf_counter() + self.segundos
+        while time.perf_counter() < fin:
+            sum(range(1_000))
+        return super().explicar_recomendacion(*args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--segundos', type=float, default=3.0)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    ventana = VentanaInversion()
+    ventana.sistema = SistemaLento(args.segundos)
+
+    reloj = QElapsedTimer()
+    retrasos = []
+    ultimo = [0]
+
+    def tick():
+        ahora = reloj.elapsed()
+        retrasos.append(ahora - ultimo[0])
+        ultimo[0] = ahora
+
+    temporizador = QTimer()
+    temporizador.setInterval(1)
+    temporizador.timeout.connect(tick)
+
+    def iniciar():
+        reloj.start()
+        temporizador.start()
+        ventana.realizar_analisis()
+
+    def comprobar_fin():
+        if ventana._trabajador is None:
+            temporizador.stop()
+            app.quit()
+
+    vigilante = QTimer()
+    vigilante.timeout.connect(comprobar_fin)
+    QTimer.singleShot(0, iniciar)
+    QTimer.singleShot(50, lambda: vigilante.start(10))
+    app.exec_()
+
+    retrasos.sort()
+    p99 = retrasos[int(len(retrasos) * 0.99) - 1]
+    print(f"análisis de {args.segundos:.1f} s: {len(retrasos)} ticks, "
+          f"retraso máximo {retrasos[-1]} ms, p99 {p99} ms")
+    print(f"resultado mostrado: {bool(ventana.texto_resultados.toPlainText())}")
+
+
+if __name__ == '__main__':
+    main()
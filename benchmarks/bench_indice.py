@@ -0,0 +1,70 @@
+"""
+Coste del filtrado de instrumentos válidos: índice por perfil y plazo frente a recorrido lineal
+
+Genera catálogos de 10k a 1M instrumentos con plazos mínimos entre 1 y 1000 años y
+mide el filtrado para plazos cortos (pocos válidos) y largos, además del coste de
+mantener el índice al añadir y quitar instrumentos.
+
+Uso: python benchmarks/bench_indice.py
+"""
+import time
+
+import numpy as np
+
+from _comun import medir
+
+from base_conocimiento import BaseConocimiento
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+
+def base_sintetica(n: int, semilla: int = 0) -> BaseConocimiento:
+    rng = np.random.default_rng(semilla)
+    return BaseConocimiento(
+        nombres=[f'instrumento_{i:07d}' for i in range(n)],
+        condiciones=['recesion'],
+        riesgo=rng.uniform(0.05, 0.9, size=n),
+        rendimiento_esperado=rng.uniform(0.02, 0.3, size=n),
+        liquidez=rng.uniform(0.1, 1.0, size=n),
+        plazo_minimo=rng.integers(1, 1001, size=n),
+        perfil_recomendado=rng.integers(1, 4, size=n),
+        ajustes=rng.uniform(-0.4, 0.4, size=(1, n)),
+    )
+
+
+def filtrar_lineal(base: BaseConocimiento, perfil: PerfilRiesgo, plazo: int):
+    """Filtrado original: recorre todo el catálogo"""
+    return [
+        i for i, (plazo_minimo, perfil_recomendado) in enumerate(base.requisitos)
+        if plazo_minimo <= plazo and perfil_recomendado <= perfil.value + 1
+    ]
+
+
+def main():
+    print(f"{'instrumentos':>12} {'plazo':>6} {'válidos':>9} {'lineal (ms)':>12} {'índice (ms)':>12}")
+    for n in (10_000, 100_000, 1_000_000):
+        sistema = SistemaInversion(base=base_sintetica(n))
+        inicio = time.perf_counter()
+        sistema.indice
+        construccion = time.perf_counter() - inicio
+        for plazo in (1, 10, 100):
+            perfil = PerfilRiesgo.CONSERVADOR
+            assert filtrar_lineal(sistema.base, perfil, plazo) == sistema.instrumentos_validos(perfil, plazo)
+            lineal = medir(lambda: filtrar_lineal(sistema.base, perfil, plazo))
+            indexado = medir(lambda: sistema.instrumentos_validos(perfil, plazo))
+            validos = len(sistema.instrumentos_validos(perfil, plazo))
+            print(f"{n:>12,} {plazo:>6} {validos:>9,} {lineal * 1000:>12.3f} {indexado * 1000:>12.3f}")
+
+        # Mantenimiento incremental del índice
+        indice = sistema.indice
+        nombres = [f'nuevo_{i}' for i in range(1_000)]
+        inicio = time.perf_counter()
+        for i, nombre in enumerate(nombres):
+            indice.agregar(nombre, 1 + i % 1000, 1 + i % 3)
+        for nombre in nombres:
+            indice.eliminar(nombre)
+        incremental = (time.perf_counter() - inicio) / (2 * len(nombres))
+        print(f"{'':>12} construcción {construccion * 1000:.0f} ms, alta/baja incremental {incremental * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Coste de la instrumentación: llamadas por segundo con y sin Instrumentacion
+
+Uso: python benchmarks/bench_instrumentacion.py [--llamadas N]
+"""
+import argparse
+
+from _comun import PerfilRiesgo, SistemaInversion, medir
+
+from instrumentacion import Instrumentacion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--llamadas', type=int, default=100_000)
+    args = parser.parse_args()
+
+    respuestas = {'tolerancia_riesgo': 2, 'horizonte_temporal': 3, 'experiencia_previa': 2}
+    condiciones = ['alta_inflacion', 'recesion']
+
+    def ejecutar(sistema):
+        for _ in range(args.llamadas):
+            perfil = sistema.evaluar_perfil(respuestas)
+            recomendaciones = sistema.recomendar_inversiones(perfil, 10_000.0, 5, condiciones)
+            sistema.explicar_recomendacion(recomendaciones, PerfilRiesgo.MODERADO, condiciones)
+
+    sin = medir(lambda: ejecutar(SistemaInversion()))
+    instrumentado = SistemaInversion(instrumentacion=Instrumentacion())
+    con = medir(lambda: ejecutar(instrumentado))
+
+    print(f"{args.llamadas:,} análisis (perfil + recomendación + explicación)")
+    print(f"  sin instrumentación:  {sin / args.llamadas * 1e6:8.2f} µs/análisis")
+    print(f"  con instrumentación:  {con / args.llamadas * 1e6:8.2f} µs/análisis ({(con / sin - 1) * 100:+.1f}%)")
+    print(f"  último desglose:      {instrumentado.instrumentacion.desglose()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Arranque de VentanaInversion y repintado de resultados con miles de instrumentos
+
+Compara mostrar la explicación completa en el QTextEdit (como se hacía antes) con
+actualizar la tabla de ModeloAsignacion, en un primer análisis y en reanálisis que
+cambian el monto, una condición o el plazo.
+
+Uso: QT_QPA_PLATFORM=offscreen python benchmarks/bench_interfaz.py [--instrumentos N]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from _comun import sistema_sintetico
+
+from PyQt5.QtWidgets import QApplication
+
+from main import VentanaInversion
+from sistema_inversion import PerfilRiesgo
+
+
+def _asignacion(sistema, monto, plazo, condiciones):
+    """(base, ids, montos) como los prepara TrabajadorAnalisis, y la explicación"""
+    recomendaciones = sistema.recomendar_inversiones(PerfilRiesgo.AGRESIVO, monto, plazo, condiciones)
+    base = sistema.base
+    ids = np.array([base.indice[nombre] for nombre in recomendaciones], dtype=np.int64)
+    montos = np.array(list(recomendaciones.values()))
+    orden = np.argsort(ids, kind='stable')
+    explicacion = sistema.explicar_recomendacion(recomendaciones, PerfilRiesgo.AGRESIVO, condiciones)
+    return (base, ids[orden], montos[orden]), explicacion
+
+
+def _cronometrar(app, ventana, accion):
+    """Milisegundos de `accion` más el repintado de la ventana"""
+    inicio = time.perf_counter()
+    accion()
+    ventana.repaint()
+    app.processEvents()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--instrumentos', type=int, default=10_000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    arranques = []
+    for _ in range(args.repeticiones):
+        inicio = time.perf_counter()
+        ventana = VentanaInversion()
+        ventana.show()
+        app.processEvents()
+        arranques.append((time.perf_counter() - inicio) * 1000)
+        ventana.close()
+    print(f"arranque de VentanaInversion: {statistics.median(arranques):.1f} ms (mediana de {args.repeticiones})")
+
+    sistema = sistema_sintetico(args.instrumentos)
+    escenarios = [
+        ('primer análisis', 100_000.0, 10, ['alta_inflacion']),
+        ('cambia el monto', 150_000.0, 10, ['alta_inflacion']),
+        ('cambia una condición', 150_000.0, 10, ['alta_inflacion', 'recesion']),
+        ('cambia el plazo', 150_000.0, 5, ['alta_inflacion', 'recesion']),
+        ('mismo análisis', 150_000.0, 5, ['alta_inflacion', 'recesion']),
+    ]
+    datos = [(titulo,) + _asignacion(sistema, monto, plazo, condiciones)
+             for titulo, monto, plazo, condiciones in escenarios]
+
+    ventana = VentanaInversion()
+    ventana.resize(1000, 800)
+    ventana.show()
+    app.processEvents()
+    modelo = ventana.modelo_asignacion
+    print(f"\n{args.instrumentos:,} instrumentos")
+    print(f"{'reanálisis':<22} {'filas':>7} {'texto completo':>15} {'tabla':>9} {'filas notificadas':>18}")
+    for titulo, asignacion, explicacion in datos:
+        texto = _cronometrar(app, ventana, lambda: ventana.texto_resultados.setText(explicacion))
+        tabla = _cronometrar(app, ventana, lambda: modelo.actualizar(*asignacion))
+        print(f"{titulo:<22} {len(asignacion[1]):>7,} {texto:>12.1f} ms {tabla:>6.1f} ms "
+              f"{modelo.filas_actualizadas:>18,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark de la API por lotes frente al bucle escalar de recomendar_inversiones
+
+Uso: python benchmarks/bench_lote.py
+"""
+from _comun import SistemaInversion, generar_inversores, medir
+
+from sistema_inversion import PerfilRiesgo
+
+
+def main():
+    sistema = SistemaInversion()
+    condiciones = list(sistema.reglas_mercado)
+    perfiles_enum = {perfil.value: perfil for perfil in PerfilRiesgo}
+
+    print(f"{'inversores':>12} {'lote (s)':>10} {'inv/s lote':>14} {'escalar (s)':>12} {'inv/s escalar':>14}")
+    for n in (10_000, 100_000, 1_000_000):
+        perfiles, montos, plazos, mascara = generar_inversores(sistema, n)
+        t_lote = medir(lambda: sistema.recomendar_inversiones_lote(perfiles, montos, plazos, mascara))
+
+        # El bucle escalar se mide sobre una muestra y se extrapola para no tardar minutos
+        muestra = min(n, 20_000)
+        argumentos = [
+            (perfiles_enum[int(perfiles[i])], float(montos[i]), int(plazos[i]),
+             [c for c, activa in zip(condiciones, mascara[i]) if activa])
+            for i in range(muestra)
+        ]
+
+        def escalar():
+            return [sistema.recomendar_inversiones(*argumento) for argumento in argumentos]
+
+        t_escalar = medir(escalar, repeticiones=1) * n / muestra
+        lote = sistema.recomendar_inversiones_lote(perfiles, montos, plazos, mascara)[:muestra].tolist()
+        nombres = sistema.base.nombres
+        distintos = sum(fila != [recomendaciones.get(nombre, 0.0) for nombre in nombres]
+                        for fila, recomendaciones in zip(lote, escalar()))
+        if distintos:
+            raise SystemExit(f"{distintos} inversores con un reparto distinto al de recomendar_inversiones")
+        print(f"{n:>12,} {t_lote:>10.3f} {n / t_lote:>14,.0f} {t_escalar:>12.3f} {n / t_escalar:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
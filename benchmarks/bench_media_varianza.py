@@ -0,0 +1,40 @@
+"""
+Tiempo de resolución del motor media-varianza según el número de instrumentos
+
+Uso: python benchmarks/bench_media_varianza.py
+"""
+import time
+
+import numpy as np
+
+from _comun import sistema_sintetico
+
+from motores_asignacion import MotorMediaVarianza
+from sistema_inversion import PerfilRiesgo
+
+
+def main():
+    motores = {
+        'aversión por perfil': MotorMediaVarianza(),
+        'riesgo objetivo 15%': MotorMediaVarianza(riesgo_objetivo=0.15),
+        'peso máximo 10%': MotorMediaVarianza(peso_maximo=0.10),
+    }
+    print(f"{'instrumentos':>12} {'motor':<22} {'válidos':>8} {'ms/llamada':>11} {'volatilidad':>12}")
+    for n in (10, 100, 300, 1000):
+        sistema = sistema_sintetico(n)
+        for nombre, motor in motores.items():
+            base = sistema.base
+            validos = sistema.instrumentos_validos(PerfilRiesgo.AGRESIVO, 10)
+            inicio = time.perf_counter()
+            repeticiones = 5
+            for _ in range(repeticiones):
+                pesos = motor.pesos(base, PerfilRiesgo.AGRESIVO, validos, (2,))
+            ms = (time.perf_counter() - inicio) / repeticiones * 1000
+            ids = np.array([base.indice[nombre_i] for nombre_i, _ in pesos])
+            w = np.array([peso for _, peso in pesos])
+            volatilidad = float(np.sqrt(w @ motor.covarianza(base, ids) @ w))
+            print(f"{n:>12} {nombre:<22} {len(validos):>8} {ms:>11.2f} {volatilidad*100:>11.1f}%")
+
+
+if __name__ == '__main__':
+    main()
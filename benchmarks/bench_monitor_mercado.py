@@ -0,0 +1,87 @@
+"""
+Ticks por segundo del monitor de mercado con una cartera grande de clientes
+
+Genera paseos aleatorios de inflación y crecimiento del PIB que cruzan de vez en
+cuando los umbrales y los pasa por el pipeline de generadores, por el asíncrono y
+por un socket local. Lo compara con recalcular todas las recomendaciones en cada tick.
+
+Uso: python benchmarks/bench_monitor_mercado.py [--clientes N] [--ticks N]
+"""
+import argparse
+import asyncio
+
+import numpy as np
+
+from _comun import SistemaInversion, generar_inversores, medir
+
+from cartera_incremental import CarteraIncremental
+from monitor_mercado import MonitorMercado, Tick, leer_ticks_socket
+
+
+def generar_ticks(n: int, semilla: int = 0):
+    """Paseos aleatorios alternos de inflación y crecimiento del PIB"""
+    rng = np.random.default_rng(semilla)
+    inflacion = 4.5 + np.cumsum(rng.normal(0, 0.02, size=n))
+    pib = 1.0 + np.cumsum(rng.normal(0, 0.02, size=n))
+    return [Tick(str(k), 'inflacion', float(inflacion[k])) if k % 2 else Tick(str(k), 'crecimiento_pib', float(pib[k]))
+            for k in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clientes', type=int, default=1_000_000)
+    parser.add_argument('--ticks', type=int, default=200_000)
+    parser.add_argument('--umbral-deriva', type=float, default=0.05)
+    args = parser.parse_args()
+
+    sistema = SistemaInversion()
+    perfiles, montos, plazos, _ = generar_inversores(sistema, args.clientes)
+    ticks = generar_ticks(args.ticks)
+
+    def nuevo_monitor():
+        return MonitorMercado(CarteraIncremental(sistema, perfiles, montos, plazos), umbral_deriva=args.umbral_deriva)
+
+    print(f"{args.clientes:,} clientes, {args.ticks:,} ticks, umbral de deriva {args.umbral_deriva:.0%}")
+
+    monitor = nuevo_monitor()
+    alertas = list(monitor.monitorizar(ticks))
+    e = monitor.estadisticas
+    print(f"  generadores:        {e.ticks_por_segundo:>12,.0f} ticks/s  ({e.cambios_condicion} cambios de condición, "
+          f"{len(alertas)} alertas, {e.clientes_alertados:,} clientes alertados)")
+
+    async def fuente():
+        for tick in ticks:
+            yield tick
+
+    async def consumir(monitor, origen):
+        return [alerta async for alerta in monitor.monitorizar_async(origen)]
+
+    monitor = nuevo_monitor()
+    asyncio.run(consumir(monitor, fuente()))
+    print(f"  asíncrono:          {monitor.estadisticas.ticks_por_segundo:>12,.0f} ticks/s")
+
+    async def por_socket(monitor):
+        datos = ''.join(f'{t.marca},{t.indicador},{t.valor!r}\n' for t in ticks).encode('utf-8')
+
+        async def emisor(_, escritor):
+            escritor.write(datos)
+            await escritor.drain()
+            escritor.close()
+
+        servidor = await asyncio.start_server(emisor, '127.0.0.1', 0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        async with servidor:
+            return await consumir(monitor, leer_ticks_socket('127.0.0.1', puerto))
+
+    monitor = nuevo_monitor()
+    asyncio.run(por_socket(monitor))
+    print(f"  socket local:       {monitor.estadisticas.ticks_por_segundo:>12,.0f} ticks/s")
+
+    # Sin monitor habría que recalcular la cartera en cada tick
+    mascara = np.zeros((args.clientes, len(sistema.base.condiciones)), dtype=bool)
+    completo = medir(lambda: sistema.recomendar_inversiones_lote(perfiles, montos, plazos, mascara))
+    print(f"  recálculo por tick: {1 / completo:>12,.1f} ticks/s  ({completo * 1000:.0f} ms por recálculo completo)")
+
+
+if __name__ == '__main__':
+    main()
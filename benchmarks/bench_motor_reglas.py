@@ -0,0 +1,85 @@
+"""
+Motor de reglas con red de tipo Rete frente a evaluar todas las reglas en cada consulta
+
+Genera miles de reglas compuestas sobre indicadores de mercado y datos del inversor,
+mide cuánto comparte la red y el coste de propagar el cambio de un hecho frente a
+reevaluar todas las condiciones de todas las reglas.
+
+Uso: python benchmarks/bench_motor_reglas.py [--reglas N] [--hechos N]
+"""
+import argparse
+
+import numpy as np
+
+from _comun import PerfilRiesgo, medir, sistema_sintetico
+
+from motor_reglas import Condicion, MotorReglas, Regla
+
+
+def generar_reglas(nombres, n_reglas: int, n_hechos: int, semilla: int = 0):
+    """Reglas de 1 a 4 condiciones sobre hechos booleanos, plazo y perfil"""
+    rng = np.random.default_rng(semilla)
+    hechos = [f'indicador_{k}' for k in range(n_hechos)]
+    reglas = []
+    for r in range(n_reglas):
+        condiciones = {Condicion(hechos[k], '==', bool(rng.random() < 0.7))
+                       for k in rng.choice(n_hechos, size=rng.integers(1, 4), replace=False)}
+        if rng.random() < 0.3:
+            condiciones.add(Condicion('plazo', '<=', int(rng.integers(1, 10))))
+        if rng.random() < 0.2:
+            condiciones.add(Condicion('perfil', '==', PerfilRiesgo(int(rng.integers(1, 4))).name))
+        ajustes = {nombres[i]: float(rng.uniform(-0.3, 0.3)) for i in rng.choice(len(nombres), size=3, replace=False)}
+        reglas.append(Regla(f'regla_{r}', condiciones, ajustes=ajustes))
+    return hechos, reglas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--reglas', type=int, default=5_000)
+    parser.add_argument('--hechos', type=int, default=40)
+    parser.add_argument('--instrumentos', type=int, default=2_000)
+    args = parser.parse_args()
+
+    sistema = sistema_sintetico(args.instrumentos)
+    hechos, reglas = generar_reglas(sistema.base.nombres, args.reglas, args.hechos)
+    rng = np.random.default_rng(1)
+    estado = {hecho: bool(rng.random() < 0.5) for hecho in hechos}
+    estado.update(plazo=5, perfil='MODERADO')
+
+    construccion = medir(lambda: MotorReglas(reglas), repeticiones=1)
+    motor = MotorReglas(reglas)
+    motor.actualizar(estado)
+    estadisticas = motor.estadisticas()
+
+    def cambio_incremental():
+        hecho = hechos[int(rng.integers(len(hechos)))]
+        estado[hecho] = not estado[hecho]
+        motor.actualizar({hecho: estado[hecho]})
+
+    def evaluacion_completa():
+        hecho = hechos[int(rng.integers(len(hechos)))]
+        estado[hecho] = not estado[hecho]
+        return [regla for regla in reglas if all(c.evaluar(estado) for c in regla.condiciones)]
+
+    cambios = 200
+    incremental = medir(lambda: [cambio_incremental() for _ in range(cambios)]) / cambios
+    completa = medir(lambda: [evaluacion_completa() for _ in range(cambios)]) / cambios
+
+    activas = {regla.nombre for regla in reglas if all(c.evaluar(motor.hechos) for c in regla.condiciones)}
+    assert activas == set(motor.activas), "La red no coincide con la evaluación completa"
+
+    consultas = [(PerfilRiesgo(int(rng.integers(1, 4))), int(rng.integers(1, 10))) for _ in range(200)]
+    recomendar = medir(lambda: [sistema.recomendar_con_reglas(p, 1000.0, plazo, motor, estado) for p, plazo in consultas])
+
+    print(f"{args.reglas:,} reglas sobre {args.hechos} indicadores, {args.instrumentos:,} instrumentos")
+    print(f"  condiciones totales:          {estadisticas['condiciones_totales']:10,}")
+    print(f"  nodos alfa (compartidos):     {estadisticas['nodos_alfa']:10,}")
+    print(f"  nodos beta (compartidos):     {estadisticas['nodos_beta']:10,}")
+    print(f"  construcción de la red:       {construccion * 1000:10.1f} ms")
+    print(f"  cambio de un hecho (Rete):    {incremental * 1e6:10.1f} µs")
+    print(f"  evaluación de todas:          {completa * 1e6:10.1f} µs")
+    print(f"  recomendar_con_reglas:        {recomendar / len(consultas) * 1e6:10.1f} µs/consulta")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark de escalado del modo paralelo con 1, 2, 4 y 8 procesos
+
+Uso: python benchmarks/bench_paralelo.py [--inversores N] [--tam-bloque B]
+"""
+import argparse
+import os
+
+import numpy as np
+
+from _comun import SistemaInversion, generar_inversores, medir
+
+from paralelo import recomendar_inversiones_paralelo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--inversores', type=int, default=4_000_000)
+    parser.add_argument('--tam-bloque', type=int, default=100_000)
+    args = parser.parse_args()
+
+    sistema = SistemaInversion()
+    entradas = generar_inversores(sistema, args.inversores)
+    referencia = sistema.recomendar_inversiones_lote(*entradas)
+
+    print(f"CPUs disponibles: {os.cpu_count()}")
+    print(f"{'procesos':>9} {'tiempo (s)':>11} {'inv/s':>14} {'aceleración':>12}")
+    base = None
+    for trabajadores in (1, 2, 4, 8):
+        resultado = {}
+
+        def ejecutar():
+            resultado['r'] = recomendar_inversiones_paralelo(
+                sistema, *entradas, trabajadores=trabajadores, tam_bloque=args.tam_bloque)
+
+        tiempo = medir(ejecutar)
+        assert np.array_equal(resultado['r'], referencia)
+        base = base or tiempo
+        print(f"{trabajadores:>9} {tiempo:>11.3f} {args.inversores / tiempo:>14,.0f} {base / tiempo:>11.2f}x")
+
+
+if __name__ == '__main__':
+    main()
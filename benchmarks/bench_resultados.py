@@ -0,0 +1,73 @@
+"""
+Memoria y exportación de ResultadosLote frente a un diccionario por cliente
+
+Uso: python benchmarks/bench_resultados.py [--clientes N] [--instrumentos N]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from _comun import generar_inversores, sistema_sintetico
+
+from resultados import ResultadosLote
+
+
+def _medir_memoria(funcion):
+    """Resultado de `funcion`, bytes que retiene y segundos que tarda (medidos sin tracemalloc)"""
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+    tracemalloc.start()
+    resultado = funcion()
+    retenidos = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, retenidos, segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clientes', type=int, default=20_000)
+    parser.add_argument('--instrumentos', type=int, default=200)
+    args = parser.parse_args()
+
+    sistema = sistema_sintetico(args.instrumentos)
+    perfiles, montos, plazos, mascara = generar_inversores(sistema, args.clientes)
+    lote, bytes_lote, segundos_lote = _medir_memoria(
+        lambda: ResultadosLote.calcular(sistema, perfiles, montos, plazos, mascara))
+    dicts, bytes_dicts, segundos_dicts = _medir_memoria(lote.a_dicts)
+    media = sum(map(len, dicts)) / len(dicts)
+
+    print(f"{args.clientes:,} clientes, {args.instrumentos} instrumentos ({media:.0f} recomendados por cliente de media)")
+    print(f"  {'':22}{'bytes/cliente':>14}{'total MB':>10}{'creación':>10}")
+    print(f"  {'ResultadosLote':22}{bytes_lote / args.clientes:>14,.0f}{bytes_lote / 2**20:>10.1f}"
+          f"{segundos_lote:>8.2f} s")
+    print(f"  {'lista de dicts':22}{bytes_dicts / args.clientes:>14,.0f}{bytes_dicts / 2**20:>10.1f}"
+          f"{segundos_dicts:>8.2f} s  (desde el lote)")
+    del dicts
+
+    with tempfile.TemporaryDirectory() as directorio:
+        formatos = [('npy', lote.guardar_npy, 'npy'), ('csv', lote.guardar_csv, 'resultados.csv')]
+        try:
+            import pyarrow  # noqa: F401
+            formatos.append(('parquet', lote.guardar_parquet, 'resultados.parquet'))
+        except ImportError:
+            print("  (pyarrow no está instalado: se omite Parquet)")
+        for formato, guardar, nombre in formatos:
+            ruta = os.path.join(directorio, nombre)
+            inicio = time.perf_counter()
+            guardar(ruta)
+            segundos = time.perf_counter() - inicio
+            tamano = (sum(os.path.getsize(os.path.join(ruta, f)) for f in os.listdir(ruta))
+                      if os.path.isdir(ruta) else os.path.getsize(ruta))
+            print(f"  exportar a {formato:8}{segundos:8.2f} s  {tamano / 2**20:8.1f} MB")
+        inicio = time.perf_counter()
+        cargado = ResultadosLote.cargar_npy(os.path.join(directorio, 'npy'))
+        sum(len(cargado[i]) for i in range(0, len(cargado), max(1, len(cargado) // 1000)))
+        print(f"  abrir .npy mapeado y leer 1000 clientes: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        del cargado
+
+
+if __name__ == '__main__':
+    main()
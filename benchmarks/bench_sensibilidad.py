@@ -0,0 +1,50 @@
+"""
+Barrido de sensibilidad frente a llamar a recomendar_inversiones en cada escenario
+
+Uso: python benchmarks/bench_sensibilidad.py [--clientes N] [--instrumentos N] [--condiciones N ...]
+"""
+import argparse
+import time
+
+from _comun import generar_inversores, sistema_sintetico
+
+from sensibilidad import barrido_sensibilidad
+from sistema_inversion import PerfilRiesgo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clientes', type=int, default=1_000)
+    parser.add_argument('--instrumentos', type=int, default=200)
+    parser.add_argument('--condiciones', type=int, nargs='+', default=[3, 6, 8])
+    args = parser.parse_args()
+
+    print(f"{args.clientes:,} clientes, {args.instrumentos} instrumentos, plazos 1-30")
+    print(f"{'k':>3} {'escenarios':>10} {'bucle escalar (est.)':>21} {'barrido':>9} {'estadísticas':>13} {'tensor MB':>10}")
+    for k in args.condiciones:
+        condiciones = tuple(f'condicion_{j}' for j in range(k))
+        sistema = sistema_sintetico(args.instrumentos, condiciones, capacidad_cache=1)
+        perfiles, montos, _, _ = generar_inversores(sistema, args.clientes)
+
+        inicio = time.perf_counter()
+        resultado = barrido_sensibilidad(sistema, perfiles, montos)
+        barrido = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        resultado.estadisticas(sistema)
+        estadisticas = time.perf_counter() - inicio
+
+        # El bucle escalar se estima con una muestra de escenarios de un cliente (sin caché)
+        muestra = min(resultado.n_escenarios, 300)
+        inicio = time.perf_counter()
+        for e in range(muestra):
+            lista, plazo = resultado.escenario(e)
+            sistema.recomendar_inversiones(PerfilRiesgo(int(perfiles[0])), float(montos[0]), plazo, lista)
+        escalar = (time.perf_counter() - inicio) / muestra * resultado.n_escenarios * args.clientes
+
+        megas = args.clientes * resultado.n_escenarios * args.instrumentos * 8 / 2**20
+        print(f"{k:>3} {resultado.n_escenarios:>10,} {escalar:>19.1f} s {barrido:>7.3f} s {estadisticas:>11.3f} s "
+              f"{megas:>10,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Prueba de carga local del servicio HTTP: latencia p50/p99 y solicitudes por segundo
+
+Sin --url arranca el servicio en el mismo proceso (en un puerto libre) y lo prueba
+con varios tamaños de lote; con --url prueba un servicio ya en marcha.
+
+Uso: python benchmarks/bench_servicio.py [--solicitudes N] [--concurrencia N] [--url http://host:puerto]
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from _comun import SistemaInversion
+
+from servicio import ServicioRecomendaciones
+
+
+def generar_cuerpos(n: int, condiciones, semilla: int = 0):
+    rng = np.random.default_rng(semilla)
+    cuerpos = []
+    for i in range(n):
+        respuestas = rng.integers(1, 4, size=3).tolist()
+        cuerpos.append(json.dumps({
+            'id': i,
+            'respuestas': dict(zip(('tolerancia_riesgo', 'horizonte_temporal', 'experiencia_previa'), respuestas)),
+            'monto': round(float(rng.uniform(1_000, 1_000_000)), 2),
+            'plazo': int(rng.integers(1, 31)),
+            'condiciones': [c for c in condiciones if rng.random() < 0.5],
+        }).encode('utf-8'))
+    return cuerpos
+
+
+async def cliente(host: str, puerto: int, cuerpos, latencias):
+    """Envía sus solicitudes una tras otra por una conexión persistente"""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        for cuerpo in cuerpos:
+            inicio = time.perf_counter()
+            escritor.write(b"POST /recomendar HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\n"
+                           b"Content-Length: %d\r\n\r\n" % (host.encode(), len(cuerpo)) + cuerpo)
+            estado = await lector.readline()
+            longitud = 0
+            while True:
+                cabecera = await lector.readline()
+                if cabecera in (b'\r\n', b''):
+                    break
+                if cabecera.lower().startswith(b'content-length:'):
+                    longitud = int(cabecera.split(b':')[1])
+            await lector.readexactly(longitud)
+            if b' 200 ' not in estado:
+                raise RuntimeError(f"Respuesta inesperada: {estado!r}")
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        escritor.close()
+
+
+async def carga(host: str, puerto: int, cuerpos, concurrencia: int):
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(host, puerto, cuerpos[k::concurrencia], latencias) for k in range(concurrencia)))
+    segundos = time.perf_counter() - inicio
+    latencias = np.array(latencias) * 1000
+    return len(latencias) / segundos, np.percentile(latencias, 50), np.percentile(latencias, 99)
+
+
+async def en_proceso(cuerpos, concurrencia: int):
+    print(f"{'max_lote':>8} {'espera ms':>9} {'sol/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'lote medio':>10}")
+    for max_lote, espera_ms in ((1, 0.0), (16, 1.0), (64, 2.0), (256, 5.0)):
+        servicio = ServicioRecomendaciones(SistemaInversion(), puerto=0, max_lote=max_lote, max_espera=espera_ms / 1000)
+        await servicio.iniciar()
+        try:
+            por_segundo, p50, p99 = await carga('127.0.0.1', servicio.puerto, cuerpos, concurrencia)
+        finally:
+            await servicio.cerrar()
+        print(f"{max_lote:>8} {espera_ms:>9.1f} {por_segundo:>9,.0f} {p50:>8.2f} {p99:>8.2f} "
+              f"{servicio.agrupador.estadisticas.tamano_medio_lote:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--solicitudes', type=int, default=20_000)
+    parser.add_argument('--concurrencia', type=int, default=64)
+    parser.add_argument('--url', help='Servicio ya en marcha, por ejemplo http://127.0.0.1:8080')
+    args = parser.parse_args()
+
+    cuerpos = generar_cuerpos(args.solicitudes, list(SistemaInversion().reglas_mercado))
+    print(f"{args.solicitudes:,} solicitudes, {args.concurrencia} clientes concurrentes")
+    if args.url:
+        url = urlsplit(args.url)
+        por_segundo, p50, p99 = asyncio.run(carga(url.hostname, url.port or 80, cuerpos, args.concurrencia))
+        print(f"  {por_segundo:,.0f} sol/s, p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+    else:
+        asyncio.run(en_proceso(cuerpos, args.concurrencia))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Benchmark del simulador Monte Carlo con un millón de trayectorias
+
+Uso: python benchmarks/bench_simulacion.py
+"""
+import resource
+
+from _comun import SistemaInversion, medir
+
+from simulacion import SimuladorMonteCarlo
+from sistema_inversion import PerfilRiesgo
+
+
+def main():
+    sistema = SistemaInversion()
+    simulador = SimuladorMonteCarlo(sistema, correlacion=0.3)
+    print(f"{'perfil':<12} {'plazo':>5} {'trayectorias':>13} {'tiempo (s)':>11} {'E[valor]':>14} {'P(pérdida)':>11}")
+    for perfil, plazo in ((PerfilRiesgo.CONSERVADOR, 3), (PerfilRiesgo.MODERADO, 10), (PerfilRiesgo.AGRESIVO, 30)):
+        recomendaciones = sistema.recomendar_inversiones(perfil, 100_000, plazo, ['crecimiento_economico'])
+        resultado = {}
+
+        def simular():
+            resultado['r'] = simulador.simular(recomendaciones, plazo, trayectorias=1_000_000, semilla=42)
+
+        tiempo = medir(simular, repeticiones=1)
+        r = resultado['r']
+        print(f"{perfil.name:<12} {plazo:>5} {r.trayectorias:>13,} {tiempo:>11.2f} "
+              f"{r.valor_esperado:>14,.0f} {r.probabilidad_perdida*100:>10.1f}%")
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"memoria residente máxima: {pico:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
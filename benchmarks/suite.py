@@ -0,0 +1,175 @@
+"""
+Suite de benchmarks de las rutas críticas de SistemaInversion con detección de regresiones
+
+Genera catálogos, reglas y poblaciones sintéticas de tamaño creciente (con semillas
+fijas) y mide construcción del sistema, red de decisión, evaluación de perfil,
+recomendación escalar y por lotes y explicación. Cada medida es el mejor tiempo de
+varias repeticiones y se guarda en JSON; el modo comparar marca como regresión
+cualquier caso cuyo tiempo por operación empeore más que el umbral.
+
+Uso:
+    python benchmarks/suite.py ejecutar -o resultados.json [--tamanos 100 1000 10000]
+    python benchmarks/suite.py comparar base.json resultados.json [--umbral 0.10]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from _comun import SistemaInversion, generar_catalogo, medir
+
+RESPUESTAS = ('tolerancia_riesgo', 'horizonte_temporal', 'experiencia_previa')
+
+
+def generar_poblacion(condiciones, n: int, semilla: int = 0):
+    """Cuestionarios, montos, plazos y listas de condiciones de `n` inversores"""
+    rng = np.random.default_rng(semilla)
+    respuestas = [dict(zip(RESPUESTAS, fila)) for fila in rng.integers(1, 4, size=(n, len(RESPUESTAS))).tolist()]
+    montos = rng.uniform(1_000, 1_000_000, size=n).tolist()
+    plazos = rng.integers(1, 31, size=n).tolist()
+    mascaras = (rng.random((n, len(condiciones))) < 0.3).tolist()
+    listas = [[c for c, activa in zip(condiciones, fila) if activa] for fila in mascaras]
+    return respuestas, montos, plazos, listas
+
+
+def casos_para(instrumentos: int, n_condiciones: int, inversores: int) -> Dict[str, tuple]:
+    """Devuelve {caso: (función, operaciones)} para un tamaño de catálogo"""
+    condiciones = tuple(f'condicion_{j}' for j in range(n_condiciones))
+    catalogo, reglas = generar_catalogo(instrumentos, condiciones)
+    respuestas, montos, plazos, listas = generar_poblacion(condiciones, inversores)
+
+    def construir():
+        sistema = SistemaInversion()
+        sistema.instrumentos, sistema.reglas_mercado = catalogo, reglas
+        return sistema.base
+
+    sistema = SistemaInversion()
+    sistema.instrumentos, sistema.reglas_mercado = catalogo, reglas
+    sistema.base
+    perfiles = [sistema.evaluar_perfil(r) for r in respuestas]
+    mascara = sistema.mascara_condiciones(listas)
+    # Las explicaciones se miden sobre un subconjunto: su coste crece con el catálogo
+    muestra = min(inversores, max(10, 100_000 // instrumentos))
+    recomendaciones = [sistema.recomendar_inversiones(perfiles[i], montos[i], plazos[i], listas[i])
+                       for i in range(muestra)]
+
+    def construir_red():
+        sistema._red_decision = None
+        return sistema.red_decision
+
+    def recomendar():
+        # Con la caché vacía al principio: mezcla de fallos y aciertos como en producción
+        sistema.cache_pesos.limpiar()
+        for i in range(inversores):
+            sistema.recomendar_inversiones(perfiles[i], montos[i], plazos[i], listas[i])
+
+    return {
+        'construccion': (construir, 1),
+        'red_decision': (construir_red, 1),
+        'evaluar_perfil': (lambda: [sistema.evaluar_perfil(r) for r in respuestas], inversores),
+        'recomendar': (recomendar, inversores),
+        'recomendar_lote': (lambda: sistema.recomendar_inversiones_lote(perfiles, montos, plazos, mascara), inversores),
+        'explicar': (lambda: [sistema.explicar_recomendacion(recomendaciones[i], perfiles[i], listas[i])
+                              for i in range(muestra)], muestra),
+    }
+
+
+def metadatos() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ''
+    return {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+    }
+
+
+def ejecutar(tamanos: List[int], condiciones: int, inversores: int, repeticiones: int,
+             informar: Callable[[str], None] = print) -> Dict:
+    resultados = {}
+    for instrumentos in tamanos:
+        for caso, (funcion, operaciones) in casos_para(instrumentos, condiciones, inversores).items():
+            segundos = medir(funcion, repeticiones)
+            clave = f'{caso}[{instrumentos}]'
+            resultados[clave] = {
+                'caso': caso,
+                'instrumentos': instrumentos,
+                'operaciones': operaciones,
+                'segundos': segundos,
+                'us_por_operacion': segundos / operaciones * 1e6,
+            }
+            informar(f"{clave:<28} {operaciones:>8,} op {segundos * 1000:>10.2f} ms "
+                     f"{segundos / operaciones * 1e6:>12.2f} µs/op")
+    return {'metadatos': metadatos(), 'resultados': resultados}
+
+
+def comparar(base: Dict, actual: Dict, umbral: float) -> List[str]:
+    """Imprime la comparación y devuelve los casos que empeoran más que `umbral` (0.10 = 10 %)"""
+    regresiones = []
+    print(f"{'caso':<28} {'base µs/op':>12} {'actual µs/op':>13} {'cambio':>8}")
+    for clave, resultado in actual['resultados'].items():
+        anterior = base['resultados'].get(clave)
+        if anterior is None:
+            print(f"{clave:<28} {'-':>12} {resultado['us_por_operacion']:>13.2f}    nuevo")
+            continue
+        cambio = resultado['us_por_operacion'] / anterior['us_por_operacion'] - 1
+        marca = '  REGRESIÓN' if cambio > umbral else ''
+        if marca:
+            regresiones.append(clave)
+        print(f"{clave:<28} {anterior['us_por_operacion']:>12.2f} {resultado['us_por_operacion']:>13.2f} "
+              f"{cambio * 100:>+7.1f}%{marca}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest='orden', required=True)
+    parser_ejecutar = subparsers.add_parser('ejecutar', help='Ejecuta la suite y guarda los resultados')
+    parser_ejecutar.add_argument('-o', '--salida', help='Archivo JSON de resultados')
+    parser_ejecutar.add_argument('--tamanos', type=int, nargs='+', default=[100, 1_000, 10_000])
+    parser_ejecutar.add_argument('--condiciones', type=int, default=10)
+    parser_ejecutar.add_argument('--inversores', type=int, default=10_000)
+    parser_ejecutar.add_argument('--repeticiones', type=int, default=5)
+    parser_ejecutar.add_argument('--base', help='JSON de referencia con el que comparar al terminar')
+    parser_ejecutar.add_argument('--umbral', type=float, default=0.10)
+    parser_comparar = subparsers.add_parser('comparar', help='Compara dos archivos de resultados')
+    parser_comparar.add_argument('base')
+    parser_comparar.add_argument('actual')
+    parser_comparar.add_argument('--umbral', type=float, default=0.10, help='Empeoramiento tolerado (0.10 = 10 %%)')
+    args = parser.parse_args(argv)
+
+    if args.orden == 'ejecutar':
+        actual = ejecutar(args.tamanos, args.condiciones, args.inversores, args.repeticiones)
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as archivo:
+                json.dump(actual, archivo, indent=2, ensure_ascii=False)
+        if not args.base:
+            return 0
+        ruta_base = args.base
+    else:
+        with open(args.actual, encoding='utf-8') as archivo:
+            actual = json.load(archivo)
+        ruta_base = args.base
+
+    with open(ruta_base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    regresiones = comparar(base, actual, args.umbral)
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones por encima del {args.umbral:.0%}: {', '.join(regresiones)}")
+        return 1
+    print(f"\nSin regresiones por encima del {args.umbral:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Caché acotada con política LRU (se descarta la entrada usada hace más tiempo)
+
+    Lleva contadores de aciertos, fallos, descartes e invalidaciones para poder
+    medir su efectividad.
+    """
+
+    def __init__(self, capacidad: int = 256):
+        if capacidad < 1:
+            raise ValueError("La capacidad de la caché debe ser al menos 1")
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.descartes = 0
+        self.invalidaciones = 0
+
+    def obtener(self, clave: Hashable) -> Optional[object]:
+        """Devuelve el valor guardado para `clave` o None si no está"""
+        with self._candado:
+            valor = self._entradas.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave: Hashable, valor: object):
+        """Guarda `valor` descartando la entrada menos usada si la caché está llena"""
+        with self._candado:
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            if len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.descartes += 1
+
+    def limpiar(self):
+        """Vacía la caché, por ejemplo porque cambió la base de conocimientos"""
+        with self._candado:
+            if self._entradas:
+                self._entradas.clear()
+                self.invalidaciones += 1
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def estadisticas(self) -> Dict[str, float]:
+        """Resumen de los contadores de la caché"""
+        consultas = self.aciertos + self.fallos
+        return {
+            'entradas': len(self._entradas),
+            'capacidad': self.capacidad,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'descartes': self.descartes,
+            'invalidaciones': self.invalidaciones,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+        }
@@ -0,0 +1,141 @@
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+
+class CarteraIncremental:
+    """
+    Cartera de clientes cuyas recomendaciones se actualizan al cambiar las condiciones de mercado
+
+    Guarda el score sin normalizar de cada cliente e instrumento en espacio logarítmico
+    (-inf para los instrumentos no válidos). Activar o desactivar una condición suma o
+    resta la columna log(1 + ajuste) de esa regla a todos los clientes y solo hace falta
+    volver a normalizar, en lugar de recalcular las recomendaciones desde cero. Los
+    montos coinciden con recomendar_inversiones_lote salvo por redondeo.
+
+    Un ajuste de -1 (multiplicador 0) no tiene logaritmo: como las condiciones son
+    comunes a toda la cartera, se cuenta por instrumento cuántas condiciones activas lo
+    anulan y esos instrumentos reciben peso 0 mientras la cuenta no vuelva a cero.
+    """
+
+    def __init__(self,
+                 sistema: SistemaInversion,
+                 perfiles: Union[Sequence[PerfilRiesgo], np.ndarray],
+                 montos: Union[Sequence[float], np.ndarray],
+                 plazos: Union[Sequence[int], np.ndarray],
+                 condiciones_mercado: Iterable[str] = ()):
+        """
+        Args:
+            sistema: Sistema experto con la base de conocimientos
+            perfiles, montos, plazos: Datos de cada cliente, como en recomendar_inversiones_lote
+            condiciones_mercado: Condiciones activas al inicio (comunes a toda la cartera)
+        """
+        self.sistema = sistema
+        if not isinstance(perfiles, np.ndarray):
+            perfiles = [p.value if isinstance(p, PerfilRiesgo) else p for p in perfiles]
+        self.perfiles = np.asarray(perfiles, dtype=np.int64)
+        self.montos = np.asarray(montos, dtype=np.float64)
+        self.plazos = np.asarray(plazos, dtype=np.int64)
+        self.condiciones: List[str] = []
+        self._recalcular_base()
+        self.fijar_condiciones(condiciones_mercado)
+
+    def _recalcular_base(self):
+        """Scores logarítmicos sin condiciones de mercado y columnas de ajuste de cada regla"""
+        base = self.sistema.base
+        if (base.factores < 0).any():
+            raise ValueError("Las reglas con multiplicador (1 + ajuste) < 0 no admiten actualización en espacio logarítmico")
+        self._version = self.sistema.version
+        self._factores = base.factores
+        nulos = base.factores == 0
+        self._log_factores = np.log(np.where(nulos, 1.0, base.factores))
+        self._nulos = nulos.astype(np.int64)
+        # Condiciones activas con multiplicador 0 para cada instrumento
+        self._anulados = np.zeros(len(base), dtype=np.int64)
+        self._ids_condiciones = base.indice_condiciones
+        validos = ((base.plazo_minimo[None, :] <= self.plazos[:, None]) &
+                   (base.perfil_recomendado[None, :] <= self.perfiles[:, None] + 1))
+        coincide = base.perfil_recomendado[None, :] == self.perfiles[:, None]
+        self._log_scores = np.where(validos, np.where(coincide, np.log(1.2), 0.0), -np.inf)
+
+    def recalcular(self):
+        """Reconstruye los scores desde la base (tras cambios en las tablas o para eliminar redondeo acumulado)"""
+        condiciones = self.condiciones
+        self.condiciones = []
+        self._recalcular_base()
+        self.fijar_condiciones(condiciones)
+
+    def _comprobar_version(self):
+        if self._version != self.sistema.version:
+            self.recalcular()
+
+    def activar(self, condicion: str) -> bool:
+        """Activa una condición de mercado; devuelve False si ya estaba activa o es desconocida"""
+        self._comprobar_version()
+        if condicion in self.condiciones or condicion not in self._ids_condiciones:
+            return False
+        j = self._ids_condiciones[condicion]
+        self._log_scores += self._log_factores[j]
+        self._anulados += self._nulos[j]
+        self.condiciones.append(condicion)
+        return True
+
+    def desactivar(self, condicion: str) -> bool:
+        """Desactiva una condición de mercado; devuelve False si no estaba activa"""
+        self._comprobar_version()
+        if condicion not in self.condiciones:
+            return False
+        j = self._ids_condiciones[condicion]
+        self._log_scores -= self._log_factores[j]
+        self._anulados -= self._nulos[j]
+        self.condiciones.remove(condicion)
+        return True
+
+    def fijar_condiciones(self, condiciones_mercado: Iterable[str]):
+        """Aplica solo las diferencias entre las condiciones activas y `condiciones_mercado`"""
+        nuevas = list(dict.fromkeys(condiciones_mercado))
+        for condicion in [c for c in self.condiciones if c not in nuevas]:
+            self.desactivar(condicion)
+        for condicion in nuevas:
+            self.activar(condicion)
+
+    def clientes_afectados(self, condicion: str) -> np.ndarray:
+        """
+        Clientes cuyos pesos puede cambiar `condicion`
+
+        Son los que tienen algún instrumento válido con ajuste distinto de cero en esa
+        regla; para el resto activarla o desactivarla no cambia nada.
+        """
+        self._comprobar_version()
+        if condicion not in self._ids_condiciones:
+            return np.empty(0, dtype=np.int64)
+        columnas = np.flatnonzero(self._factores[self._ids_condiciones[condicion]] != 1.0)
+        return np.flatnonzero(np.isfinite(self._log_scores[:, columnas]).any(axis=1))
+
+    def _normalizar(self, escala: np.ndarray, filas: Optional[np.ndarray] = None) -> np.ndarray:
+        """exp(scores) normalizado por fila y multiplicado por `escala` (filas sin válidos a cero)"""
+        self._comprobar_version()
+        log_scores = self._log_scores if filas is None else self._log_scores[filas]
+        if self._anulados.any():
+            log_scores = np.where(self._anulados > 0, -np.inf, log_scores)
+        resultado = np.exp(log_scores)
+        total = resultado.sum(axis=1, keepdims=True)
+        if not np.isfinite(total).all():
+            # Solo con scores enormes: se resta el máximo de cada fila para evitar el desbordamiento
+            maximo = log_scores.max(axis=1, keepdims=True)
+            np.exp(log_scores - np.where(np.isfinite(maximo), maximo, 0.0), out=resultado)
+            total = resultado.sum(axis=1, keepdims=True)
+        factor = np.divide(escala, total, out=np.zeros_like(total), where=total != 0)
+        resultado *= factor
+        return resultado
+
+    def pesos(self, filas: Optional[np.ndarray] = None) -> np.ndarray:
+        """Pesos normalizados cliente×instrumento (filas sin instrumentos válidos a cero), opcionalmente de `filas`"""
+        return self._normalizar(np.ones((len(self.montos) if filas is None else len(filas), 1)), filas)
+
+    def asignaciones(self, filas: Optional[np.ndarray] = None) -> np.ndarray:
+        """Montos recomendados cliente×instrumento, en el orden de columnas de la base, opcionalmente de `filas`"""
+        montos = self.montos if filas is None else self.montos[filas]
+        return self._normalizar(montos[:, None], filas)
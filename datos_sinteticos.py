@@ -0,0 +1,54 @@
+"""
+Catálogos y poblaciones de inversores sintéticos
+
+Los usan los benchmarks y las pruebas para trabajar con catálogos de cualquier
+tamaño sin depender de datos reales.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+
+def generar_catalogo(n: int, condiciones=('alta_inflacion', 'recesion', 'crecimiento_economico'),
+                     semilla: int = 0) -> Tuple[Dict[str, Dict], Dict[str, Dict[str, float]]]:
+    """Genera un catálogo sintético de `n` instrumentos y sus reglas de mercado"""
+    rng = np.random.default_rng(semilla)
+    riesgo = rng.uniform(0.05, 0.9, size=n).round(3)
+    rendimiento = (0.02 + 0.3 * riesgo * rng.uniform(0.5, 1.5, size=n)).round(4)
+    liquidez = rng.uniform(0.1, 1.0, size=n).round(3)
+    plazo_minimo = rng.integers(1, 11, size=n)
+    perfiles = np.minimum(3, 1 + (riesgo * 3).astype(int))
+    nombres = [f'instrumento_{i:07d}' for i in range(n)]
+    instrumentos = {
+        nombre: {
+            'riesgo': float(riesgo[i]),
+            'rendimiento_esperado': float(rendimiento[i]),
+            'liquidez': float(liquidez[i]),
+            'plazo_minimo': int(plazo_minimo[i]),
+            'perfil_recomendado': PerfilRiesgo(int(perfiles[i])),
+        }
+        for i, nombre in enumerate(nombres)
+    }
+    ajustes = rng.uniform(-0.4, 0.4, size=(len(condiciones), n)).round(3)
+    reglas = {condicion: dict(zip(nombres, ajustes[j].tolist())) for j, condicion in enumerate(condiciones)}
+    return instrumentos, reglas
+
+
+def sistema_sintetico(n: int, condiciones=('alta_inflacion', 'recesion', 'crecimiento_economico'),
+                      semilla: int = 0, **kwargs) -> SistemaInversion:
+    """SistemaInversion con un catálogo sintético de `n` instrumentos"""
+    sistema = SistemaInversion(**kwargs)
+    sistema.instrumentos, sistema.reglas_mercado = generar_catalogo(n, condiciones, semilla)
+    return sistema
+
+
+def generar_inversores(sistema: SistemaInversion, n: int, semilla: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Genera una población sintética de inversores (perfiles, montos, plazos, máscara de condiciones)"""
+    rng = np.random.default_rng(semilla)
+    perfiles = rng.integers(1, 4, size=n)
+    montos = rng.uniform(1_000, 1_000_000, size=n)
+    plazos = rng.integers(1, 31, size=n)
+    mascara = rng.random((n, len(sistema.reglas_mercado))) < 0.5
+    return perfiles, montos, plazos, mascara
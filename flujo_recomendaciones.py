@@ -0,0 +1,231 @@
+"""
+Procesamiento en flujo de cuestionarios para generar recomendaciones en bloque
+
+Lee fila por fila un CSV o JSONL con las respuestas del cuestionario, el monto, el
+plazo y las condiciones de mercado de cada cliente, los procesa por lotes
+(evaluar_perfil → recomendar_inversiones_lote) y escribe las distribuciones a
+medida que se calculan, de modo que la memoria no depende del tamaño del archivo.
+
+Formato CSV de entrada: columnas `monto`, `plazo`, `condiciones` (separadas por
+';'), opcionalmente `id`; el resto de columnas son respuestas del cuestionario.
+Formato JSONL de entrada: {"id": ..., "respuestas": {...}, "monto": ..., "plazo": ..., "condiciones": [...]}
+Las condiciones se aplican en el orden dado, y una repetida cuenta dos veces, igual
+que en recomendar_inversiones.
+
+Con un AlmacenResultados, los clientes cuyo cuestionario y cuya base de
+conocimientos no han cambiado desde una ejecución anterior se leen del almacén en
+lugar de recalcularse.
+
+Uso: python flujo_recomendaciones.py entrada.csv salida.jsonl [--tam-lote N] [--almacen resultados.sqlite]
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from almacen_resultados import AlmacenResultados, recomendar_lote_con_almacen
+from sistema_inversion import SistemaInversion
+
+COLUMNAS_RESERVADAS = ('id', 'monto', 'plazo', 'condiciones')
+SEPARADOR_CONDICIONES = ';'
+
+# (id, respuestas, monto, plazo, condiciones)
+Fila = Tuple[str, Dict[str, int], float, int, List[str]]
+
+
+@dataclass
+class EstadisticasFlujo:
+    """Resultado de un procesamiento en flujo"""
+    filas: int = 0
+    lotes: int = 0
+    segundos: float = 0.0
+
+    @property
+    def filas_por_segundo(self) -> float:
+        return self.filas / self.segundos if self.segundos else 0.0
+
+
+def detectar_formato(ruta: str, formato: Optional[str] = None) -> str:
+    """Devuelve 'csv' o 'jsonl' según el formato indicado o la extensión del archivo"""
+    if formato is None:
+        formato = 'jsonl' if ruta.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+    if formato not in ('csv', 'jsonl'):
+        raise ValueError(f"Formato no soportado: {formato}")
+    return formato
+
+
+def leer_filas_csv(archivo: TextIO) -> Iterator[Fila]:
+    """Genera las filas de un CSV de cuestionarios"""
+    for numero, registro in enumerate(csv.DictReader(archivo), start=1):
+        respuestas = {clave: int(valor) for clave, valor in registro.items() if clave not in COLUMNAS_RESERVADAS}
+        condiciones = [c for c in (registro.get('condiciones') or '').split(SEPARADOR_CONDICIONES) if c]
+        yield (registro.get('id') or str(numero), respuestas, float(registro['monto']),
+               int(registro['plazo']), condiciones)
+
+
+def leer_filas_jsonl(archivo: TextIO) -> Iterator[Fila]:
+    """Genera las filas de un JSONL de cuestionarios"""
+    numero = 0
+    for linea in archivo:
+        if not linea.strip():
+            continue
+        numero += 1
+        registro = json.loads(linea)
+        yield (str(registro.get('id', numero)), registro['respuestas'], float(registro['monto']),
+               int(registro['plazo']), list(registro.get('condiciones', [])))
+
+
+class EscritorRecomendaciones:
+    """Escribe las distribuciones recomendadas en CSV (una columna por instrumento) o JSONL"""
+
+    def __init__(self, archivo: TextIO, formato: str, instrumentos: Iterable[str]):
+        self.archivo = archivo
+        self.formato = formato
+        self.instrumentos = list(instrumentos)
+        if formato == 'csv':
+            self._csv = csv.writer(archivo)
+            self._csv.writerow(['id', 'perfil'] + self.instrumentos)
+
+    def escribir_lote(self, ids: List[str], perfiles: List[str], montos: np.ndarray,
+                      validos: Optional[np.ndarray] = None):
+        """
+        Args:
+            ids: Identificador de cada fila
+            perfiles: Nombre del perfil de cada fila
+            montos: Matriz fila×instrumento de recomendar_inversiones_lote
+            validos: Máscara de SistemaInversion.validos_lote; en JSONL decide qué
+                instrumentos se escriben (sin ella, los de monto distinto de cero)
+        """
+        if self.formato == 'csv':
+            self._csv.writerows([identificador, perfil] + fila
+                                for identificador, perfil, fila in zip(ids, perfiles, montos.tolist()))
+            return
+        if validos is None:
+            validos = montos != 0
+        lineas = []
+        for identificador, perfil, fila, mascara in zip(ids, perfiles, montos.tolist(), validos.tolist()):
+            # Igual que recomendar_inversiones, solo se incluyen los instrumentos recomendados
+            recomendaciones = {nombre: monto for nombre, monto, valido in zip(self.instrumentos, fila, mascara)
+                               if valido}
+            lineas.append(json.dumps({'id': identificador, 'perfil': perfil, 'recomendaciones': recomendaciones},
+                                     ensure_ascii=False))
+        self.archivo.write('\n'.join(lineas) + '\n')
+
+
+def procesar_filas(filas: Iterable[Fila],
+                   escritor: EscritorRecomendaciones,
+                   sistema: SistemaInversion,
+                   tam_lote: int = 10_000,
+                   almacen: Optional[AlmacenResultados] = None) -> EstadisticasFlujo:
+    """
+    Procesa un iterable de filas por lotes de `tam_lote` y escribe cada lote al terminarlo
+
+    Si se indica `almacen`, solo se calculan las filas que no estén guardadas en él.
+
+    Returns:
+        EstadisticasFlujo con las filas procesadas y el tiempo empleado
+    """
+    if tam_lote < 1:
+        raise ValueError("El tamaño de lote debe ser al menos 1")
+    estadisticas = EstadisticasFlujo()
+    inicio = time.perf_counter()
+    lote: List[Fila] = []
+
+    def vaciar():
+        ids, respuestas, montos, plazos, condiciones = zip(*lote)
+        if almacen is None:
+            perfiles = [sistema.evaluar_perfil(r) for r in respuestas]
+            distribucion = sistema.recomendar_inversiones_listas(perfiles, montos, plazos, condiciones)
+        else:
+            perfiles, distribucion = recomendar_lote_con_almacen(sistema, almacen, respuestas, montos, plazos,
+                                                                 condiciones)
+        escritor.escribir_lote(list(ids), [p.name for p in perfiles], distribucion,
+                               sistema.validos_lote(perfiles, plazos))
+        estadisticas.filas += len(lote)
+        estadisticas.lotes += 1
+        lote.clear()
+
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tam_lote:
+            vaciar()
+    if lote:
+        vaciar()
+
+    estadisticas.segundos = time.perf_counter() - inicio
+    return estadisticas
+
+
+@contextmanager
+def _abrir(ruta: str, modo: str):
+    if ruta == '-':
+        yield sys.stdin if 'r' in modo else sys.stdout
+    else:
+        with open(ruta, modo, encoding='utf-8', newline='') as archivo:
+            yield archivo
+
+
+def procesar_archivo(entrada: str,
+                     salida: str,
+                     sistema: Optional[SistemaInversion] = None,
+                     tam_lote: int = 10_000,
+                     formato_entrada: Optional[str] = None,
+                     formato_salida: Optional[str] = None,
+                     almacen: Optional[AlmacenResultados] = None) -> EstadisticasFlujo:
+    """
+    Procesa el archivo `entrada` y escribe las recomendaciones en `salida` ('-' para stdin/stdout)
+
+    Args:
+        entrada: Ruta del CSV/JSONL de cuestionarios
+        salida: Ruta del CSV/JSONL de recomendaciones
+        sistema: Sistema experto a usar (uno nuevo por defecto)
+        tam_lote: Filas por lote
+        formato_entrada, formato_salida: 'csv' o 'jsonl'; por defecto según la extensión
+        almacen: Almacén persistente de resultados de ejecuciones anteriores (opcional)
+    """
+    sistema = sistema or SistemaInversion()
+    formato_entrada = detectar_formato(entrada, formato_entrada)
+    formato_salida = detectar_formato(salida, formato_salida)
+    lector = leer_filas_csv if formato_entrada == 'csv' else leer_filas_jsonl
+    with _abrir(entrada, 'r') as archivo_entrada, _abrir(salida, 'w') as archivo_salida:
+        escritor = EscritorRecomendaciones(archivo_salida, formato_salida, sistema.base.nombres)
+        return procesar_filas(lector(archivo_entrada), escritor, sistema, tam_lote, almacen)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Genera recomendaciones en bloque a partir de un CSV/JSONL de cuestionarios')
+    parser.add_argument('entrada', help="Archivo de cuestionarios ('-' para stdin)")
+    parser.add_argument('salida', help="Archivo de recomendaciones ('-' para stdout)")
+    parser.add_argument('--tam-lote', type=int, default=10_000, help='Filas por lote')
+    parser.add_argument('--formato-entrada', choices=('csv', 'jsonl'))
+    parser.add_argument('--formato-salida', choices=('csv', 'jsonl'))
+    parser.add_argument('--almacen', help='Archivo SQLite con resultados de ejecuciones anteriores')
+    parser.add_argument('--max-entradas', type=int, default=10_000_000, help='Tamaño máximo del almacén')
+    args = parser.parse_args(argv)
+
+    almacen = AlmacenResultados(args.almacen, args.max_entradas) if args.almacen else None
+    try:
+        estadisticas = procesar_archivo(args.entrada, args.salida, tam_lote=args.tam_lote,
+                                        formato_entrada=args.formato_entrada, formato_salida=args.formato_salida,
+                                        almacen=almacen)
+    finally:
+        if almacen is not None:
+            almacen.cerrar()
+    print(f"{estadisticas.filas:,} filas en {estadisticas.lotes:,} lotes, "
+          f"{estadisticas.segundos:.2f} s ({estadisticas.filas_por_segundo:,.0f} filas/s)", file=sys.stderr)
+    if almacen is not None:
+        resumen = almacen.estadisticas()
+        print(f"almacén: {resumen['tasa_aciertos']:.1%} aciertos ({resumen['aciertos']:,}/"
+              f"{resumen['aciertos'] + resumen['fallos']:,}), {resumen['escrituras']:,} escrituras, "
+              f"{resumen['desalojos']:,} desalojos, E/S {resumen['segundos_lectura']:.2f} s lectura + "
+              f"{resumen['segundos_escritura']:.2f} s escritura", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+from bisect import bisect_right, insort
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+INFINITO = float('inf')
+
+
+class IndiceInstrumentos:
+    """
+    Índice de instrumentos por perfil recomendado y plazo mínimo
+
+    Cada cubeta de perfil guarda sus instrumentos ordenados por (plazo_minimo, secuencia),
+    así que los instrumentos válidos para un plazo son un prefijo que se localiza con una
+    bisección. La secuencia es el orden de inserción y reproduce el orden de las tablas de
+    diccionarios: actualizar un instrumento conserva su posición y volver a añadir uno
+    eliminado lo coloca al final.
+    """
+
+    def __init__(self):
+        self._cubetas: Dict[int, List[Tuple[int, int]]] = {}  # perfil -> [(plazo_minimo, secuencia)] ordenada
+        self._entradas: Dict[str, Tuple[int, int, int]] = {}  # nombre -> (perfil, plazo_minimo, secuencia)
+        self._nombres: Dict[int, str] = {}                     # secuencia -> nombre
+        self._siguiente = 0
+
+    @classmethod
+    def construir(cls, nombres: Iterable[str], plazos_minimos: np.ndarray, perfiles: np.ndarray) -> 'IndiceInstrumentos':
+        """Construye el índice de un catálogo completo en O(n log n)"""
+        indice = cls()
+        nombres = list(nombres)
+        plazos_minimos = np.asarray(plazos_minimos, dtype=np.int64)
+        perfiles = np.asarray(perfiles, dtype=np.int64)
+        orden = np.lexsort((plazos_minimos, perfiles))  # por perfil, luego plazo y luego posición
+        perfiles_ordenados = perfiles[orden]
+        cortes = np.flatnonzero(np.diff(perfiles_ordenados)) + 1
+        for tramo in np.split(orden, cortes):
+            if len(tramo):
+                perfil = int(perfiles[tramo[0]])
+                indice._cubetas[perfil] = list(zip(plazos_minimos[tramo].tolist(), tramo.tolist()))
+        indice._nombres = dict(enumerate(nombres))
+        indice._entradas = {
+            nombre: (perfil, plazo_minimo, secuencia)
+            for secuencia, (nombre, plazo_minimo, perfil) in enumerate(zip(nombres, plazos_minimos.tolist(), perfiles.tolist()))
+        }
+        indice._siguiente = len(nombres)
+        return indice
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def __contains__(self, nombre: str) -> bool:
+        return nombre in self._entradas
+
+    def agregar(self, nombre: str, plazo_minimo: int, perfil: int):
+        """Añade o actualiza un instrumento"""
+        anterior = self._entradas.get(nombre)
+        if anterior is not None:
+            if anterior[:2] == (perfil, plazo_minimo):
+                return
+            self._quitar_de_cubeta(anterior)
+            secuencia = anterior[2]
+        else:
+            secuencia = self._siguiente
+            self._siguiente += 1
+            self._nombres[secuencia] = nombre
+        insort(self._cubetas.setdefault(perfil, []), (plazo_minimo, secuencia))
+        self._entradas[nombre] = (perfil, plazo_minimo, secuencia)
+
+    def eliminar(self, nombre: str):
+        """Quita un instrumento; no hace nada si no estaba"""
+        entrada = self._entradas.pop(nombre, None)
+        if entrada is not None:
+            self._quitar_de_cubeta(entrada)
+            del self._nombres[entrada[2]]
+
+    def _quitar_de_cubeta(self, entrada: Tuple[int, int, int]):
+        perfil, plazo_minimo, secuencia = entrada
+        cubeta = self._cubetas[perfil]
+        posicion = bisect_right(cubeta, (plazo_minimo, secuencia)) - 1
+        del cubeta[posicion]
+
+    def validos(self, perfil_maximo: int, plazo: int) -> List[str]:
+        """
+        Nombres de los instrumentos con perfil ≤ perfil_maximo y plazo_minimo ≤ plazo
+
+        El coste es una bisección por cubeta más el tamaño del resultado, no el del catálogo.
+        """
+        secuencias = []
+        for perfil, cubeta in self._cubetas.items():
+            if perfil <= perfil_maximo:
+                fin = bisect_right(cubeta, (plazo, INFINITO))
+                secuencias.extend(secuencia for _, secuencia in cubeta[:fin])
+        secuencias.sort()
+        return [self._nombres[secuencia] for secuencia in secuencias]
@@ -0,0 +1,131 @@
+"""
+Instrumentación opcional de las etapas de SistemaInversion
+
+SistemaInversion solo mide cuando se le asigna una Instrumentacion
+(`sistema.instrumentacion = Instrumentacion()`); sin ella cada punto de medida
+cuesta una comparación con None. Los datos acumulados se exportan como una
+instantánea de diccionarios o en el formato de texto de Prometheus.
+"""
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterator
+
+# Etapas que registra SistemaInversion
+ETAPAS = ('evaluar_perfil', 'recomendar', 'filtrado', 'puntuacion', 'reparto', 'explicacion')
+# Etapas que mide cada llamada a recomendar_inversiones (filtrado y puntuacion solo en un fallo de caché)
+ETAPAS_RECOMENDACION = ('recomendar', 'filtrado', 'puntuacion', 'reparto')
+
+
+class Instrumentacion:
+    """
+    Temporizadores por etapa y contadores, seguros entre hilos
+
+    Además de los acumulados, guarda la última duración de cada etapa por hilo, que
+    es el desglose de la última ejecución hecha desde ese hilo (por ejemplo, el
+    trabajador de la interfaz gráfica).
+    """
+
+    def __init__(self):
+        self._cerrojo = threading.Lock()
+        self._tiempos: Dict[str, list] = {}    # etapa -> [llamadas, segundos totales, máximo]
+        self._contadores: Dict[str, int] = {}
+        self._local = threading.local()
+
+    def registrar(self, etapa: str, segundos: float):
+        """Suma una medición de `etapa`"""
+        with self._cerrojo:
+            tiempo = self._tiempos.get(etapa)
+            if tiempo is None:
+                self._tiempos[etapa] = [1, segundos, segundos]
+            else:
+                tiempo[0] += 1
+                tiempo[1] += segundos
+                if segundos > tiempo[2]:
+                    tiempo[2] = segundos
+        self._ultimos()[etapa] = segundos
+
+    def contar(self, contador: str, cantidad: int = 1):
+        with self._cerrojo:
+            self._contadores[contador] = self._contadores.get(contador, 0) + cantidad
+
+    @contextmanager
+    def medir(self, etapa: str) -> Iterator[None]:
+        """Mide el bloque `with` como una llamada de `etapa`"""
+        inicio = perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, perf_counter() - inicio)
+
+    def _ultimos(self) -> Dict[str, float]:
+        ultimos = getattr(self._local, 'ultimos', None)
+        if ultimos is None:
+            ultimos = self._local.ultimos = {}
+        return ultimos
+
+    def iniciar_ejecucion(self):
+        """Olvida el desglose anterior del hilo actual (las etapas que no se repitan no aparecerán)"""
+        self._ultimos().clear()
+
+    def olvidar(self, *etapas: str):
+        """Quita `etapas` del desglose del hilo actual, sin tocar los acumulados"""
+        ultimos = self._ultimos()
+        for etapa in etapas:
+            ultimos.pop(etapa, None)
+
+    def ultima_ejecucion(self) -> Dict[str, float]:
+        """Última duración (en segundos) de cada etapa medida desde el hilo actual"""
+        return dict(self._ultimos())
+
+    def reiniciar(self):
+        with self._cerrojo:
+            self._tiempos.clear()
+            self._contadores.clear()
+        self._ultimos().clear()
+
+    def instantanea(self) -> Dict[str, Dict]:
+        """
+        Copia de los datos acumulados
+
+        Returns:
+            {'etapas': {etapa: {'llamadas', 'segundos', 'media', 'maximo'}}, 'contadores': {...}}
+        """
+        with self._cerrojo:
+            etapas = {
+                etapa: {'llamadas': llamadas, 'segundos': total, 'media': total / llamadas, 'maximo': maximo}
+                for etapa, (llamadas, total, maximo) in self._tiempos.items()
+            }
+            return {'etapas': etapas, 'contadores': dict(self._contadores)}
+
+    def prometheus(self, prefijo: str = 'sistema_inversion') -> str:
+        """Los datos acumulados en el formato de exposición de texto de Prometheus"""
+        datos = self.instantanea()
+        lineas = [
+            f'# HELP {prefijo}_etapa_segundos_total Tiempo acumulado por etapa',
+            f'# TYPE {prefijo}_etapa_segundos_total counter',
+        ]
+        lineas += [f'{prefijo}_etapa_segundos_total{{etapa="{etapa}"}} {valores["segundos"]!r}'
+                   for etapa, valores in datos['etapas'].items()]
+        lineas += [
+            f'# HELP {prefijo}_etapa_llamadas_total Mediciones por etapa',
+            f'# TYPE {prefijo}_etapa_llamadas_total counter',
+        ]
+        lineas += [f'{prefijo}_etapa_llamadas_total{{etapa="{etapa}"}} {valores["llamadas"]}'
+                   for etapa, valores in datos['etapas'].items()]
+        lineas += [
+            f'# HELP {prefijo}_etapa_maximo_segundos Duración máxima por etapa',
+            f'# TYPE {prefijo}_etapa_maximo_segundos gauge',
+        ]
+        lineas += [f'{prefijo}_etapa_maximo_segundos{{etapa="{etapa}"}} {valores["maximo"]!r}'
+                   for etapa, valores in datos['etapas'].items()]
+        for contador, valor in datos['contadores'].items():
+            lineas.append(f'# TYPE {prefijo}_{contador}_total counter')
+            lineas.append(f'{prefijo}_{contador}_total {valor}')
+        return '\n'.join(lineas) + '\n'
+
+    def desglose(self) -> str:
+        """Texto breve con la última ejecución del hilo actual, para mostrar en la interfaz"""
+        ultimos = self._ultimos()
+        partes = [f"{etapa} {ultimos[etapa] * 1000:.3f} ms" for etapa in ETAPAS if etapa in ultimos]
+        return ' · '.join(partes)
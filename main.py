@@ -1,11 +1,16 @@
 import sys
+import threading
+import numpy as np
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QComboBox, QSpinBox, 
                              QPushButton, QTextEdit, QDoubleSpinBox, QGroupBox,
-                             QCheckBox, QMessageBox, QFrame, QScrollArea, QDialog)
+                             QCheckBox, QMessageBox, QFrame, QScrollArea, QDialog,
+                             QTableView, QHeaderView)
 from PyQt5.QtGui import QFont, QIcon, QPalette, QColor
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import (Qt, QObject, QRunnable, QThreadPool, pyqtSignal,
+                          QAbstractTableModel, QModelIndex)
 from sistema_inversion import SistemaInversion, PerfilRiesgo
+from instrumentacion import Instrumentacion
 
 class VentanaBienvenida(QDialog):
     def __init__(self):
@@ -153,12 +158,209 @@ class VentanaBienvenida(QDialog):
             QMessageBox.Ok
         )
 
+def _tramos(mascara: np.ndarray) -> np.ndarray:
+    """Tramos [inicio, fin) de posiciones consecutivas en las que `mascara` es True"""
+    bordes = np.flatnonzero(np.diff(np.concatenate(([0], mascara.astype(np.int8), [0]))))
+    return bordes.reshape(-1, 2)
+
+
+class ModeloAsignacion(QAbstractTableModel):
+    """
+    Cartera recomendada como tabla sobre los arreglos de la base compilada
+
+    Guarda solo los ids de los instrumentos recomendados y sus montos; el texto de
+    cada celda se genera cuando la vista lo pide, es decir, solo para las filas
+    visibles. Al recibir un análisis nuevo se comparan los arreglos con los
+    anteriores y solo se notifican las filas que entran, salen o cambian.
+    """
+    COLUMNAS = ('Instrumento', 'Monto', 'Peso', 'Riesgo', 'Rendimiento esperado')
+    # Con más tramos de filas insertadas o eliminadas sale más barato reiniciar el modelo
+    MAX_TRAMOS = 64
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._base = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._montos = np.empty(0)
+        self._total = 0.0
+        self.filas_actualizadas = 0  # filas notificadas a la vista en la última actualización
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+        
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNAS)
+        
+    def headerData(self, seccion, orientacion, rol=Qt.DisplayRole):
+        if rol == Qt.DisplayRole and orientacion == Qt.Horizontal:
+            return self.COLUMNAS[seccion]
+        return None
+        
+    def data(self, indice, rol=Qt.DisplayRole):
+        if rol == Qt.DisplayRole:
+            fila, columna = indice.row(), indice.column()
+            i = self._ids[fila]
+            if columna == 0:
+                return self._base.nombres[i]
+            if columna == 1:
+                return f"${self._montos[fila]:,.2f}"
+            if columna == 2:
+                return f"{self._montos[fila] / self._total * 100:.2f}%" if self._total else '-'
+            if columna == 3:
+                return f"{self._base.riesgo[i]:.2f}"
+            return f"{self._base.rendimiento_esperado[i] * 100:.1f}%"
+        if rol == Qt.TextAlignmentRole and indice.column() > 0:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+        
+    def actualizar(self, base, ids: np.ndarray, montos: np.ndarray):
+        """
+        Muestra una cartera nueva notificando solo las diferencias con la actual
+        
+        Args:
+            base: BaseConocimiento a la que se refieren los ids
+            ids: Ids de los instrumentos recomendados, en orden creciente
+            montos: Monto recomendado de cada uno
+        """
+        total = float(montos.sum())
+        salen = ~np.isin(self._ids, ids)
+        entran = ~np.isin(ids, self._ids)
+        tramos_salen, tramos_entran = _tramos(salen), _tramos(entran)
+        if base is not self._base or len(tramos_salen) + len(tramos_entran) > self.MAX_TRAMOS:
+            self.beginResetModel()
+            self._base, self._ids, self._montos, self._total = base, ids, montos, total
+            self.endResetModel()
+            self.filas_actualizadas = len(ids)
+            return
+        
+        # Eliminar de atrás hacia delante para que las posiciones pendientes sigan siendo válidas
+        for inicio, fin in tramos_salen[::-1].tolist():
+            self.beginRemoveRows(QModelIndex(), inicio, fin - 1)
+            self._ids = np.concatenate((self._ids[:inicio], self._ids[fin:]))
+            self._montos = np.concatenate((self._montos[:inicio], self._montos[fin:]))
+            self.endRemoveRows()
+        # Insertar en orden creciente: cada tramo ya está en su posición final
+        for inicio, fin in tramos_entran.tolist():
+            self.beginInsertRows(QModelIndex(), inicio, fin - 1)
+            self._ids = np.concatenate((self._ids[:inicio], ids[inicio:fin], self._ids[inicio:]))
+            self._montos = np.concatenate((self._montos[:inicio], montos[inicio:fin], self._montos[inicio:]))
+            self.endInsertRows()
+        
+        # Montos y pesos que cambian en las filas que se mantienen; las insertadas ya se han notificado
+        pesos_anteriores = self._montos / self._total if self._total else self._montos
+        pesos = montos / total if total else montos
+        cambian = ~entran & ((self._montos != montos) | (pesos_anteriores != pesos))
+        self._montos, self._total = montos, total
+        tramos_cambian = _tramos(cambian)
+        if len(tramos_cambian) > self.MAX_TRAMOS:
+            # La vista solo vuelve a pintar las filas visibles del rango
+            tramos_cambian = np.array([[tramos_cambian[0, 0], tramos_cambian[-1, 1]]])
+        for inicio, fin in tramos_cambian.tolist():
+            self.dataChanged.emit(self.index(inicio, 1), self.index(fin - 1, 2), [Qt.DisplayRole])
+        self.filas_actualizadas = int(salen.sum() + entran.sum() + cambian.sum())
+
+
+class SenalesAnalisis(QObject):
+    """Señales que emite un TrabajadorAnalisis; todas llevan el id de la ejecución"""
+    progreso = pyqtSignal(int, int, str)  # id, porcentaje, etapa
+    asignacion = pyqtSignal(int, object)  # id, (base, ids, montos) de la cartera recomendada
+    resultado = pyqtSignal(int, str)      # id, explicación
+    tiempos = pyqtSignal(int, str)        # id, desglose de tiempos por etapa
+    error = pyqtSignal(int, str)          # id, mensaje
+    terminado = pyqtSignal(int)           # id
+
+
+class TrabajadorAnalisis(QRunnable):
+    """Ejecuta evaluación de perfil, recomendación y explicación fuera del hilo de la interfaz"""
+    
+    def __init__(self, id_ejecucion: int, sistema: SistemaInversion, respuestas: dict,
+                 monto: float, plazo: int, condiciones_mercado: list):
+        super().__init__()
+        self.id_ejecucion = id_ejecucion
+        self.sistema = sistema
+        self.respuestas = respuestas
+        self.monto = monto
+        self.plazo = plazo
+        self.condiciones_mercado = condiciones_mercado
+        self.senales = SenalesAnalisis()
+        self._cancelado = threading.Event()
+        
+    def cancelar(self):
+        """Pide la cancelación; se atiende entre etapas y el resultado se descarta"""
+        self._cancelado.set()
+        
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+        
+    def run(self):
+        instrumentacion = self.sistema.instrumentacion
+        if instrumentacion is not None:
+            instrumentacion.iniciar_ejecucion()
+        try:
+            if self.cancelado:
+                return
+            self.senales.progreso.emit(self.id_ejecucion, 0, 'Evaluando perfil')
+            perfil = self.sistema.evaluar_perfil(self.respuestas)
+            if self.cancelado:
+                return
+            
+            self.senales.progreso.emit(self.id_ejecucion, 33, 'Generando recomendaciones')
+            recomendaciones = self.sistema.recomendar_inversiones(
+                perfil=perfil,
+                monto=self.monto,
+                plazo=self.plazo,
+                condiciones_mercado=self.condiciones_mercado
+            )
+            if self.cancelado:
+                return
+            
+            # La tabla se alimenta con arreglos en orden de id, preparados fuera del hilo de la interfaz
+            base = self.sistema.base
+            ids = np.fromiter(map(base.indice.__getitem__, recomendaciones), dtype=np.int64,
+                              count=len(recomendaciones))
+            montos = np.fromiter(recomendaciones.values(), dtype=np.float64, count=len(recomendaciones))
+            orden = np.argsort(ids, kind='stable')
+            self.senales.asignacion.emit(self.id_ejecucion, (base, ids[orden], montos[orden]))
+            
+            self.senales.progreso.emit(self.id_ejecucion, 66, 'Preparando explicación')
+            explicacion = self.sistema.explicar_recomendacion(
+                recomendaciones,
+                perfil,
+                self.condiciones_mercado
+            )
+            if self.cancelado:
+                return
+            
+            self.senales.progreso.emit(self.id_ejecucion, 100, 'Listo')
+            self.senales.resultado.emit(self.id_ejecucion, explicacion)
+            if instrumentacion is not None:
+                self.senales.tiempos.emit(self.id_ejecucion, instrumentacion.desglose())
+        except Exception as e:
+            if not self.cancelado:
+                self.senales.error.emit(self.id_ejecucion, str(e))
+        finally:
+            self.senales.terminado.emit(self.id_ejecucion)
+
+
 class VentanaInversion(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.sistema = SistemaInversion()
-        self.initUI()
+        self.sistema = SistemaInversion(instrumentacion=Instrumentacion())
+        # Pool propio de un solo hilo: un análisis cancelado termina su etapa antes de
+        # que empiece el siguiente, así que nunca hay dos usando a la vez el sistema,
+        # sus cachés y su instrumentación
+        self.pool_analisis = QThreadPool(self)
+        self.pool_analisis.setMaxThreadCount(1)
+        self._id_ejecucion = 0
+        self._trabajador = None
+        # Referencias a los trabajadores que siguen en el pool, incluidos los cancelados
+        self._trabajadores_activos = {}
+        self._explicacion_mostrada = None
+        # La hoja de estilos se aplica antes de crear los widgets: así cada uno se
+        # pule una sola vez al crearse, en lugar de volver a pulirlos todos después
         self.aplicar_estilos()
+        self.initUI()
         
     def aplicar_estilos(self):
         self.setStyleSheet("""
@@ -216,6 +418,13 @@ class VentanaInversion(QMainWindow):
                 background-color: white;
                 font-size: 13px;
             }
+            QTableView {
+                border: 1px solid #bdc3c7;
+                border-radius: 5px;
+                background-color: white;
+                alternate-background-color: #f7f9fb;
+                font-size: 12px;
+            }
         """)
 
     def initUI(self):
@@ -323,6 +532,14 @@ class VentanaInversion(QMainWindow):
         self.check_crecimiento = self.crear_checkbox('Crecimiento económico', 
             'La economía está en expansión')
         
+        # Cambiar cualquier dato cancela el análisis que esté en curso
+        for combo in (self.combo_riesgo, self.combo_horizonte, self.combo_experiencia):
+            combo.currentIndexChanged.connect(self.cancelar_analisis)
+        self.spin_monto.valueChanged.connect(self.cancelar_analisis)
+        self.spin_plazo.valueChanged.connect(self.cancelar_analisis)
+        for check in (self.check_inflacion, self.check_recesion, self.check_crecimiento):
+            check.toggled.connect(self.cancelar_analisis)
+        
         layout_mercado.addWidget(self.check_inflacion)
         layout_mercado.addWidget(self.check_recesion)
         layout_mercado.addWidget(self.check_crecimiento)
@@ -347,11 +564,30 @@ class VentanaInversion(QMainWindow):
         grupo_resultados = QGroupBox('Análisis y Recomendaciones')
         layout_resultados = QVBoxLayout()
         
+        # Tabla de la cartera: la vista solo pide al modelo las celdas visibles, así que
+        # las filas tienen altura fija y las columnas no se ajustan al contenido
+        self.modelo_asignacion = ModeloAsignacion(self)
+        self.tabla_asignacion = QTableView()
+        self.tabla_asignacion.setModel(self.modelo_asignacion)
+        self.tabla_asignacion.setAlternatingRowColors(True)
+        self.tabla_asignacion.setSelectionBehavior(QTableView.SelectRows)
+        self.tabla_asignacion.setMinimumHeight(250)
+        self.tabla_asignacion.verticalHeader().setVisible(False)
+        self.tabla_asignacion.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.tabla_asignacion.verticalHeader().setDefaultSectionSize(24)
+        self.tabla_asignacion.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout_resultados.addWidget(self.tabla_asignacion)
+        
         self.texto_resultados = QTextEdit()
         self.texto_resultados.setReadOnly(True)
         self.texto_resultados.setMinimumHeight(200)
         layout_resultados.addWidget(self.texto_resultados)
         
+        # Desglose de tiempos de la última ejecución
+        self.label_tiempos = QLabel('')
+        self.label_tiempos.setStyleSheet('color: #7f8c8d; font-size: 11px;')
+        layout_resultados.addWidget(self.label_tiempos)
+        
         grupo_resultados.setLayout(layout_resultados)
         layout_principal.addWidget(grupo_resultados)
         
@@ -373,52 +609,93 @@ class VentanaInversion(QMainWindow):
         return combo.currentIndex() + 1
         
     def realizar_analisis(self):
-        try:
-            self.btn_analizar.setEnabled(False)
-            self.btn_analizar.setText('Analizando...')
-            
-            # Recopilar respuestas del cuestionario
-            respuestas_cuestionario = {
-                'tolerancia_riesgo': self.obtener_valor_combo(self.combo_riesgo),
-                'horizonte_temporal': self.obtener_valor_combo(self.combo_horizonte),
-                'experiencia_previa': self.obtener_valor_combo(self.combo_experiencia)
-            }
-            
-            # Obtener perfil
-            perfil = self.sistema.evaluar_perfil(respuestas_cuestionario)
-            
-            # Recopilar condiciones de mercado
-            condiciones_mercado = []
-            if self.check_inflacion.isChecked():
-                condiciones_mercado.append('alta_inflacion')
-            if self.check_recesion.isChecked():
-                condiciones_mercado.append('recesion')
-            if self.check_crecimiento.isChecked():
-                condiciones_mercado.append('crecimiento_economico')
-            
-            # Obtener recomendaciones
-            recomendaciones = self.sistema.recomendar_inversiones(
-                perfil=perfil,
-                monto=self.spin_monto.value(),
-                plazo=self.spin_plazo.value(),
-                condiciones_mercado=condiciones_mercado
-            )
-            
-            # Obtener explicación
-            explicacion = self.sistema.explicar_recomendacion(
-                recomendaciones,
-                perfil,
-                condiciones_mercado
-            )
-            
-            # Mostrar resultados
-            self.texto_resultados.setText(explicacion)
-            
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Error al procesar: {str(e)}')
-        finally:
-            self.btn_analizar.setEnabled(True)
-            self.btn_analizar.setText('Analizar y Generar Recomendaciones')
+        # Un análisis nuevo reemplaza al que siga en curso
+        self.cancelar_analisis()
+        
+        self.btn_analizar.setEnabled(False)
+        self.btn_analizar.setText('Analizando...')
+        
+        # Recopilar respuestas del cuestionario (los widgets solo se leen en el hilo de la interfaz)
+        respuestas_cuestionario = {
+            'tolerancia_riesgo': self.obtener_valor_combo(self.combo_riesgo),
+            'horizonte_temporal': self.obtener_valor_combo(self.combo_horizonte),
+            'experiencia_previa': self.obtener_valor_combo(self.combo_experiencia)
+        }
+        
+        # Recopilar condiciones de mercado
+        condiciones_mercado = []
+        if self.check_inflacion.isChecked():
+            condiciones_mercado.append('alta_inflacion')
+        if self.check_recesion.isChecked():
+            condiciones_mercado.append('recesion')
+        if self.check_crecimiento.isChecked():
+            condiciones_mercado.append('crecimiento_economico')
+        
+        # Lanzar el análisis en el pool de hilos
+        self._id_ejecucion += 1
+        self._trabajador = TrabajadorAnalisis(
+            self._id_ejecucion,
+            self.sistema,
+            respuestas_cuestionario,
+            self.spin_monto.value(),
+            self.spin_plazo.value(),
+            condiciones_mercado
+        )
+        self._trabajador.setAutoDelete(False)
+        self._trabajador.senales.progreso.connect(self.mostrar_progreso)
+        self._trabajador.senales.asignacion.connect(self.mostrar_asignacion)
+        self._trabajador.senales.resultado.connect(self.mostrar_resultado)
+        self._trabajador.senales.tiempos.connect(self.mostrar_tiempos)
+        self._trabajador.senales.error.connect(self.mostrar_error)
+        self._trabajador.senales.terminado.connect(self.finalizar_analisis)
+        self._trabajadores_activos[self._id_ejecucion] = self._trabajador
+        self.pool_analisis.start(self._trabajador)
+        
+    def cancelar_analisis(self):
+        """Cancela el análisis en curso, si lo hay, y restaura el botón"""
+        if self._trabajador is None:
+            return
+        self._trabajador.cancelar()
+        # Si aún no había empezado se saca de la cola y ya no emitirá 'terminado'
+        if self.pool_analisis.tryTake(self._trabajador):
+            self._trabajadores_activos.pop(self._trabajador.id_ejecucion, None)
+        self._trabajador = None
+        self.restaurar_boton()
+        
+    def es_ejecucion_actual(self, id_ejecucion: int) -> bool:
+        return self._trabajador is not None and id_ejecucion == self._id_ejecucion
+        
+    def mostrar_progreso(self, id_ejecucion: int, porcentaje: int, etapa: str):
+        if self.es_ejecucion_actual(id_ejecucion):
+            self.btn_analizar.setText(f'Analizando... {porcentaje}% ({etapa})')
+        
+    def mostrar_asignacion(self, id_ejecucion: int, asignacion: tuple):
+        if self.es_ejecucion_actual(id_ejecucion):
+            self.modelo_asignacion.actualizar(*asignacion)
+        
+    def mostrar_resultado(self, id_ejecucion: int, explicacion: str):
+        # Texto plano (sin detectar HTML) y solo si ha cambiado respecto al mostrado
+        if self.es_ejecucion_actual(id_ejecucion) and explicacion != self._explicacion_mostrada:
+            self.texto_resultados.setPlainText(explicacion)
+            self._explicacion_mostrada = explicacion
+        
+    def mostrar_tiempos(self, id_ejecucion: int, desglose: str):
+        if self.es_ejecucion_actual(id_ejecucion):
+            self.label_tiempos.setText(f'Tiempos: {desglose}')
+        
+    def mostrar_error(self, id_ejecucion: int, mensaje: str):
+        if self.es_ejecucion_actual(id_ejecucion):
+            QMessageBox.critical(self, 'Error', f'Error al procesar: {mensaje}')
+        
+    def finalizar_analisis(self, id_ejecucion: int):
+        self._trabajadores_activos.pop(id_ejecucion, None)
+        if self.es_ejecucion_actual(id_ejecucion):
+            self._trabajador = None
+            self.restaurar_boton()
+        
+    def restaurar_boton(self):
+        self.btn_analizar.setEnabled(True)
+        self.btn_analizar.setText('Analizar y Generar Recomendaciones')
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,336 @@
+"""
+Monitor de mercado: condiciones derivadas de indicadores y alertas de rebalanceo
+
+Consume un flujo de valores de indicadores (inflación, crecimiento del PIB, ...) de
+un archivo o de un socket, deriva de ellos el estado de las condiciones de
+`reglas_mercado` con histéresis y, solo cuando una condición cambia, recalcula los
+pesos de los clientes a los que afecta con CarteraIncremental. Un cliente recibe una
+alerta de rebalanceo cuando la deriva entre su cartera actual y la recomendada supera
+el umbral; el resto de ticks solo actualiza el último valor del indicador.
+
+Formato CSV de ticks: columnas `marca`, `indicador`, `valor`.
+Formato JSONL de ticks (y de cada línea del socket): {"marca": ..., "indicador": ..., "valor": ...};
+por el socket también se aceptan líneas `marca,indicador,valor`.
+
+Uso:
+    python monitor_mercado.py clientes.csv ticks.csv [--umbral-deriva 0.05]
+    python monitor_mercado.py clientes.csv --socket 127.0.0.1:9000
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Tuple
+
+import numpy as np
+
+from cartera_incremental import CarteraIncremental
+from flujo_recomendaciones import detectar_formato, leer_filas_csv, leer_filas_jsonl
+from sistema_inversion import SistemaInversion
+
+
+class Tick(NamedTuple):
+    """Valor de un indicador en un instante"""
+    marca: str
+    indicador: str
+    valor: float
+
+
+class UmbralCondicion(NamedTuple):
+    """
+    Regla con histéresis que deriva una condición de mercado de un indicador
+
+    Si `activar` >= `desactivar` la condición se activa al subir el indicador hasta
+    `activar` y se desactiva al bajar hasta `desactivar`; si no, al revés. Entre
+    ambos valores la condición conserva su estado, así que un indicador que oscila
+    cerca de un umbral no la hace cambiar en cada tick.
+    """
+    condicion: str
+    indicador: str
+    activar: float
+    desactivar: float
+
+    def siguiente(self, activa: bool, valor: float) -> bool:
+        """Estado de la condición tras observar `valor`"""
+        if self.activar >= self.desactivar:
+            return valor > self.desactivar if activa else valor >= self.activar
+        return valor < self.desactivar if activa else valor <= self.activar
+
+
+# Indicadores en porcentaje anual
+UMBRALES_PREDETERMINADOS = (
+    UmbralCondicion('alta_inflacion', 'inflacion', activar=5.0, desactivar=4.0),
+    UmbralCondicion('recesion', 'crecimiento_pib', activar=-0.5, desactivar=0.5),
+    UmbralCondicion('crecimiento_economico', 'crecimiento_pib', activar=2.5, desactivar=1.5),
+)
+
+
+@dataclass
+class AlertaRebalanceo:
+    """Clientes cuya cartera se ha alejado de la recomendada tras un cambio de condiciones"""
+    marca: str
+    cambios: Tuple[str, ...]       # condiciones que acaban de activarse o desactivarse
+    condiciones: Tuple[str, ...]   # condiciones activas tras el cambio
+    clientes: np.ndarray           # posiciones de los clientes en la cartera
+    derivas: np.ndarray            # fracción de cada cartera que habría que mover
+
+
+@dataclass
+class EstadisticasMonitor:
+    """Resumen de un monitor de mercado"""
+    ticks: int = 0
+    cambios_condicion: int = 0
+    clientes_recalculados: int = 0
+    alertas: int = 0
+    clientes_alertados: int = 0
+    segundos: float = 0.0
+
+    @property
+    def ticks_por_segundo(self) -> float:
+        return self.ticks / self.segundos if self.segundos else 0.0
+
+
+def _tick_de_registro(registro: dict, numero: int) -> Tick:
+    return Tick(str(registro.get('marca', numero)), registro['indicador'], float(registro['valor']))
+
+
+def leer_ticks_csv(archivo: TextIO) -> Iterator[Tick]:
+    """Genera los ticks de un CSV con columnas marca, indicador y valor"""
+    filas = csv.reader(archivo)
+    cabecera = next(filas, None)
+    if cabecera is None:
+        return
+    marca, indicador, valor = (cabecera.index(columna) for columna in ('marca', 'indicador', 'valor'))
+    for fila in filas:
+        if fila:
+            yield Tick(fila[marca], fila[indicador], float(fila[valor]))
+
+
+def leer_ticks_jsonl(archivo: TextIO) -> Iterator[Tick]:
+    """Genera los ticks de un JSONL"""
+    numero = 0
+    for linea in archivo:
+        if linea.strip():
+            numero += 1
+            yield _tick_de_registro(json.loads(linea), numero)
+
+
+def _tick_de_linea(linea: str, numero: int) -> Tick:
+    if linea.startswith('{'):
+        return _tick_de_registro(json.loads(linea), numero)
+    marca, indicador, valor = linea.split(',')
+    return Tick(marca, indicador, float(valor))
+
+
+async def leer_ticks_socket(host: str, puerto: int) -> AsyncIterator[Tick]:
+    """Genera los ticks que llegan por una conexión TCP, uno por línea, hasta que se cierra"""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    numero = 0
+    try:
+        async for linea in lector:
+            linea = linea.decode('utf-8').strip()
+            if linea:
+                numero += 1
+                yield _tick_de_linea(linea, numero)
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+
+
+def cargar_umbrales(ruta: str) -> Tuple[UmbralCondicion, ...]:
+    """Lee umbrales de un JSON con una lista de {condicion, indicador, activar, desactivar}"""
+    with open(ruta, encoding='utf-8') as archivo:
+        return tuple(UmbralCondicion(u['condicion'], u['indicador'], float(u['activar']), float(u['desactivar']))
+                     for u in json.load(archivo))
+
+
+class MonitorMercado:
+    """
+    Mantiene las condiciones de mercado a partir de ticks de indicadores y vigila la deriva de las carteras
+
+    `referencia` guarda los pesos con los que está invertido cada cliente (los
+    recomendados al crear el monitor o en su último rebalanceo). Un tick que no
+    cambia ninguna condición solo cuesta una comparación por umbral del indicador.
+    """
+
+    def __init__(self,
+                 cartera: CarteraIncremental,
+                 umbrales: Sequence[UmbralCondicion] = UMBRALES_PREDETERMINADOS,
+                 umbral_deriva: float = 0.05,
+                 rebalancear: bool = True):
+        """
+        Args:
+            cartera: Cartera de clientes, con las condiciones activas al empezar
+            umbrales: Una regla por condición de mercado a vigilar
+            umbral_deriva: Fracción de la cartera (0 a 1) que tiene que haberse alejado
+                de la recomendada para alertar
+            rebalancear: Si es True, se da por hecho que los clientes alertados
+                rebalancean y su referencia pasa a ser la cartera recomendada
+        """
+        if not 0.0 <= umbral_deriva <= 1.0:
+            raise ValueError("El umbral de deriva debe estar entre 0 y 1")
+        condiciones = cartera.sistema.base.indice_condiciones
+        self._umbrales: Dict[str, List[UmbralCondicion]] = {}
+        for umbral in umbrales:
+            if umbral.condicion not in condiciones:
+                raise ValueError(f"Condición de mercado desconocida: {umbral.condicion}")
+            self._umbrales.setdefault(umbral.indicador, []).append(umbral)
+        self.activas = {umbral.condicion: umbral.condicion in cartera.condiciones for umbral in umbrales}
+        if len(self.activas) != len(umbrales):
+            raise ValueError("Cada condición admite un solo umbral")
+        self.cartera = cartera
+        self.umbral_deriva = umbral_deriva
+        self.rebalancear = rebalancear
+        self.valores: Dict[str, float] = {}
+        self.referencia = cartera.pesos()
+        self.estadisticas = EstadisticasMonitor()
+
+    def _actualizar_estado(self, tick: Tick) -> List[str]:
+        """Registra el tick y devuelve las condiciones que cambian de estado"""
+        self.estadisticas.ticks += 1
+        self.valores[tick.indicador] = tick.valor
+        cambios = []
+        for umbral in self._umbrales.get(tick.indicador, ()):
+            activa = self.activas[umbral.condicion]
+            if umbral.siguiente(activa, tick.valor) != activa:
+                self.activas[umbral.condicion] = not activa
+                cambios.append(umbral.condicion)
+        return cambios
+
+    def _aplicar(self, cambios: List[str], marca: str) -> Optional[AlertaRebalanceo]:
+        """Aplica los cambios a la cartera y calcula la deriva de los clientes afectados"""
+        cartera = self.cartera
+        afectados = []
+        for condicion in cambios:
+            if self.activas[condicion]:
+                cartera.activar(condicion)
+            else:
+                cartera.desactivar(condicion)
+            afectados.append(cartera.clientes_afectados(condicion))
+        estadisticas = self.estadisticas
+        estadisticas.cambios_condicion += len(cambios)
+        if self.referencia.shape[1] != len(cartera.sistema.base):
+            # La base ha cambiado de instrumentos: la referencia anterior ya no es comparable
+            self.referencia = cartera.pesos()
+            return None
+        filas = np.unique(np.concatenate(afectados))
+        estadisticas.clientes_recalculados += len(filas)
+        if not len(filas):
+            return None
+
+        objetivo = cartera.pesos(filas)
+        derivas = 0.5 * np.abs(objetivo - self.referencia[filas]).sum(axis=1)
+        superan = derivas > self.umbral_deriva
+        if not superan.any():
+            return None
+        clientes = filas[superan]
+        if self.rebalancear:
+            self.referencia[clientes] = objetivo[superan]
+        estadisticas.alertas += 1
+        estadisticas.clientes_alertados += len(clientes)
+        return AlertaRebalanceo(marca, tuple(cambios), tuple(cartera.condiciones), clientes, derivas[superan])
+
+    def procesar(self, tick: Tick) -> Optional[AlertaRebalanceo]:
+        """Procesa un tick; devuelve una alerta si algún cliente supera el umbral de deriva"""
+        cambios = self._actualizar_estado(tick)
+        return self._aplicar(cambios, tick.marca) if cambios else None
+
+    def monitorizar(self, ticks: Iterable[Tick]) -> Iterator[AlertaRebalanceo]:
+        """Procesa `ticks` y genera las alertas a medida que se producen"""
+        inicio = time.perf_counter()
+        try:
+            for tick in ticks:
+                alerta = self.procesar(tick)
+                if alerta is not None:
+                    yield alerta
+        finally:
+            self.estadisticas.segundos += time.perf_counter() - inicio
+
+    async def monitorizar_async(self, ticks: AsyncIterator[Tick]) -> AsyncIterator[AlertaRebalanceo]:
+        """
+        Versión asíncrona de monitorizar
+
+        El recálculo tras un cambio de condiciones se ejecuta en el pool de hilos del
+        bucle de eventos (NumPy libera el GIL), así que no bloquea la lectura del socket.
+        """
+        bucle = asyncio.get_running_loop()
+        inicio = time.perf_counter()
+        try:
+            async for tick in ticks:
+                cambios = self._actualizar_estado(tick)
+                if cambios:
+                    # Un cambio cada vez y en orden, no con gather: cada uno parte de la cartera
+                    # y de las referencias que deja el anterior
+                    alerta = await bucle.run_in_executor(None, self._aplicar, cambios, tick.marca)
+                    if alerta is not None:
+                        yield alerta
+        finally:
+            self.estadisticas.segundos += time.perf_counter() - inicio
+
+
+def cargar_clientes(ruta: str, sistema: SistemaInversion, condiciones_mercado: Iterable[str] = ()) -> Tuple[List[str], CarteraIncremental]:
+    """Cartera de los clientes de un CSV/JSONL de cuestionarios (formato de flujo_recomendaciones)"""
+    lector = leer_filas_csv if detectar_formato(ruta) == 'csv' else leer_filas_jsonl
+    with open(ruta, encoding='utf-8', newline='') as archivo:
+        filas = list(lector(archivo))
+    ids = [fila[0] for fila in filas]
+    cartera = CarteraIncremental(sistema,
+                                 [sistema.evaluar_perfil(fila[1]) for fila in filas],
+                                 [fila[2] for fila in filas],
+                                 [fila[3] for fila in filas],
+                                 condiciones_mercado)
+    return ids, cartera
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Vigila indicadores de mercado y alerta de carteras a rebalancear')
+    parser.add_argument('clientes', help='CSV/JSONL de cuestionarios de los clientes')
+    parser.add_argument('ticks', nargs='?', help="CSV/JSONL de ticks ('-' para stdin)")
+    parser.add_argument('--socket', help='Leer los ticks de host:puerto en lugar de un archivo')
+    parser.add_argument('--umbrales', help='JSON con los umbrales de cada condición')
+    parser.add_argument('--umbral-deriva', type=float, default=0.05)
+    parser.add_argument('--condiciones', nargs='*', default=[], help='Condiciones activas al empezar')
+    args = parser.parse_args(argv)
+    if (args.ticks is None) == (args.socket is None):
+        parser.error('Indica un archivo de ticks o --socket')
+
+    sistema = SistemaInversion()
+    ids, cartera = cargar_clientes(args.clientes, sistema, args.condiciones)
+    umbrales = cargar_umbrales(args.umbrales) if args.umbrales else UMBRALES_PREDETERMINADOS
+    monitor = MonitorMercado(cartera, umbrales, args.umbral_deriva)
+
+    def emitir(alerta: AlertaRebalanceo):
+        print(json.dumps({'marca': alerta.marca, 'cambios': alerta.cambios, 'condiciones': alerta.condiciones,
+                          'clientes': [ids[i] for i in alerta.clientes.tolist()],
+                          'deriva_maxima': float(alerta.derivas.max())}, ensure_ascii=False), flush=True)
+
+    if args.socket:
+        host, puerto = args.socket.rsplit(':', 1)
+
+        async def vigilar():
+            async for alerta in monitor.monitorizar_async(leer_ticks_socket(host, int(puerto))):
+                emitir(alerta)
+
+        try:
+            asyncio.run(vigilar())
+        except KeyboardInterrupt:
+            pass
+    else:
+        lector = leer_ticks_csv if detectar_formato(args.ticks) == 'csv' else leer_ticks_jsonl
+        archivo = nullcontext(sys.stdin) if args.ticks == '-' else open(args.ticks, encoding='utf-8', newline='')
+        with archivo as archivo:
+            for alerta in monitor.monitorizar(lector(archivo)):
+                emitir(alerta)
+
+    estadisticas = monitor.estadisticas
+    print(f"{estadisticas.ticks:,} ticks ({estadisticas.ticks_por_segundo:,.0f}/s), "
+          f"{estadisticas.cambios_condicion} cambios de condición, {estadisticas.alertas} alertas a "
+          f"{estadisticas.clientes_alertados:,} clientes", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
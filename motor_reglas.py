@@ -0,0 +1,368 @@
+"""
+Motor de inferencia por encadenamiento hacia adelante con una red de tipo Rete
+
+Las reglas combinan condiciones sobre hechos del inversor y del mercado (por ejemplo
+alta_inflacion == True, plazo <= 2) y, cuando se cumplen, ajustan el score de
+instrumentos y pueden concluir hechos nuevos que disparan otras reglas.
+
+La red comparte nodos: cada condición distinta es un único nodo alfa y las reglas
+cuyas condiciones (en orden canónico) empiezan igual comparten los nodos beta de ese
+prefijo. Al cambiar un hecho solo se reevalúan los nodos alfa que lo consultan y se
+propaga el cambio hacia abajo; el resto de la red no se toca.
+"""
+import operator
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from base_conocimiento import BaseConocimiento
+
+OPERADORES = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'en': lambda valor, opciones: valor in opciones,
+}
+
+_AUSENTE = object()
+
+ATRIBUTOS_INSTRUMENTO = ('riesgo', 'rendimiento_esperado', 'liquidez', 'plazo_minimo', 'perfil_recomendado')
+
+
+def _congelar(valor):
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(valor)
+    return valor
+
+
+class Condicion(NamedTuple):
+    """Prueba sobre un hecho (o sobre un atributo del instrumento en `Regla.sobre_instrumentos`)"""
+    hecho: str
+    operador: str = '=='
+    valor: Any = True
+
+    @classmethod
+    def congelada(cls, condicion: Iterable) -> 'Condicion':
+        """
+        Condicion hashable a partir de una tupla o Condicion
+
+        Las condiciones son claves de los nodos alfa, así que un valor lista (lo
+        natural con 'en') pasa a tupla y un conjunto a frozenset.
+        """
+        condicion = cls(*condicion)
+        return condicion._replace(valor=_congelar(condicion.valor))
+
+    def evaluar(self, hechos: Dict[str, Any]) -> bool:
+        if self.hecho not in hechos:
+            return False
+        try:
+            return bool(OPERADORES[self.operador](hechos[self.hecho], self.valor))
+        except TypeError:
+            return False
+
+
+class Regla:
+    """
+    Regla del sistema experto
+
+    Args:
+        nombre: Identificador de la regla
+        condiciones: Condiciones sobre hechos que deben cumplirse todas
+        ajustes: Ajuste por instrumento, como en reglas_mercado (score × (1 + ajuste))
+        ajuste: Ajuste común para los instrumentos que cumplen `sobre_instrumentos`
+        sobre_instrumentos: Condiciones sobre atributos del instrumento (liquidez, riesgo, ...)
+        concluye: Hechos que se afirman mientras la regla está activa
+    """
+
+    def __init__(self,
+                 nombre: str,
+                 condiciones: Iterable[Condicion],
+                 ajustes: Optional[Dict[str, float]] = None,
+                 ajuste: float = 0.0,
+                 sobre_instrumentos: Iterable[Condicion] = (),
+                 concluye: Optional[Dict[str, Any]] = None):
+        self.nombre = nombre
+        self.condiciones = tuple(sorted(set(Condicion.congelada(c) for c in condiciones), key=repr))
+        if not self.condiciones:
+            raise ValueError(f"La regla {nombre} necesita al menos una condición")
+        self.ajustes = dict(ajustes or {})
+        self.ajuste = ajuste
+        self.sobre_instrumentos = tuple(Condicion.congelada(c) for c in sobre_instrumentos)
+        for condicion in self.sobre_instrumentos:
+            if condicion.hecho not in ATRIBUTOS_INSTRUMENTO:
+                raise ValueError(f"Atributo de instrumento desconocido en {nombre}: {condicion.hecho}")
+        self.concluye = dict(concluye or {})
+
+    def __repr__(self):
+        return f"Regla({self.nombre!r})"
+
+    def factores(self, base: BaseConocimiento) -> np.ndarray:
+        """Multiplicador (1 + ajuste) de la regla para cada instrumento de la base"""
+        factores = np.ones(len(base))
+        if self.ajuste:
+            mascara = np.ones(len(base), dtype=bool)
+            for condicion in self.sobre_instrumentos:
+                atributo = getattr(base, condicion.hecho)
+                if condicion.operador == 'en':
+                    mascara &= np.isin(atributo, list(condicion.valor))
+                else:
+                    mascara &= OPERADORES[condicion.operador](atributo, condicion.valor)
+            factores[mascara] = 1 + self.ajuste
+        for instrumento, ajuste in self.ajustes.items():
+            if instrumento in base.indice:
+                factores[base.indice[instrumento]] *= 1 + ajuste
+        return factores
+
+
+class _NodoAlfa:
+    __slots__ = ('condicion', 'satisfecho', 'hijos')
+
+    def __init__(self, condicion: Condicion):
+        self.condicion = condicion
+        self.satisfecho = False
+        self.hijos: List['_NodoBeta'] = []
+
+
+class _NodoBeta:
+    """Conjunción del nodo beta padre (prefijo de condiciones) con un nodo alfa"""
+    __slots__ = ('padre', 'alfa', 'profundidad', 'satisfecho', 'hijos', 'reglas')
+
+    def __init__(self, padre: Optional['_NodoBeta'], alfa: _NodoAlfa):
+        self.padre = padre
+        self.alfa = alfa
+        self.profundidad = 1 if padre is None else padre.profundidad + 1
+        self.satisfecho = False
+        self.hijos: List['_NodoBeta'] = []
+        self.reglas: List[Regla] = []
+
+    def evaluar(self) -> bool:
+        return self.alfa.satisfecho and (self.padre is None or self.padre.satisfecho)
+
+
+class MotorReglas:
+    """Red de reglas con memoria de trabajo y agenda de reglas activas"""
+
+    MAX_CICLOS = 1_000
+
+    def __init__(self, reglas: Iterable[Regla] = ()):
+        self.hechos: Dict[str, Any] = {}
+        self.activas: Dict[str, Regla] = {}          # agenda, en orden de activación
+        self._reglas: Dict[str, Regla] = {}
+        self._alfas: Dict[Condicion, _NodoAlfa] = {}
+        self._alfas_por_hecho: Dict[str, List[_NodoAlfa]] = {}
+        self._betas: Dict[Tuple[Condicion, ...], _NodoBeta] = {}
+        self._afirmados: Dict[str, Any] = {}          # hechos de entrada
+        self._conclusiones: Dict[str, Dict[str, Any]] = {}  # hecho -> {regla: valor}
+        self._factores: Dict[str, np.ndarray] = {}   # factores por regla para `_base_factores`
+        self._base_factores: Optional[BaseConocimiento] = None
+        self.evaluaciones_alfa = 0
+        for regla in reglas:
+            self.agregar_regla(regla)
+
+    @classmethod
+    def desde_reglas_mercado(cls, reglas_mercado: Dict[str, Dict[str, float]]) -> 'MotorReglas':
+        """Traduce las reglas planas condición → ajustes de SistemaInversion"""
+        return cls(Regla(condicion, [Condicion(condicion, '==', True)], ajustes=ajustes)
+                   for condicion, ajustes in reglas_mercado.items())
+
+    @property
+    def reglas(self) -> Dict[str, Regla]:
+        return self._reglas
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Tamaño de la red: las reglas comparten nodos alfa y beta"""
+        return {
+            'reglas': len(self._reglas),
+            'nodos_alfa': len(self._alfas),
+            'nodos_beta': len(self._betas),
+            'condiciones_totales': sum(len(regla.condiciones) for regla in self._reglas.values()),
+            'reglas_activas': len(self.activas),
+            'evaluaciones_alfa': self.evaluaciones_alfa,
+        }
+
+    def agregar_regla(self, regla: Regla):
+        """Inserta la regla en la red reutilizando los nodos alfa y beta existentes"""
+        if regla.nombre in self._reglas:
+            raise ValueError(f"Ya existe una regla llamada {regla.nombre}")
+        self._reglas[regla.nombre] = regla
+        padre = None
+        for k, condicion in enumerate(regla.condiciones):
+            alfa = self._alfas.get(condicion)
+            if alfa is None:
+                alfa = self._alfas[condicion] = _NodoAlfa(condicion)
+                self._alfas_por_hecho.setdefault(condicion.hecho, []).append(alfa)
+                alfa.satisfecho = condicion.evaluar(self.hechos)
+            clave = regla.condiciones[:k + 1]
+            beta = self._betas.get(clave)
+            if beta is None:
+                beta = self._betas[clave] = _NodoBeta(padre, alfa)
+                alfa.hijos.append(beta)
+                if padre is not None:
+                    padre.hijos.append(beta)
+                beta.satisfecho = beta.evaluar()
+            padre = beta
+        padre.reglas.append(regla)
+        if padre.satisfecho:
+            self._encadenar(self._activar(regla))
+
+    def actualizar(self, hechos: Dict[str, Any], reemplazar: bool = False):
+        """
+        Afirma hechos de entrada y propaga solo los cambios
+
+        Args:
+            hechos: Valores de los hechos a afirmar
+            reemplazar: Si es True, los hechos de entrada que no aparecen se retiran
+        """
+        cambiados = []
+        if reemplazar:
+            for hecho in [h for h in self._afirmados if h not in hechos]:
+                del self._afirmados[hecho]
+                cambiados.append(hecho)
+        for hecho, valor in hechos.items():
+            if hecho not in self._afirmados or self._afirmados[hecho] != valor:
+                self._afirmados[hecho] = valor
+                cambiados.append(hecho)
+        self._encadenar(cambiados)
+
+    def retirar(self, *hechos: str):
+        """Retira hechos de entrada"""
+        # Un hecho puede valer None: la ausencia se distingue con un centinela propio
+        cambiados = [hecho for hecho in hechos if self._afirmados.pop(hecho, _AUSENTE) is not _AUSENTE]
+        self._encadenar(cambiados)
+
+    def _valor_actual(self, hecho: str):
+        """Un hecho de entrada tiene prioridad; si no, vale la conclusión más reciente que lo sostiene"""
+        if hecho in self._afirmados:
+            return True, self._afirmados[hecho]
+        apoyos = self._conclusiones.get(hecho)
+        if apoyos:
+            return True, next(reversed(apoyos.values()))
+        return False, None
+
+    def _encadenar(self, cambiados: Iterable[str]):
+        """
+        Propaga cambios de hechos hasta llegar a un punto fijo
+
+        Los hechos se procesan en el orden en que cambian, así que las reglas se
+        activan en un orden reproducible (el de `activas`).
+        """
+        for _ in range(self.MAX_CICLOS):
+            cambiados = dict.fromkeys(cambiados)
+            if not cambiados:
+                return
+            siguientes = []
+            for hecho in cambiados:
+                existe, valor = self._valor_actual(hecho)
+                if existe:
+                    if hecho in self.hechos and self.hechos[hecho] == valor:
+                        continue
+                    self.hechos[hecho] = valor
+                elif hecho in self.hechos:
+                    del self.hechos[hecho]
+                else:
+                    continue
+                siguientes += self._propagar_hecho(hecho)
+            cambiados = siguientes
+        raise RuntimeError("Las reglas no alcanzan un punto fijo (¿conclusiones cíclicas?)")
+
+    def _propagar_hecho(self, hecho: str) -> List[str]:
+        """
+        Reevalúa los nodos alfa del hecho y propaga por los beta; devuelve hechos concluidos que cambian
+
+        Los nodos beta se reevalúan por niveles de profundidad creciente (orden
+        topológico): un nodo solo se evalúa cuando su padre ya está actualizado, así que
+        ninguna regla se activa y desactiva de forma espuria en una misma propagación.
+        """
+        concluidos = []
+        niveles: Dict[int, List[_NodoBeta]] = {}
+        for alfa in self._alfas_por_hecho.get(hecho, ()):
+            self.evaluaciones_alfa += 1
+            satisfecho = alfa.condicion.evaluar(self.hechos)
+            if satisfecho != alfa.satisfecho:
+                alfa.satisfecho = satisfecho
+                for beta in alfa.hijos:
+                    niveles.setdefault(beta.profundidad, []).append(beta)
+        profundidad = min(niveles, default=0)
+        while niveles:
+            for beta in niveles.pop(profundidad, ()):
+                # Un nodo puede estar dos veces en su nivel (por su alfa y por su padre);
+                # la segunda evaluación ya no ve ningún cambio
+                satisfecho = beta.evaluar()
+                if satisfecho == beta.satisfecho:
+                    continue
+                beta.satisfecho = satisfecho
+                if beta.hijos:
+                    niveles.setdefault(profundidad + 1, []).extend(beta.hijos)
+                for regla in beta.reglas:
+                    concluidos += self._activar(regla) if satisfecho else self._desactivar(regla)
+            profundidad += 1
+        return concluidos
+
+    def _activar(self, regla: Regla) -> List[str]:
+        self.activas[regla.nombre] = regla
+        for hecho, valor in regla.concluye.items():
+            self._conclusiones.setdefault(hecho, {})[regla.nombre] = valor
+        return list(regla.concluye)
+
+    def _desactivar(self, regla: Regla) -> List[str]:
+        self.activas.pop(regla.nombre, None)
+        for hecho in regla.concluye:
+            apoyos = self._conclusiones.get(hecho, {})
+            apoyos.pop(regla.nombre, None)
+            if not apoyos:
+                self._conclusiones.pop(hecho, None)
+        return list(regla.concluye)
+
+    def factores_activos(self, base: BaseConocimiento) -> List[np.ndarray]:
+        """Factores de cada regla activa que ajusta instrumentos, en el orden de `activas`"""
+        if base is not self._base_factores:
+            # Cambió la base (por ejemplo, tras modificar las tablas): los factores se recalculan
+            self._factores = {}
+            self._base_factores = base
+        resultado = []
+        for nombre, regla in self.activas.items():
+            if not regla.ajustes and not regla.ajuste:
+                continue
+            factores = self._factores.get(nombre)
+            if factores is None:
+                factores = self._factores[nombre] = regla.factores(base)
+            resultado.append(factores)
+        return resultado
+
+    def multiplicadores(self, base: BaseConocimiento) -> np.ndarray:
+        """Producto de los factores de las reglas activas para cada instrumento de la base"""
+        resultado = np.ones(len(base))
+        for factores in self.factores_activos(base):
+            resultado *= factores
+        return resultado
+
+    def agregar_a_red(self, red):
+        """
+        Añade la red de reglas al grafo de decisión (nodos 'hecho', 'alfa', 'beta' y 'regla')
+
+        Las reglas enlazan con los instrumentos que ajustan, igual que las condiciones
+        de mercado en SistemaInversion._construir_red.
+        """
+        for condicion, alfa in self._alfas.items():
+            red.add_node(('hecho', condicion.hecho), tipo='hecho')
+            red.add_node(('alfa', condicion), tipo='alfa')
+            red.add_edge(('hecho', condicion.hecho), ('alfa', condicion))
+        for clave, beta in self._betas.items():
+            red.add_node(('beta', clave), tipo='beta')
+            red.add_edge(('alfa', beta.alfa.condicion), ('beta', clave))
+            if beta.padre is not None:
+                red.add_edge(('beta', clave[:-1]), ('beta', clave))
+            for regla in beta.reglas:
+                red.add_node(('regla', regla.nombre), tipo='regla')
+                red.add_edge(('beta', clave), ('regla', regla.nombre))
+                for instrumento in regla.ajustes:
+                    if instrumento in red:
+                        red.add_edge(('regla', regla.nombre), instrumento)
+                for hecho in regla.concluye:
+                    red.add_node(('hecho', hecho), tipo='hecho')
+                    red.add_edge(('regla', regla.nombre), ('hecho', hecho))
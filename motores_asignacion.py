@@ -0,0 +1,247 @@
+"""
+Motores de asignación: convierten los instrumentos válidos de un inversor en pesos de cartera
+
+SistemaInversion filtra los instrumentos por plazo y perfil y delega el reparto en
+un motor. Cualquier objeto con un método `pesos(base, perfil, validos, ids_condiciones)`
+sirve como motor; los resultados se guardan en la caché de pesos usando el propio
+motor como parte de la clave, así que sus parámetros no deben cambiar tras crearlo.
+"""
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from base_conocimiento import BaseConocimiento
+
+if TYPE_CHECKING:
+    from sistema_inversion import PerfilRiesgo
+
+Pesos = Tuple[Tuple[str, float], ...]
+
+
+def suma_secuencial(valores: Iterable[float]) -> float:
+    """
+    Suma de izquierda a derecha, sin compensación
+
+    Desde Python 3.12 sum() compensa el redondeo de los floats; la ruta por lotes
+    (sistema_inversion.sumar_en_orden) acumula en este mismo orden, así que ambas
+    rutas dan el mismo total con cualquier versión del intérprete.
+    """
+    total = 0.0
+    for valor in valores:
+        total += valor
+    return total
+
+
+class MotorAsignacion(ABC):
+    """Interfaz de los motores de asignación; las subclases deben implementar `pesos`"""
+
+    @abstractmethod
+    def pesos(self,
+              base: BaseConocimiento,
+              perfil: 'PerfilRiesgo',
+              validos: Sequence[int],
+              ids_condiciones: Tuple[int, ...]) -> Pesos:
+        """
+        Reparte la cartera entre los instrumentos válidos
+
+        Args:
+            base: Base de conocimientos compilada
+            perfil: Perfil de riesgo del inversor
+            validos: Ids de los instrumentos que cumplen plazo y perfil, en orden de la base
+            ids_condiciones: Ids de las condiciones de mercado activas, en el orden recibido
+
+        Returns:
+            Pares (nombre, peso) con pesos que suman 1
+        """
+
+
+class MotorHeuristico(MotorAsignacion):
+    """Reparto original del sistema experto: factor 1.2 por perfil y multiplicadores de mercado"""
+
+    def pesos(self, base, perfil, validos, ids_condiciones) -> Pesos:
+        scores = []
+        filas = [base.filas_factores[j] for j in ids_condiciones]
+        requisitos = base.requisitos
+
+        for i in validos:
+            # Ajustar por perfil: 1.2 es el factor determinado por el experto para el perfil que más se ajusta al inversor
+            score = 1.2 if requisitos[i][1] == perfil.value else 1.0
+
+            # Ajustar por condiciones de mercado
+            for fila in filas:
+                score *= fila[i]
+
+            scores.append((base.nombres[i], score))
+
+        # Normalizar para obtener porcentajes
+        total = suma_secuencial(score for _, score in scores)
+        return tuple((nombre, score / total) for nombre, score in scores)
+
+
+class MotorMediaVarianza(MotorAsignacion):
+    """
+    Optimización media-varianza con cartera larga y pesos acotados
+
+    Maximiza  w·μ - (aversion/2)·wᵀΣw  sujeto a  Σw = 1  y  0 ≤ w ≤ peso_maximo, donde μ es
+    el `rendimiento_esperado` ajustado por los multiplicadores de las condiciones de mercado
+    activas y Σ = (1-ρ)·diag(σ²) + ρ·σσᵀ es un modelo de correlación constante ρ con σ = `riesgo`.
+    Con `riesgo_objetivo` se busca la aversión cuya cartera tiene esa volatilidad.
+
+    Gracias a la estructura de Σ, las condiciones de optimalidad dan cada peso en forma
+    cerrada a partir de dos escalares: el multiplicador ν de la restricción presupuestaria
+    y la exposición común S = σ·w: ν se obtiene exacto en O(n log n) y S por regula falsi.
+    """
+
+    AVERSION_POR_PERFIL = {1: 10.0, 2: 5.0, 3: 2.0}
+
+    def __init__(self,
+                 aversion: Optional[Dict[int, float]] = None,
+                 correlacion: float = 0.3,
+                 riesgo_objetivo: Optional[float] = None,
+                 peso_maximo: float = 1.0,
+                 tolerancia: float = 1e-12):
+        """
+        Args:
+            aversion: Aversión al riesgo por valor de PerfilRiesgo (por defecto AVERSION_POR_PERFIL)
+            correlacion: Correlación constante entre instrumentos (0 ≤ ρ < 1)
+            riesgo_objetivo: Volatilidad anual buscada para la cartera (None para usar la aversión)
+            peso_maximo: Peso máximo por instrumento
+            tolerancia: Precisión de las búsquedas de raíces
+        """
+        if not 0.0 <= correlacion < 1.0:
+            raise ValueError("La correlación debe estar en [0, 1)")
+        if not 0.0 < peso_maximo <= 1.0:
+            raise ValueError("El peso máximo debe estar en (0, 1]")
+        self.aversion = dict(self.AVERSION_POR_PERFIL if aversion is None else aversion)
+        self.correlacion = correlacion
+        self.riesgo_objetivo = riesgo_objetivo
+        self.peso_maximo = peso_maximo
+        self.tolerancia = tolerancia
+
+    def rendimientos(self, base: BaseConocimiento, validos: np.ndarray, ids_condiciones: Tuple[int, ...]) -> np.ndarray:
+        """Rendimiento esperado de cada instrumento ajustado por las condiciones de mercado"""
+        mu = base.rendimiento_esperado[validos].copy()
+        for j in ids_condiciones:
+            mu *= base.factores[j, validos]
+        return mu
+
+    def volatilidades(self, base: BaseConocimiento, validos: np.ndarray) -> np.ndarray:
+        """Volatilidad de cada instrumento (su riesgo, acotado lejos de cero)"""
+        return np.maximum(base.riesgo[validos], 1e-6)
+
+    def covarianza(self, base: BaseConocimiento, validos: np.ndarray) -> np.ndarray:
+        """Matriz de covarianza completa del modelo (solo para análisis; el optimizador no la forma)"""
+        sigma = self.volatilidades(base, validos)
+        covarianza = self.correlacion * np.outer(sigma, sigma)
+        np.fill_diagonal(covarianza, sigma ** 2)
+        return covarianza
+
+    def _raiz(self, funcion, inferior: float, superior: float) -> float:
+        """
+        Raíz de una función decreciente con funcion(inferior) ≥ 0 ≥ funcion(superior)
+
+        Usa regula falsi con la modificación de Illinois: las funciones de este problema
+        son lineales a tramos, así que converge en pocas evaluaciones.
+        """
+        f_inferior, f_superior = funcion(inferior), funcion(superior)
+        if f_inferior <= 0:
+            return inferior
+        if f_superior >= 0:
+            return superior
+        lado = 0
+        escala = max(1.0, abs(inferior), abs(superior))
+        for _ in range(200):
+            punto = superior - f_superior * (superior - inferior) / (f_superior - f_inferior)
+            valor = funcion(punto)
+            if abs(valor) <= self.tolerancia or superior - inferior <= self.tolerancia * escala:
+                return punto
+            if valor > 0:
+                inferior, f_inferior = punto, valor
+                if lado == 1:
+                    f_superior /= 2
+                lado = 1
+            else:
+                superior, f_superior = punto, valor
+                if lado == -1:
+                    f_inferior /= 2
+                lado = -1
+        return punto
+
+    @staticmethod
+    def _multiplicador_presupuesto(desplazado: np.ndarray, curvatura: np.ndarray, cota: float) -> float:
+        """
+        Valor exacto de ν tal que Σ clip((desplazado_i - ν)/curvatura_i, 0, cota) = 1
+
+        La suma es lineal a tramos y decreciente en ν, con quiebres en desplazado_i y
+        desplazado_i - cota·curvatura_i; se evalúa en todos los quiebres con sumas
+        acumuladas y se interpola en el tramo donde cruza 1.
+        """
+        inversa = 1.0 / curvatura
+        inferiores = desplazado - cota * curvatura
+
+        def sumas_relu(x):
+            # Permite evaluar Σ_i max(x_i - ν, 0)/curvatura_i para muchos ν a la vez
+            orden = np.argsort(-x)
+            acumulado_x = np.concatenate(([0.0], np.cumsum(x[orden] * inversa[orden])))
+            acumulado_inv = np.concatenate(([0.0], np.cumsum(inversa[orden])))
+            negativos = -x[orden]
+            return lambda nu: (lambda m: acumulado_x[m] - nu * acumulado_inv[m])(
+                np.searchsorted(negativos, -nu, side='left'))
+
+        relu_superior, relu_inferior = sumas_relu(desplazado), sumas_relu(inferiores)
+        quiebres = np.sort(np.concatenate((inferiores, desplazado)))
+        sumas = relu_superior(quiebres) - relu_inferior(quiebres)
+        j = int(np.searchsorted(-sumas, -1.0, side='right')) - 1  # último quiebre con suma ≥ 1
+        if j >= len(quiebres) - 1:
+            return float(quiebres[-1])
+        f_j, f_k = sumas[j], sumas[j + 1]
+        if f_j == f_k:
+            return float(quiebres[j])
+        return float(quiebres[j] + (f_j - 1.0) * (quiebres[j + 1] - quiebres[j]) / (f_j - f_k))
+
+    def optimizar(self, mu: np.ndarray, sigma: np.ndarray, aversion: float) -> np.ndarray:
+        """Pesos óptimos para una aversión dada"""
+        rho, cota = self.correlacion, self.peso_maximo
+        if cota * len(mu) < 1.0:
+            raise ValueError("El peso máximo no permite invertir todo el monto entre los instrumentos válidos")
+        curvatura = aversion * (1 - rho) * sigma ** 2
+
+        def pesos_con_presupuesto(exposicion: float) -> np.ndarray:
+            # Condición de primer orden: μ_i - γ[(1-ρ)σ_i² w_i + ρσ_i S] - ν = 0, recortada a [0, cota]
+            desplazado = mu - aversion * rho * sigma * exposicion
+            nu = self._multiplicador_presupuesto(desplazado, curvatura, cota)
+            return np.clip((desplazado - nu) / curvatura, 0.0, cota)
+
+        if rho == 0.0:
+            return pesos_con_presupuesto(0.0)
+        # σ·w(S) decrece con S, así que σ·w(S) - S tiene una única raíz en [0, max σ]
+        exposicion = self._raiz(lambda s: float(sigma @ pesos_con_presupuesto(s)) - s, 0.0, float(sigma.max()))
+        return pesos_con_presupuesto(exposicion)
+
+    def volatilidad_cartera(self, w: np.ndarray, sigma: np.ndarray) -> float:
+        """Volatilidad de la cartera, sqrt(wᵀΣw), sin formar Σ"""
+        rho = self.correlacion
+        return float(np.sqrt((1 - rho) * np.dot(w * sigma, w * sigma) + rho * np.dot(sigma, w) ** 2))
+
+    def _con_riesgo_objetivo(self, mu: np.ndarray, sigma: np.ndarray) -> np.ndarray:
+        """Busca en log(aversión) la cartera cuya volatilidad iguala el objetivo"""
+        def exceso(log_aversion: float) -> float:
+            return self.volatilidad_cartera(self.optimizar(mu, sigma, np.exp(log_aversion)), sigma) - self.riesgo_objetivo
+
+        # La volatilidad decrece con la aversión; fuera de rango se queda en el extremo alcanzable
+        return self.optimizar(mu, sigma, np.exp(self._raiz(exceso, np.log(1e-3), np.log(1e5))))
+
+    def pesos(self, base, perfil, validos, ids_condiciones) -> Pesos:
+        if not len(validos):
+            return ()
+        validos = np.asarray(validos, dtype=np.int64)
+        mu = self.rendimientos(base, validos, ids_condiciones)
+        sigma = self.volatilidades(base, validos)
+        if self.riesgo_objetivo is None:
+            w = self.optimizar(mu, sigma, self.aversion[perfil.value])
+        else:
+            w = self._con_riesgo_objetivo(mu, sigma)
+        w /= w.sum()
+        # Los instrumentos que el optimizador deja a cero no se recomiendan
+        return tuple((base.nombres[i], peso) for i, peso in zip(validos.tolist(), w.tolist()) if peso > 0)
@@ -0,0 +1,99 @@
+import multiprocessing as mp
+import os
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+# Estado de la ejecución en curso. Con 'fork' los procesos hijos lo heredan de la
+# memoria del padre (copia en escritura), así que ni la base de conocimientos ni las
+# entradas se serializan por tarea; con 'spawn' se envía una sola vez por proceso.
+_ESTADO = {}
+
+
+def _inicializar(estado: dict):
+    _ESTADO.update(estado)
+
+
+def _procesar_bloque(rango):
+    """Calcula las filas [inicio, fin) y las escribe en la matriz de salida compartida"""
+    inicio, fin = rango
+    sistema = _ESTADO['sistema']
+    salida = np.frombuffer(_ESTADO['salida'], dtype=np.float64).reshape(len(_ESTADO['perfiles']), -1)
+    salida[inicio:fin] = sistema.recomendar_inversiones_lote(
+        _ESTADO['perfiles'][inicio:fin],
+        _ESTADO['montos'][inicio:fin],
+        _ESTADO['plazos'][inicio:fin],
+        _ESTADO['condiciones_mercado'][inicio:fin],
+    )
+    return fin - inicio
+
+
+def recomendar_inversiones_paralelo(sistema: SistemaInversion,
+                                    perfiles: Union[Sequence[PerfilRiesgo], np.ndarray],
+                                    montos: Union[Sequence[float], np.ndarray],
+                                    plazos: Union[Sequence[int], np.ndarray],
+                                    condiciones_mercado: np.ndarray,
+                                    trabajadores: Optional[int] = None,
+                                    tam_bloque: int = 100_000) -> np.ndarray:
+    """
+    Versión multiproceso de SistemaInversion.recomendar_inversiones_lote
+
+    La entrada se reparte en bloques de `tam_bloque` inversores entre un pool de
+    procesos. Cada proceso escribe sus filas directamente en una matriz compartida,
+    así que el resultado conserva el orden original sin tener que reordenarlo.
+
+    Args:
+        sistema: Sistema experto con la base de conocimientos (solo lectura)
+        perfiles, montos, plazos, condiciones_mercado: Igual que en recomendar_inversiones_lote
+        trabajadores: Número de procesos (por defecto, uno por CPU)
+        tam_bloque: Inversores por tarea
+
+    Returns:
+        Matriz inversor×instrumento idéntica a la de recomendar_inversiones_lote
+    """
+    if tam_bloque < 1:
+        raise ValueError("El tamaño de bloque debe ser al menos 1")
+    trabajadores = trabajadores or os.cpu_count() or 1
+    if not isinstance(perfiles, np.ndarray):
+        perfiles = [p.value if isinstance(p, PerfilRiesgo) else p for p in perfiles]
+    perfiles = np.asarray(perfiles, dtype=np.int64)
+    montos = np.asarray(montos, dtype=np.float64)
+    plazos = np.asarray(plazos, dtype=np.int64)
+    condiciones_mercado = np.asarray(condiciones_mercado, dtype=bool)
+
+    n = len(perfiles)
+    if trabajadores == 1 or n <= tam_bloque:
+        return sistema.recomendar_inversiones_lote(perfiles, montos, plazos, condiciones_mercado)
+
+    # Compilar la base antes de crear los procesos para que la hereden ya compilada
+    instrumentos = len(sistema.base)
+    if instrumentos == 0:
+        # Sin catálogo no hay nada que repartir (y las filas no podrían redimensionarse)
+        return np.zeros((n, 0))
+    contexto = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else 'spawn')
+    salida = contexto.RawArray('d', n * instrumentos)
+    estado = {
+        'sistema': sistema,
+        'perfiles': perfiles,
+        'montos': montos,
+        'plazos': plazos,
+        'condiciones_mercado': condiciones_mercado,
+        'salida': salida,
+    }
+    bloques = [(inicio, min(inicio + tam_bloque, n)) for inicio in range(0, n, tam_bloque)]
+
+    if contexto.get_start_method() == 'fork':
+        _ESTADO.update(estado)
+        argumentos = {}
+    else:
+        argumentos = {'initializer': _inicializar, 'initargs': (estado,)}
+    try:
+        with contexto.Pool(min(trabajadores, len(bloques)), **argumentos) as pool:
+            for _ in pool.imap_unordered(_procesar_bloque, bloques):
+                pass
+    finally:
+        _ESTADO.clear()
+
+    return np.frombuffer(salida, dtype=np.float64).reshape(n, instrumentos)
@@ -0,0 +1,248 @@
+"""
+Contenedor columnar de recomendaciones en bloque
+
+En lugar de un Dict[str, float] por cliente, ResultadosLote guarda los montos en una
+matriz cliente×instrumento con una sola cabecera de nombres compartida. Cada cliente
+se consulta como un Mapping de solo lectura sobre su fila (sin copiarla), con la misma
+interfaz que el diccionario de recomendar_inversiones, y el lote completo se exporta
+a .npy, CSV o Parquet sin pasar por diccionarios.
+
+El formato .npy es un directorio con un archivo por columna, como base_en_disco, y
+se puede volver a abrir mapeado en memoria.
+"""
+import csv
+import json
+import os
+from collections.abc import Mapping
+from functools import cached_property
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+FORMATO = 1
+FILAS_POR_BLOQUE = 10_000  # filas por escritura al exportar a CSV
+
+
+class AsignacionCliente(Mapping):
+    """
+    Recomendación de un cliente como vista de solo lectura sobre su fila del lote
+
+    Igual que el diccionario de recomendar_inversiones, contiene los instrumentos
+    válidos para el cliente (plazo y perfil), aunque reciban un monto de 0.0.
+    """
+
+    __slots__ = ('_lote', '_fila')
+
+    def __init__(self, lote: 'ResultadosLote', fila: int):
+        self._lote = lote
+        self._fila = fila
+
+    @property
+    def montos(self) -> np.ndarray:
+        """Fila completa de montos (vista, no copia), con las columnas de `lote.nombres`"""
+        return self._lote.montos[self._fila]
+
+    @property
+    def id(self) -> str:
+        return self._lote.id_cliente(self._fila)
+
+    @property
+    def perfil(self) -> Optional[PerfilRiesgo]:
+        perfiles = self._lote.perfiles
+        return None if perfiles is None else PerfilRiesgo(int(perfiles[self._fila]))
+
+    @property
+    def validos(self) -> np.ndarray:
+        """Máscara de los instrumentos que forman parte de la recomendación"""
+        return self._lote.validos_fila(self._fila)
+
+    def __getitem__(self, nombre: str) -> float:
+        columna = self._lote.columnas[nombre]
+        if not self.validos[columna]:
+            raise KeyError(nombre)
+        return float(self.montos[columna])
+
+    def __iter__(self) -> Iterator[str]:
+        nombres = self._lote.nombres
+        return (nombres[j] for j in np.flatnonzero(self.validos).tolist())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.validos))
+
+    def __repr__(self) -> str:
+        return f"AsignacionCliente({self.id!r}, {dict(self)!r})"
+
+
+class ResultadosLote(Sequence):
+    """
+    Montos recomendados de muchos clientes en una matriz cliente×instrumento
+
+    `resultados[i]` devuelve la AsignacionCliente del cliente i y `resultados[a:b]`
+    un ResultadosLote que comparte la memoria del original.
+    """
+
+    def __init__(self,
+                 nombres: Sequence[str],
+                 montos: np.ndarray,
+                 ids: Optional[Sequence[str]] = None,
+                 perfiles: Optional[np.ndarray] = None,
+                 validos: Optional[np.ndarray] = None):
+        """
+        Args:
+            nombres: Nombre de cada columna de instrumento
+            montos: Matriz cliente×instrumento (se usa sin copiar si ya es float64)
+            ids: Identificador de cada cliente (por defecto su posición)
+            perfiles: Valor de PerfilRiesgo de cada cliente (opcional)
+            validos: Máscara cliente×instrumento de SistemaInversion.validos_lote; sin
+                ella se consideran recomendados los instrumentos con monto distinto de cero
+        """
+        self.nombres = tuple(nombres)
+        self.montos = np.asarray(montos, dtype=np.float64)
+        if self.montos.ndim != 2 or self.montos.shape[1] != len(self.nombres):
+            raise ValueError(f"La matriz de montos debe tener {len(self.nombres)} columnas")
+        self._ids = None if ids is None else np.asarray(ids, dtype=str)
+        self.perfiles = None if perfiles is None else np.asarray(perfiles, dtype=np.int8)
+        self.validos = None if validos is None else np.asarray(validos, dtype=bool)
+        if self.validos is not None and self.validos.shape != self.montos.shape:
+            raise ValueError("La máscara de válidos debe tener la forma de la matriz de montos")
+        for nombre, columna in (('ids', self._ids), ('perfiles', self.perfiles)):
+            if columna is not None and len(columna) != len(self.montos):
+                raise ValueError(f"{nombre} debe tener un elemento por cliente")
+
+    @classmethod
+    def calcular(cls,
+                 sistema: SistemaInversion,
+                 perfiles: Union[Sequence[PerfilRiesgo], np.ndarray],
+                 montos: Union[Sequence[float], np.ndarray],
+                 plazos: Union[Sequence[int], np.ndarray],
+                 condiciones_mercado: np.ndarray,
+                 ids: Optional[Sequence[str]] = None) -> 'ResultadosLote':
+        """Ejecuta recomendar_inversiones_lote y envuelve el resultado sin copiarlo"""
+        valores = np.asarray([p.value if isinstance(p, PerfilRiesgo) else p for p in perfiles]
+                             if not isinstance(perfiles, np.ndarray) else perfiles)
+        distribucion = sistema.recomendar_inversiones_lote(valores, montos, plazos, condiciones_mercado)
+        return cls(sistema.base.nombres, distribucion, ids, valores, sistema.validos_lote(valores, plazos))
+
+    @cached_property
+    def columnas(self) -> Dict[str, int]:
+        """Columna de cada instrumento; se comparte entre todas las vistas de cliente"""
+        return {nombre: j for j, nombre in enumerate(self.nombres)}
+
+    @property
+    def ids(self) -> Sequence[str]:
+        if self._ids is None:
+            return [str(i) for i in range(len(self.montos))]
+        return self._ids.tolist()
+
+    def validos_fila(self, fila: int) -> np.ndarray:
+        """Instrumentos recomendados al cliente `fila` (los válidos, aunque su monto sea 0.0)"""
+        return self.montos[fila] != 0 if self.validos is None else self.validos[fila]
+
+    def id_cliente(self, fila: int) -> str:
+        return str(fila) if self._ids is None else str(self._ids[fila])
+
+    def __len__(self) -> int:
+        return len(self.montos)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            # Sin ids explícitos solo se generan los del tramo, no los de todo el lote
+            ids = np.arange(*indice.indices(len(self))).astype(str) if self._ids is None else self._ids[indice]
+            return ResultadosLote(self.nombres, self.montos[indice], ids,
+                                  None if self.perfiles is None else self.perfiles[indice],
+                                  None if self.validos is None else self.validos[indice])
+        if not -len(self) <= indice < len(self):
+            raise IndexError(indice)
+        return AsignacionCliente(self, indice % len(self))
+
+    def columna(self, nombre: str) -> np.ndarray:
+        """Montos de un instrumento para todos los clientes (vista)"""
+        return self.montos[:, self.columnas[nombre]]
+
+    def a_dicts(self) -> List[Dict[str, float]]:
+        """Lista de diccionarios como los de recomendar_inversiones, para código que aún los espera"""
+        nombres = self.nombres
+        dicts = []
+        for k, fila in enumerate(self.montos):
+            columnas = np.flatnonzero(self.validos_fila(k))
+            dicts.append(dict(zip([nombres[j] for j in columnas.tolist()], fila[columnas].tolist())))
+        return dicts
+
+    @property
+    def bytes_por_cliente(self) -> float:
+        mascara = 0 if self.validos is None else self.validos.itemsize
+        return (self.montos.itemsize + mascara) * self.montos.shape[1]
+
+    def guardar_npy(self, ruta: str):
+        """Escribe el lote en el directorio `ruta`: un .npy por columna y un JSON de metadatos"""
+        os.makedirs(ruta, exist_ok=True)
+        np.save(os.path.join(ruta, 'montos.npy'), self.montos)
+        np.save(os.path.join(ruta, 'nombres.npy'), np.array(self.nombres, dtype=str))
+        if self._ids is not None:
+            np.save(os.path.join(ruta, 'ids.npy'), self._ids)
+        if self.perfiles is not None:
+            np.save(os.path.join(ruta, 'perfiles.npy'), self.perfiles)
+        if self.validos is not None:
+            np.save(os.path.join(ruta, 'validos.npy'), self.validos)
+        with open(os.path.join(ruta, 'resultados.json'), 'w', encoding='utf-8') as archivo:
+            json.dump({'formato': FORMATO, 'clientes': len(self), 'instrumentos': len(self.nombres)}, archivo)
+
+    @classmethod
+    def cargar_npy(cls, ruta: str, mmap: bool = True) -> 'ResultadosLote':
+        """
+        Carga un lote escrito por guardar_npy
+
+        Args:
+            ruta: Directorio del lote
+            mmap: Si es True, la matriz de montos se mapea en memoria en lugar de leerse
+        """
+        with open(os.path.join(ruta, 'resultados.json'), encoding='utf-8') as archivo:
+            metadatos = json.load(archivo)
+        if metadatos.get('formato') != FORMATO:
+            raise ValueError(f"Formato de resultados no soportado en {ruta}: {metadatos.get('formato')}")
+
+        def opcional(nombre):
+            camino = os.path.join(ruta, f'{nombre}.npy')
+            return np.load(camino) if os.path.exists(camino) else None
+
+        return cls(np.load(os.path.join(ruta, 'nombres.npy')).tolist(),
+                   np.load(os.path.join(ruta, 'montos.npy'), mmap_mode='r' if mmap else None),
+                   opcional('ids'), opcional('perfiles'), opcional('validos'))
+
+    def _nombres_perfil(self) -> Optional[List[str]]:
+        if self.perfiles is None:
+            return None
+        nombres = {perfil.value: perfil.name for perfil in PerfilRiesgo}
+        return [nombres[p] for p in self.perfiles.tolist()]
+
+    def guardar_csv(self, ruta: str):
+        """Escribe una fila por cliente y una columna por instrumento, como EscritorRecomendaciones"""
+        ids, perfiles = self.ids, self._nombres_perfil()
+        with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(['id'] + (['perfil'] if perfiles is not None else []) + list(self.nombres))
+            for desde in range(0, len(self), FILAS_POR_BLOQUE):
+                hasta = desde + FILAS_POR_BLOQUE
+                claves = ([[i, p] for i, p in zip(ids[desde:hasta], perfiles[desde:hasta])] if perfiles is not None
+                          else [[i] for i in ids[desde:hasta]])
+                escritor.writerows(clave + fila for clave, fila in zip(claves, self.montos[desde:hasta].tolist()))
+
+    def guardar_parquet(self, ruta: str):
+        """
+        Escribe el lote en Parquet con el mismo esquema que guardar_csv
+
+        Requiere pyarrow, que no es una dependencia del proyecto.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("guardar_parquet requiere pyarrow (pip install pyarrow)") from error
+        perfiles = self._nombres_perfil()
+        columnas = {'id': pa.array(self.ids, type=pa.string())}
+        if perfiles is not None:
+            columnas['perfil'] = pa.array(perfiles, type=pa.string())
+        columnas.update((nombre, pa.array(self.montos[:, j])) for j, nombre in enumerate(self.nombres))
+        pq.write_table(pa.table(columnas), ruta)
@@ -0,0 +1,140 @@
+"""
+Barrido de sensibilidad: recomendaciones para todas las combinaciones de condiciones y plazos
+
+Un escenario es un subconjunto de condiciones de mercado más un plazo. En lugar de
+llamar a recomendar_inversiones 2^k × plazos veces por cliente, los scores de los 2^k
+subconjuntos se obtienen por programación dinámica: el score de un subconjunto es el
+del subconjunto sin su condición de mayor índice por el multiplicador de esa
+condición, así que cada subconjunto cuesta un solo producto por instrumento y se
+conserva el orden de multiplicación de la ruta escalar. Como los pesos solo dependen
+del perfil, los escenarios se calculan por perfil y los montos de cada cliente se
+obtienen al final con una multiplicación.
+
+Usa el reparto del MotorHeuristico (el de recomendar_inversiones_lote).
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from sistema_inversion import PerfilRiesgo, SistemaInversion, sumar_en_orden
+
+
+@dataclass
+class ResultadoBarrido:
+    """
+    Pesos por perfil y escenario, y la correspondencia con los clientes
+
+    Los escenarios se numeran como subconjunto × len(plazos) + posición del plazo; el
+    subconjunto s contiene la condición j si el bit j de s vale 1.
+    """
+    nombres: Tuple[str, ...]
+    condiciones: Tuple[str, ...]
+    plazos: np.ndarray
+    perfiles: np.ndarray            # valores de PerfilRiesgo presentes
+    pesos: np.ndarray               # perfiles×subconjuntos×plazos×instrumentos
+    perfil_cliente: np.ndarray      # posición en `perfiles` de cada cliente
+    montos: np.ndarray
+
+    @property
+    def n_escenarios(self) -> int:
+        return self.pesos.shape[1] * self.pesos.shape[2]
+
+    def escenario(self, indice: int) -> Tuple[List[str], int]:
+        """Condiciones activas y plazo del escenario `indice`"""
+        subconjunto, posicion = divmod(indice, len(self.plazos))
+        return [c for j, c in enumerate(self.condiciones) if subconjunto >> j & 1], int(self.plazos[posicion])
+
+    def indice_escenario(self, condiciones: Sequence[str], plazo: int) -> int:
+        subconjunto = sum(1 << self.condiciones.index(c) for c in set(condiciones))
+        return subconjunto * len(self.plazos) + int(np.flatnonzero(self.plazos == plazo)[0])
+
+    def tensor(self, clientes: Optional[Union[slice, np.ndarray]] = None, dtype=np.float64) -> np.ndarray:
+        """
+        Montos recomendados clientes×escenarios×instrumentos
+
+        Ocupa clientes × 2^k × plazos × instrumentos valores: para poblaciones grandes
+        conviene pedirlo por tramos de clientes o usar `estadisticas`.
+        """
+        seleccion = slice(None) if clientes is None else clientes
+        por_perfil = self.pesos.reshape(len(self.perfiles), self.n_escenarios, len(self.nombres))
+        return (self.montos[seleccion, None, None] * por_perfil[self.perfil_cliente[seleccion]]).astype(dtype, copy=False)
+
+    def estadisticas(self, sistema: SistemaInversion) -> Dict[str, np.ndarray]:
+        """
+        Resumen compacto sin materializar el tensor de clientes
+
+        Returns:
+            Dict con, por cliente: 'monto_minimo', 'monto_maximo' y 'monto_medio' de cada
+            instrumento sobre los escenarios (clientes×instrumentos), y 'rendimiento' y
+            'riesgo' ponderados de la cartera en cada escenario (clientes×escenarios)
+        """
+        base = sistema.base
+        por_perfil = self.pesos.reshape(len(self.perfiles), self.n_escenarios, len(self.nombres))
+        montos = self.montos[:, None]
+        fila = self.perfil_cliente
+        return {
+            'monto_minimo': montos * por_perfil.min(axis=1)[fila],
+            'monto_maximo': montos * por_perfil.max(axis=1)[fila],
+            'monto_medio': montos * por_perfil.mean(axis=1)[fila],
+            'rendimiento': (por_perfil @ base.rendimiento_esperado)[fila],
+            'riesgo': (por_perfil @ base.riesgo)[fila],
+        }
+
+
+def barrido_sensibilidad(sistema: SistemaInversion,
+                         perfiles: Union[Sequence[PerfilRiesgo], np.ndarray],
+                         montos: Union[Sequence[float], np.ndarray],
+                         plazos: Sequence[int] = range(1, 31),
+                         condiciones: Optional[Sequence[str]] = None) -> ResultadoBarrido:
+    """
+    Calcula las recomendaciones de cada cliente en todos los escenarios
+
+    Args:
+        sistema: Sistema experto con la base de conocimientos
+        perfiles: Perfil de riesgo de cada cliente (PerfilRiesgo o su valor entero)
+        montos: Monto de cada cliente
+        plazos: Plazos a recorrer (por defecto de 1 a 30 años)
+        condiciones: Condiciones a combinar (por defecto todas las de reglas_mercado)
+
+    Returns:
+        ResultadoBarrido con los pesos por perfil y escenario
+    """
+    base = sistema.base
+    condiciones = tuple(base.condiciones if condiciones is None else condiciones)
+    ids_condiciones = [base.indice_condiciones[c] for c in condiciones]
+    if len(condiciones) > 20:
+        raise ValueError("Demasiadas condiciones para enumerar todos sus subconjuntos")
+    if not isinstance(perfiles, np.ndarray):
+        perfiles = [p.value if isinstance(p, PerfilRiesgo) else p for p in perfiles]
+    valores_perfil, perfil_cliente = np.unique(np.asarray(perfiles, dtype=np.int64), return_inverse=True)
+    plazos = np.asarray(list(plazos), dtype=np.int64)
+    n, n_subconjuntos = len(base), 1 << len(condiciones)
+    perfil_recomendado = base.perfil_recomendado.astype(np.int64)
+
+    # Scores de todos los subconjuntos: scores[s] = scores[s sin su bit más alto] * factor de ese bit
+    scores = np.empty((len(valores_perfil), n_subconjuntos, n))
+    scores[:, 0] = np.where(perfil_recomendado[None, :] == valores_perfil[:, None], 1.2, 1.0)
+    for j, id_condicion in enumerate(ids_condiciones):
+        inicio = 1 << j
+        scores[:, inicio:2 * inicio] = scores[:, :inicio] * base.factores[id_condicion]
+
+    # Los plazos con los mismos instrumentos válidos (mismo tramo) comparten pesos
+    _, primero, tramo_plazo = np.unique(np.searchsorted(base.plazos_distintos, plazos, side='right'),
+                                        return_index=True, return_inverse=True)
+    plazo_tramo = plazos[primero]
+    validos = ((base.plazo_minimo[None, None, :] <= plazo_tramo[None, :, None]) &
+               (perfil_recomendado[None, None, :] <= valores_perfil[:, None, None] + 1))  # perfiles×tramos×n
+    pesos = np.where(validos[:, None, :, :], scores[:, :, None, :], 0.0)        # perfiles×subconjuntos×tramos×n
+    total = sumar_en_orden(pesos)  # mismo orden de suma que la ruta escalar
+    np.divide(pesos, total, out=pesos, where=total != 0)
+
+    return ResultadoBarrido(
+        nombres=base.nombres,
+        condiciones=condiciones,
+        plazos=plazos,
+        perfiles=valores_perfil,
+        pesos=pesos[:, :, tramo_plazo.reshape(-1)],
+        perfil_cliente=perfil_cliente.reshape(-1),
+        montos=np.asarray(montos, dtype=np.float64),
+    )
@@ -0,0 +1,279 @@
+"""
+Servicio HTTP de recomendaciones con agrupación de solicitudes en microlotes
+
+Expone evaluar_perfil → recomendar_inversiones → explicar_recomendacion a otros
+sistemas usando solo asyncio. Las solicitudes concurrentes se acumulan hasta
+`max_lote` o hasta que pasan `max_espera` segundos desde la primera, y se puntúan
+juntas con recomendar_inversiones_lote.
+
+Rutas:
+    POST /recomendar     {"id": ..., "respuestas": {...}, "monto": ..., "plazo": ...,
+                          "condiciones": [...], "explicar": true}
+                         → {"id": ..., "perfil": ..., "recomendaciones": {...}, "explicacion": ...}
+    GET  /salud          → {"estado": "ok"}
+    GET  /estadisticas   → solicitudes, lotes y tamaño medio de lote
+
+Uso: python servicio.py [--host 127.0.0.1] [--puerto 8080] [--max-lote 64] [--max-espera-ms 2]
+"""
+import argparse
+import asyncio
+import json
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sistema_inversion import SistemaInversion
+
+# (id, respuestas, monto, plazo, condiciones, explicar)
+Solicitud = Tuple[Optional[str], Dict[str, int], float, int, List[str], bool]
+
+ESTADOS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+TAMANO_MAXIMO_CUERPO = 1 << 20
+
+
+class ErrorSolicitud(ValueError):
+    """Solicitud mal formada; se responde con un 400"""
+
+
+def leer_solicitud(registro) -> Solicitud:
+    """Valida el JSON de una solicitud de /recomendar"""
+    if not isinstance(registro, dict):
+        raise ErrorSolicitud("Se esperaba un objeto JSON")
+    try:
+        respuestas = {str(clave): int(valor) for clave, valor in registro['respuestas'].items()}
+        monto = float(registro['monto'])
+        plazo = int(registro['plazo'])
+    except KeyError as error:
+        raise ErrorSolicitud(f"Falta el campo {error.args[0]}") from None
+    except (AttributeError, TypeError, ValueError):
+        raise ErrorSolicitud("respuestas, monto o plazo tienen un tipo no válido") from None
+    if not respuestas:
+        raise ErrorSolicitud("respuestas no puede estar vacío")
+    condiciones = registro.get('condiciones', [])
+    if not isinstance(condiciones, list) or not all(isinstance(c, str) for c in condiciones):
+        raise ErrorSolicitud("condiciones debe ser una lista de cadenas")
+    identificador = registro.get('id')
+    return (None if identificador is None else str(identificador), respuestas, monto, plazo,
+            condiciones, bool(registro.get('explicar', True)))
+
+
+@dataclass
+class EstadisticasServicio:
+    solicitudes: int = 0
+    lotes: int = 0
+    errores: int = 0
+
+    @property
+    def tamano_medio_lote(self) -> float:
+        return self.solicitudes / self.lotes if self.lotes else 0.0
+
+
+class AgrupadorSolicitudes:
+    """
+    Acumula solicitudes concurrentes y las puntúa juntas
+
+    El lote se procesa en cuanto reúne `max_lote` solicitudes o cuando vence el plazo
+    de `max_espera` segundos abierto por la primera solicitud pendiente. La puntuación
+    de un lote es una sola llamada vectorizada, así que se ejecuta en el propio bucle
+    de eventos.
+    """
+
+    def __init__(self, sistema: SistemaInversion, max_lote: int = 64, max_espera: float = 0.002):
+        if max_lote < 1:
+            raise ValueError("El tamaño máximo de lote debe ser al menos 1")
+        self.sistema = sistema
+        self.max_lote = max_lote
+        self.max_espera = max_espera
+        self.estadisticas = EstadisticasServicio()
+        self._pendientes: List[Tuple[Solicitud, asyncio.Future]] = []
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+
+    async def recomendar(self, solicitud: Solicitud) -> Dict:
+        """Encola una solicitud validada y espera la respuesta de su lote"""
+        bucle = asyncio.get_running_loop()
+        futuro = bucle.create_future()
+        self._pendientes.append((solicitud, futuro))
+        if len(self._pendientes) >= self.max_lote:
+            self._vaciar()
+        elif self._temporizador is None:
+            self._temporizador = bucle.call_later(self.max_espera, self._vaciar)
+        return await futuro
+
+    def _vaciar(self):
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        while self._pendientes:
+            lote, self._pendientes = self._pendientes[:self.max_lote], self._pendientes[self.max_lote:]
+            try:
+                respuestas = self.procesar_lote([solicitud for solicitud, _ in lote])
+            except Exception as error:
+                self.estadisticas.errores += len(lote)
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(error)
+                continue
+            for (_, futuro), respuesta in zip(lote, respuestas):
+                if not futuro.done():  # el cliente pudo desconectarse mientras esperaba
+                    futuro.set_result(respuesta)
+
+    def procesar_lote(self, lote: List[Solicitud]) -> List[Dict]:
+        """Evalúa perfiles, reparte los montos del lote en una pasada y construye las explicaciones"""
+        sistema = self.sistema
+        ids, respuestas, montos, plazos, condiciones, explicar = zip(*lote)
+        perfiles = [sistema.evaluar_perfil(r) for r in respuestas]
+        # Las condiciones repetidas o desordenadas se aplican en el orden recibido, como en el método escalar
+        distribucion = sistema.recomendar_inversiones_listas(perfiles, montos, plazos, condiciones)
+        validos = sistema.validos_lote(perfiles, plazos).tolist()
+        nombres = sistema.base.nombres
+        resultado = []
+        for k, fila in enumerate(distribucion.tolist()):
+            # Igual que recomendar_inversiones, se incluyen los instrumentos válidos aunque reciban 0.0
+            recomendaciones = {nombre: monto for nombre, monto, valido in zip(nombres, fila, validos[k]) if valido}
+            respuesta = {'id': ids[k], 'perfil': perfiles[k].name, 'recomendaciones': recomendaciones}
+            if explicar[k]:
+                respuesta['explicacion'] = sistema.explicar_recomendacion(recomendaciones, perfiles[k], condiciones[k])
+            resultado.append(respuesta)
+        self.estadisticas.solicitudes += len(lote)
+        self.estadisticas.lotes += 1
+        return resultado
+
+
+class ServicioRecomendaciones:
+    """Servidor HTTP/1.1 mínimo (con conexiones persistentes) sobre asyncio.start_server"""
+
+    def __init__(self,
+                 sistema: Optional[SistemaInversion] = None,
+                 host: str = '127.0.0.1',
+                 puerto: int = 8080,
+                 max_lote: int = 64,
+                 max_espera: float = 0.002):
+        self.sistema = sistema or SistemaInversion()
+        self.host = host
+        self.puerto = puerto
+        self.agrupador = AgrupadorSolicitudes(self.sistema, max_lote, max_espera)
+        self._servidor: Optional[asyncio.AbstractServer] = None
+
+    async def iniciar(self):
+        """Abre el socket; con puerto 0 se elige uno libre y queda en `self.puerto`"""
+        self._servidor = await asyncio.start_server(self.atender, self.host, self.puerto)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+
+    async def servir(self):
+        if self._servidor is None:
+            await self.iniciar()
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def cerrar(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+
+    async def atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        """Atiende las solicitudes de una conexión hasta que el cliente la cierra"""
+        try:
+            while True:
+                # readline convierte el LimitOverrunError de una línea demasiado larga en ValueError
+                try:
+                    linea = await lector.readline()
+                except ValueError:
+                    await self._responder(escritor, 400, {'error': 'Línea de solicitud demasiado larga'}, False)
+                    break
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, version = linea.decode('latin-1').split()
+                except ValueError:
+                    await self._responder(escritor, 400, {'error': 'Línea de solicitud no válida'}, False)
+                    break
+                try:
+                    cabeceras = await self._leer_cabeceras(lector)
+                except ValueError:
+                    await self._responder(escritor, 431, {'error': 'Cabecera demasiado larga'}, False)
+                    break
+                mantener = (cabeceras.get('connection', '').lower() != 'close' and version == 'HTTP/1.1')
+
+                try:
+                    longitud = int(cabeceras.get('content-length', 0) or 0)
+                except ValueError:
+                    await self._responder(escritor, 400, {'error': 'Content-Length no válido'}, False)
+                    break
+                if longitud > TAMANO_MAXIMO_CUERPO:
+                    await self._responder(escritor, 413, {'error': 'Cuerpo demasiado grande'}, False)
+                    break
+                cuerpo = await lector.readexactly(longitud) if longitud else b''
+                estado, respuesta = await self._despachar(metodo, ruta.split('?', 1)[0], cuerpo)
+                await self._responder(escritor, estado, respuesta, mantener)
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    @staticmethod
+    async def _leer_cabeceras(lector: asyncio.StreamReader) -> Dict[str, str]:
+        """Lee las cabeceras hasta la línea vacía; ValueError si alguna supera el límite del lector"""
+        cabeceras = {}
+        while True:
+            cabecera = await lector.readline()
+            if cabecera in (b'\r\n', b'\n', b''):
+                return cabeceras
+            nombre, _, valor = cabecera.decode('latin-1').partition(':')
+            cabeceras[nombre.strip().lower()] = valor.strip()
+
+    async def _despachar(self, metodo: str, ruta: str, cuerpo: bytes) -> Tuple[int, Dict]:
+        if ruta == '/recomendar':
+            if metodo != 'POST':
+                return 405, {'error': 'Use POST'}
+            try:
+                solicitud = leer_solicitud(json.loads(cuerpo))
+            except json.JSONDecodeError:
+                return 400, {'error': 'JSON no válido'}
+            except ErrorSolicitud as error:
+                return 400, {'error': str(error)}
+            try:
+                return 200, await self.agrupador.recomendar(solicitud)
+            except Exception as error:
+                return 500, {'error': str(error)}
+        if metodo != 'GET':
+            return 405, {'error': 'Use GET'}
+        if ruta == '/salud':
+            return 200, {'estado': 'ok'}
+        if ruta == '/estadisticas':
+            estadisticas = self.agrupador.estadisticas
+            return 200, dict(asdict(estadisticas), tamano_medio_lote=estadisticas.tamano_medio_lote)
+        return 404, {'error': f'Ruta desconocida: {ruta}'}
+
+    async def _responder(self, escritor: asyncio.StreamWriter, estado: int, contenido: Dict, mantener: bool):
+        cuerpo = json.dumps(contenido, ensure_ascii=False).encode('utf-8')
+        escritor.write(
+            f"HTTP/1.1 {estado} {ESTADOS_HTTP[estado]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode('latin-1') + cuerpo)
+        await escritor.drain()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Servicio HTTP de recomendaciones de inversión')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--max-lote', type=int, default=64, help='Solicitudes máximas por lote')
+    parser.add_argument('--max-espera-ms', type=float, default=2.0, help='Espera máxima para completar un lote')
+    args = parser.parse_args(argv)
+
+    servicio = ServicioRecomendaciones(host=args.host, puerto=args.puerto,
+                                       max_lote=args.max_lote, max_espera=args.max_espera_ms / 1000)
+    print(f"Sirviendo en http://{args.host}:{args.puerto} (lotes de hasta {args.max_lote}, "
+          f"espera máxima {args.max_espera_ms} ms)")
+    try:
+        asyncio.run(servicio.servir())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from sistema_inversion import SistemaInversion
+
+
+@dataclass
+class ResultadoSimulacion:
+    """Resumen de una simulación Monte Carlo de la cartera"""
+    monto_inicial: float
+    plazo: int
+    trayectorias: int
+    valor_esperado: float
+    probabilidad_perdida: float
+    percentiles: Dict[float, float]
+    valores_finales: np.ndarray = field(repr=False)
+
+    def resumen(self) -> str:
+        """Texto con los resultados principales, en el estilo de explicar_recomendacion"""
+        texto = f"Simulación de {self.trayectorias:,} trayectorias a {self.plazo} años:\n"
+        texto += f"- Monto inicial: ${self.monto_inicial:,.2f}\n"
+        texto += f"- Valor final esperado: ${self.valor_esperado:,.2f}\n"
+        texto += f"- Probabilidad de pérdida: {self.probabilidad_perdida*100:.1f}%\n"
+        for percentil, valor in self.percentiles.items():
+            texto += f"- Percentil {percentil:g}: ${valor:,.2f}\n"
+        return texto
+
+
+class SimuladorMonteCarlo:
+    """
+    Simula trayectorias de rendimiento de la cartera recomendada
+
+    Cada instrumento sigue un rendimiento anual lognormal cuya media es su
+    `rendimiento_esperado` y cuya volatilidad es su `riesgo`. Las trayectorias se
+    generan por bloques (trayectorias × años × instrumentos) para acotar la memoria.
+    """
+
+    def __init__(self,
+                 sistema: SistemaInversion,
+                 correlacion: float = 0.0,
+                 memoria_maxima: int = 64 * 2**20):
+        """
+        Args:
+            sistema: Sistema experto con la tabla de instrumentos
+            correlacion: Correlación común entre los rendimientos de los instrumentos (0 a 1)
+            memoria_maxima: Bytes aproximados que puede ocupar cada bloque de trayectorias
+        """
+        if not 0.0 <= correlacion <= 1.0:
+            raise ValueError("La correlación debe estar entre 0 y 1")
+        self.sistema = sistema
+        self.correlacion = correlacion
+        self.memoria_maxima = memoria_maxima
+
+    def parametros_lognormales(self, instrumentos: Sequence[str]):
+        """Media y desviación del logaritmo del crecimiento anual de cada instrumento"""
+        base = self.sistema.base
+        ids = [base.indice[nombre] for nombre in instrumentos]
+        media = 1 + base.rendimiento_esperado[ids]
+        volatilidad = base.riesgo[ids]
+        sigma = np.sqrt(np.log1p((volatilidad / media) ** 2))
+        mu = np.log(media) - sigma ** 2 / 2
+        return mu, sigma
+
+    def simular(self,
+                recomendaciones: Dict[str, float],
+                plazo: int,
+                trayectorias: int = 100_000,
+                semilla: Optional[int] = None,
+                percentiles: Sequence[float] = (5, 25, 50, 75, 95)) -> ResultadoSimulacion:
+        """
+        Simula el valor final de la cartera
+
+        Args:
+            recomendaciones: Distribución devuelta por recomendar_inversiones
+            plazo: Plazo de inversión en años
+            trayectorias: Número de trayectorias a simular
+            semilla: Semilla del generador; con la misma semilla el resultado es reproducible
+            percentiles: Percentiles del valor final a reportar
+
+        Returns:
+            ResultadoSimulacion con percentiles, probabilidad de pérdida y valor esperado
+        """
+        if plazo < 1:
+            raise ValueError("El plazo debe ser de al menos un año")
+        if trayectorias < 1:
+            raise ValueError("Se necesita al menos una trayectoria")
+
+        nombres = list(recomendaciones)
+        montos = np.array([recomendaciones[nombre] for nombre in nombres], dtype=np.float64)
+        mu, sigma = self.parametros_lognormales(nombres)
+        rng = np.random.default_rng(semilla)
+
+        # Tamaño de bloque: el arreglo de normales y sus temporales caben en memoria_maxima
+        bytes_por_trayectoria = 3 * plazo * (len(nombres) + 1) * 8
+        bloque = max(1, self.memoria_maxima // bytes_por_trayectoria)
+        valores_finales = np.empty(trayectorias, dtype=np.float64)
+
+        for inicio in range(0, trayectorias, bloque):
+            fin = min(inicio + bloque, trayectorias)
+            # Normales (trayectorias × años × instrumentos); la última columna es el factor común
+            z = rng.standard_normal((fin - inicio, plazo, len(nombres) + 1))
+            choques = z[:, :, :-1]
+            if self.correlacion:
+                choques *= np.sqrt(1 - self.correlacion)
+                choques += np.sqrt(self.correlacion) * z[:, :, -1:]
+            choques *= sigma
+            choques += mu
+            # Crecimiento acumulado de cada instrumento y valor final de la cartera
+            crecimiento = np.exp(choques.sum(axis=1))
+            valores_finales[inicio:fin] = crecimiento @ montos
+
+        monto_inicial = float(montos.sum())
+        return ResultadoSimulacion(
+            monto_inicial=monto_inicial,
+            plazo=plazo,
+            trayectorias=trayectorias,
+            valor_esperado=float(valores_finales.mean()),
+            probabilidad_perdida=float((valores_finales < monto_inicial).mean()),
+            percentiles=dict(zip(percentiles, np.percentile(valores_finales, percentiles).tolist())),
+            valores_finales=valores_finales,
+        )
@@ -1,14 +1,73 @@
-import networkx as nx
-from typing import Dict, List, Tuple
+import numpy as np
+from bisect import bisect_right
+from contextlib import contextmanager
+from itertools import count
+from time import perf_counter
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, TextIO, Tuple, Union
 from enum import Enum
 
+from base_conocimiento import BaseConocimiento, TablaObservable
+from cache_lru import CacheLRU
+from indice_instrumentos import IndiceInstrumentos
+from instrumentacion import ETAPAS_RECOMENDACION, Instrumentacion
+from motores_asignacion import MotorAsignacion, MotorHeuristico, suma_secuencial
+
+if TYPE_CHECKING:
+    from motor_reglas import MotorReglas
+
 class PerfilRiesgo(Enum):
     CONSERVADOR = 1
     MODERADO = 2
     AGRESIVO = 3
 
+def sumar_en_orden(scores: np.ndarray) -> np.ndarray:
+    """
+    Suma `scores` a lo largo de su último eje columna a columna, con keepdims
+    
+    ndarray.sum usa suma por pares y puede diferir en el último bit de la suma
+    secuencial del método escalar (suma_secuencial); acumulando en el mismo orden
+    el total es idéntico.
+    """
+    total = np.zeros(scores.shape[:-1] + (1,))
+    for j in range(scores.shape[-1]):
+        total[..., 0] += scores[..., j]
+    return total
+
 class SistemaInversion:
-    def __init__(self):
+    def __init__(self,
+                 capacidad_cache: int = 256,
+                 motor: Optional[MotorAsignacion] = None,
+                 base: Optional[BaseConocimiento] = None,
+                 instrumentacion: Optional[Instrumentacion] = None):
+        # Versión de la base de conocimientos: aumenta con cada modificación de las tablas
+        self.version = 0
+        # Versiones finas para la caché de pesos: una de la tabla de instrumentos y un
+        # sello único por condición (ver version_condicion)
+        self.version_instrumentos = 0
+        self._sellos_condiciones = None
+        self._contador_sellos = count(1)
+        self._aplicando_cambio = False
+        self._base = None
+        self._red_decision = None
+        self._indice = None
+        
+        # Caché de vectores de pesos normalizados por (perfil, tramo de plazo, condiciones)
+        self.cache_pesos = CacheLRU(capacidad_cache)
+        
+        # Motor de asignación por defecto (ver motores_asignacion)
+        self.motor = motor or MotorHeuristico()
+        
+        # Instrumentación opcional de las etapas; con None no se mide nada
+        self.instrumentacion = instrumentacion
+        
+        if base is not None:
+            # Base ya compilada (por ejemplo, mapeada desde disco): las tablas de
+            # diccionarios solo se materializan si alguien las consulta
+            self._base = base
+            self._instrumentos = None
+            self._reglas_mercado = None
+            return
+        
         # Base de conocimientos de instrumentos financieros
         self.instrumentos = {
             'bonos_gubernamentales': {
@@ -73,9 +132,310 @@ class SistemaInversion:
             }
         }
         
-        # Inicializar red de decisión
-        self.red_decision = nx.DiGraph()
-        self._construir_red()
+        # La red de decisión se construye de forma diferida (ver red_decision)
+
+    @property
+    def red_decision(self):
+        """
+        Red de decisión del sistema experto (networkx.DiGraph)
+        
+        Se construye la primera vez que se consulta, así networkx solo se importa
+        cuando realmente se usa la red y no en cada arranque del sistema.
+        """
+        if self._red_decision is None:
+            import networkx as nx
+            self._red_decision = nx.DiGraph()
+            self._construir_red()
+        return self._red_decision
+
+    @property
+    def instrumentos(self) -> Dict[str, Dict]:
+        """Vista de diccionario de los instrumentos financieros"""
+        if self._instrumentos is None:
+            self._materializar_tablas()
+        return self._instrumentos
+
+    @instrumentos.setter
+    def instrumentos(self, instrumentos: Dict[str, Dict]):
+        self._instrumentos = TablaObservable(instrumentos, self._al_modificar_instrumento)
+        self._indice = None
+        self._al_modificar_base(None)
+
+    @property
+    def reglas_mercado(self) -> Dict[str, Dict[str, float]]:
+        """Vista de diccionario de las reglas de mercado"""
+        if self._reglas_mercado is None:
+            self._materializar_tablas()
+        return self._reglas_mercado
+
+    def _materializar_tablas(self):
+        """Construye las tablas de diccionarios a partir de la base compilada, sin invalidarla"""
+        base = self._base
+        perfiles = {perfil.value: perfil for perfil in PerfilRiesgo}
+        instrumentos = {
+            nombre: {
+                'riesgo': riesgo,
+                'rendimiento_esperado': rendimiento,
+                'liquidez': liquidez,
+                'plazo_minimo': plazo_minimo,
+                'perfil_recomendado': perfiles[perfil],
+            }
+            for nombre, riesgo, rendimiento, liquidez, plazo_minimo, perfil in zip(
+                base.nombres, base.riesgo.tolist(), base.rendimiento_esperado.tolist(), base.liquidez.tolist(),
+                base.plazo_minimo.tolist(), base.perfil_recomendado.tolist())
+        }
+        reglas_mercado = {
+            condicion: dict(zip(base.nombres, ajustes))
+            for condicion, ajustes in zip(base.condiciones, base.ajustes.tolist())
+        }
+        self._instrumentos = TablaObservable(instrumentos, self._al_modificar_instrumento)
+        self._reglas_mercado = TablaObservable(reglas_mercado, self._al_modificar_base)
+
+    @reglas_mercado.setter
+    def reglas_mercado(self, reglas_mercado: Dict[str, Dict[str, float]]):
+        self._reglas_mercado = TablaObservable(reglas_mercado, self._al_modificar_base)
+        self._al_modificar_base(None)
+
+    def __getstate__(self):
+        """Solo se serializan las tablas de conocimiento; las estructuras derivadas se reconstruyen"""
+        if self._instrumentos is None and self._base.origen is not None:
+            # Base sin modificar cargada de disco: basta con volver a mapear el archivo
+            return {
+                'origen': self._base.origen,
+                'capacidad_cache': self.cache_pesos.capacidad,
+                'motor': self.motor,
+            }
+        return {
+            'instrumentos': self.instrumentos,
+            'reglas_mercado': self.reglas_mercado,
+            'capacidad_cache': self.cache_pesos.capacidad,
+            'motor': self.motor,
+        }
+
+    def __setstate__(self, estado):
+        if 'origen' in estado:
+            from base_en_disco import cargar_base
+            self.__init__(estado['capacidad_cache'], estado['motor'], cargar_base(estado['origen']))
+            return
+        self.__init__(estado['capacidad_cache'], estado['motor'])
+        self.instrumentos = estado['instrumentos']
+        self.reglas_mercado = estado['reglas_mercado']
+
+    def _al_modificar_instrumento(self, nombre):
+        """Mantiene el índice de instrumentos al día y luego invalida lo derivado de la base"""
+        if self._aplicando_cambio:
+            return
+        if self._indice is not None:
+            info = self._instrumentos.get(nombre) if nombre is not None else None
+            if nombre is None:
+                self._indice = None
+            elif info is None:
+                self._indice.eliminar(nombre)
+            else:
+                try:
+                    self._indice.agregar(nombre, info['plazo_minimo'], info['perfil_recomendado'].value)
+                except (KeyError, AttributeError):
+                    # Instrumento a medio definir: no se indexa hasta que esté completo
+                    self._indice.eliminar(nombre)
+        self._al_modificar_base(nombre)
+
+    def _al_modificar_base(self, clave):
+        """Invalida la base compilada cuando cambian las tablas de conocimiento"""
+        if self._aplicando_cambio:
+            # Cambio hecho con la API incremental, que actualiza por su cuenta lo derivado
+            return
+        self.version += 1
+        self.version_instrumentos += 1
+        self._sellos_condiciones = None
+        self._base = None
+        self._red_decision = None
+        self.cache_pesos.limpiar()
+
+    @contextmanager
+    def _sin_avisos(self):
+        """Modifica las tablas sin disparar la invalidación global"""
+        self._aplicando_cambio = True
+        try:
+            yield
+        finally:
+            self._aplicando_cambio = False
+
+    def version_condicion(self, condicion: str) -> int:
+        """
+        Sello de la versión actual de una condición de mercado
+        
+        Es único entre todas las condiciones y cambia cada vez que cambian sus ajustes,
+        así que las entradas de la caché de pesos que no usan la condición modificada
+        siguen siendo válidas.
+        """
+        return self._sellos()[condicion]
+
+    def _sellos(self) -> Dict[str, int]:
+        if self._sellos_condiciones is None:
+            self._sellos_condiciones = {condicion: next(self._contador_sellos) for condicion in self.base.condiciones}
+        return self._sellos_condiciones
+
+    def agregar_instrumento(self, nombre: str, info: Dict, ajustes: Optional[Dict[str, float]] = None):
+        """
+        Añade un instrumento actualizando en el sitio la red, el índice, la base y la caché
+        
+        Args:
+            nombre: Nombre del instrumento nuevo
+            info: Atributos como en `self.instrumentos` (riesgo, rendimiento_esperado,
+                liquidez, plazo_minimo, perfil_recomendado)
+            ajustes: Ajuste del instrumento en cada condición de mercado (0.0 si falta)
+        """
+        if nombre in self.instrumentos:
+            raise ValueError(f"El instrumento {nombre} ya existe; use actualizar_instrumento")
+        info = self._validar_instrumento(info)
+        ajustes = dict(ajustes or {})
+        desconocidas = set(ajustes) - set(self.reglas_mercado)
+        if desconocidas:
+            raise ValueError(f"Condiciones desconocidas: {', '.join(sorted(desconocidas))}")
+        with self._sin_avisos():
+            self._instrumentos[nombre] = info
+            for condicion, tabla in self._reglas_mercado.items():
+                tabla[nombre] = ajustes.get(condicion, 0.0)
+        self._instrumento_modificado(nombre, None)
+
+    def actualizar_instrumento(self, nombre: str, ajustes: Optional[Dict[str, float]] = None, **cambios):
+        """
+        Cambia atributos y/o ajustes de un instrumento existente
+        
+        Args:
+            nombre: Instrumento a modificar
+            ajustes: Ajustes nuevos por condición de mercado (las demás se conservan)
+            **cambios: Atributos nuevos, por ejemplo riesgo=0.3
+        """
+        anterior = self.instrumentos[nombre]
+        info = self._validar_instrumento(dict(anterior, **cambios))
+        ajustes = dict(ajustes or {})
+        desconocidas = set(ajustes) - set(self.reglas_mercado)
+        if desconocidas:
+            raise ValueError(f"Condiciones desconocidas: {', '.join(sorted(desconocidas))}")
+        perfil_anterior = anterior['perfil_recomendado']
+        with self._sin_avisos():
+            self._instrumentos[nombre] = info
+            for condicion, ajuste in ajustes.items():
+                self._reglas_mercado[condicion][nombre] = ajuste
+        self._instrumento_modificado(nombre, perfil_anterior)
+
+    def eliminar_instrumento(self, nombre: str):
+        """Quita un instrumento de las tablas y de todo lo derivado"""
+        perfil_anterior = self.instrumentos[nombre]['perfil_recomendado']
+        with self._sin_avisos():
+            del self._instrumentos[nombre]
+            for tabla in self._reglas_mercado.values():
+                tabla.pop(nombre, None)
+        self._instrumento_modificado(nombre, perfil_anterior)
+
+    @staticmethod
+    def _validar_instrumento(info: Dict) -> Dict:
+        faltan = {'riesgo', 'rendimiento_esperado', 'liquidez', 'plazo_minimo', 'perfil_recomendado'} - set(info)
+        if faltan:
+            raise ValueError(f"Faltan atributos del instrumento: {', '.join(sorted(faltan))}")
+        if not isinstance(info['perfil_recomendado'], PerfilRiesgo):
+            raise ValueError("perfil_recomendado debe ser un PerfilRiesgo")
+        return dict(info)
+
+    def _instrumento_modificado(self, nombre: str, perfil_anterior: Optional[PerfilRiesgo]):
+        """Actualiza índice, base compilada y red tras añadir, cambiar o quitar `nombre`"""
+        self.version += 1
+        # Los pesos se normalizan entre todos los instrumentos válidos: cualquier cambio
+        # de instrumento deja obsoletas todas las entradas de la caché
+        self.version_instrumentos += 1
+        info = self._instrumentos.get(nombre)
+        
+        if self._indice is not None:
+            if info is None:
+                self._indice.eliminar(nombre)
+            else:
+                self._indice.agregar(nombre, info['plazo_minimo'], info['perfil_recomendado'].value)
+        
+        if self._base is not None:
+            if info is None:
+                self._base = self._base.sin_instrumento(nombre)
+            else:
+                self._base = self._base.con_instrumento(
+                    nombre, info['riesgo'], info['rendimiento_esperado'], info['liquidez'], info['plazo_minimo'],
+                    info['perfil_recomendado'].value,
+                    [self._reglas_mercado[condicion].get(nombre, 0.0) for condicion in self._base.condiciones])
+        
+        red = self._red_decision
+        if red is not None:
+            if info is None:
+                red.remove_node(nombre) # quita también sus aristas: O(grado)
+            elif perfil_anterior is None:
+                red.add_node(nombre, tipo='instrumento')
+                red.add_edge(info['perfil_recomendado'].name, nombre)
+                for condicion in self._reglas_mercado:
+                    red.add_edge(condicion, nombre)
+            elif perfil_anterior != info['perfil_recomendado']:
+                red.remove_edge(perfil_anterior.name, nombre)
+                red.add_edge(info['perfil_recomendado'].name, nombre)
+
+    def agregar_condicion(self, condicion: str, ajustes: Dict[str, float]):
+        """
+        Añade una condición de mercado con sus ajustes por instrumento (0.0 si falta)
+        
+        Las entradas de la caché de pesos que no usan la condición siguen siendo válidas.
+        """
+        if condicion in self.reglas_mercado:
+            raise ValueError(f"La condición {condicion} ya existe; use actualizar_condicion")
+        desconocidos = set(ajustes) - set(self.instrumentos)
+        if desconocidos:
+            raise ValueError(f"Instrumentos desconocidos: {', '.join(sorted(desconocidos))}")
+        with self._sin_avisos():
+            self._reglas_mercado[condicion] = {nombre: ajustes.get(nombre, 0.0) for nombre in self._instrumentos}
+        self._condicion_modificada(condicion, nueva=True)
+
+    def actualizar_condicion(self, condicion: str, ajustes: Dict[str, float]):
+        """Cambia los ajustes indicados de una condición existente; los demás se conservan"""
+        tabla = self.reglas_mercado[condicion]
+        desconocidos = set(ajustes) - set(self.instrumentos)
+        if desconocidos:
+            raise ValueError(f"Instrumentos desconocidos: {', '.join(sorted(desconocidos))}")
+        with self._sin_avisos():
+            tabla.update(ajustes)
+        self._condicion_modificada(condicion, nueva=False)
+
+    def eliminar_condicion(self, condicion: str):
+        """Quita una condición de mercado de las tablas y de todo lo derivado"""
+        with self._sin_avisos():
+            del self.reglas_mercado[condicion]
+        self._condicion_modificada(condicion, nueva=False)
+
+    def _condicion_modificada(self, condicion: str, nueva: bool):
+        """Actualiza sello de versión, base compilada y red tras añadir, cambiar o quitar `condicion`"""
+        self.version += 1
+        tabla = self._reglas_mercado.get(condicion)
+        
+        if self._sellos_condiciones is not None:
+            if tabla is None:
+                del self._sellos_condiciones[condicion]
+            else:
+                self._sellos_condiciones[condicion] = next(self._contador_sellos)
+        
+        if self._base is not None:
+            if tabla is None:
+                self._base = self._base.sin_condicion(condicion)
+            else:
+                self._base = self._base.con_condicion(condicion, [tabla.get(nombre, 0.0) for nombre in self._base.nombres])
+        
+        red = self._red_decision
+        if red is not None:
+            if tabla is None:
+                red.remove_node(condicion)
+            elif nueva:
+                red.add_node(condicion, tipo='condicion_mercado')
+                red.add_edges_from((condicion, instrumento) for instrumento in self._instrumentos)
+
+    @property
+    def base(self) -> BaseConocimiento:
+        """Base de conocimientos compilada, reconstruida solo si las tablas cambiaron"""
+        if self._base is None:
+            self._base = BaseConocimiento.compilar(self.instrumentos, self.reglas_mercado)
+        return self._base
         
     def _construir_red(self):
         """Construye la red de decisión para el sistema experto""" 
@@ -102,21 +462,29 @@ class SistemaInversion:
 
     def evaluar_perfil(self, respuestas: Dict[str, int]) -> PerfilRiesgo: # evaluar perfil sirve para evaluar el perfil del inversor
         """Evalúa el perfil del inversor basado en sus respuestas"""
+        inst = self.instrumentacion
+        if inst is not None:
+            inicio = perf_counter()
         # Cálculo simplificado del perfil
         puntuacion = sum(respuestas.values()) / len(respuestas) # puntuación es el promedio de las respuestas que ha dado el usuario
         # Si la puntuación es menor a 2, el perfil es conservador
         if puntuacion < 2:
-            return PerfilRiesgo.CONSERVADOR
+            perfil = PerfilRiesgo.CONSERVADOR
         elif puntuacion < 3: # Si la puntuación es menor a 3, el perfil es moderado
-            return PerfilRiesgo.MODERADO
+            perfil = PerfilRiesgo.MODERADO
         else: # Si la puntuación es mayor o igual a 3, el perfil es agresivo
-            return PerfilRiesgo.AGRESIVO
+            perfil = PerfilRiesgo.AGRESIVO
+        if inst is not None:
+            inst.registrar('evaluar_perfil', perf_counter() - inicio)
+            inst.contar('perfiles_evaluados')
+        return perfil
 
     def recomendar_inversiones(self,  # recomendar inversiones se basa en el perfil del inversor, el monto a invertir, el plazo de inversión y las condiciones del mercado
                              perfil: PerfilRiesgo,
                              monto: float,
                              plazo: int,
-                             condiciones_mercado: List[str]) -> Dict[str, float]: 
+                             condiciones_mercado: List[str],
+                             motor: Optional[MotorAsignacion] = None) -> Dict[str, float]: 
         """
         Genera recomendaciones de inversión basadas en el perfil y condiciones
         
@@ -125,60 +493,327 @@ class SistemaInversion:
             monto: Cantidad a invertir
             plazo: Plazo de inversión en años
             condiciones_mercado: Lista de condiciones económicas actuales
+            motor: Motor de asignación para esta llamada (por defecto `self.motor`)
             
         Returns:
             Dict con la distribución recomendada del portafolio
         """
-        recomendaciones = {}
+        inst = self.instrumentacion
+        if inst is None:
+            pesos = self._pesos(perfil, plazo, condiciones_mercado, motor or self.motor)
+            return {nombre: peso * monto for nombre, peso in pesos}
         
-        # Filtrar instrumentos por plazo y perfil
-        instrumentos_validos = { 
-            nombre: info for nombre, info in self.instrumentos.items() 
-            if info['plazo_minimo'] <= plazo and
-            info['perfil_recomendado'].value <= perfil.value + 1
-        }
+        # Un acierto de caché no mide filtrado ni puntuación: sin esto el desglose del
+        # hilo mostraría los de una recomendación anterior
+        inst.olvidar(*ETAPAS_RECOMENDACION)
+        inicio = perf_counter()
+        pesos = self._pesos(perfil, plazo, condiciones_mercado, motor or self.motor)
+        reparto = perf_counter()
+        recomendaciones = {nombre: peso * monto for nombre, peso in pesos}
+        fin = perf_counter()
+        inst.registrar('reparto', fin - reparto)
+        inst.registrar('recomendar', fin - inicio)
+        inst.contar('recomendaciones')
+        return recomendaciones
+
+    def recomendar_con_reglas(self,
+                              perfil: PerfilRiesgo,
+                              monto: float,
+                              plazo: int,
+                              motor_reglas: 'MotorReglas',
+                              hechos: Optional[Dict[str, object]] = None) -> Dict[str, float]:
+        """
+        Genera recomendaciones aplicando las reglas activas de un MotorReglas
+
+        Los hechos del inversor (perfil, plazo y monto) se afirman junto con `hechos`
+        sustituyendo a los de la consulta anterior, así que el motor solo reevalúa las
+        reglas que dependen de hechos que cambian. Los factores de las reglas activas
+        se aplican uno a uno en el orden de `motor_reglas.activas`, así que un motor
+        creado con MotorReglas.desde_reglas_mercado da exactamente el mismo reparto
+        que recomendar_inversiones con list(motor_reglas.activas) como condiciones.
+
+        Args:
+            perfil: Perfil de riesgo del inversor
+            monto: Cantidad a invertir
+            plazo: Plazo de inversión en años
+            motor_reglas: Motor de reglas con su memoria de trabajo
+            hechos: Hechos adicionales, por ejemplo {'alta_inflacion': True}
+
+        Returns:
+            Dict con la distribución recomendada del portafolio
+        """
+        motor_reglas.actualizar(dict(hechos or {}, perfil=perfil.name, plazo=plazo, monto=monto), reemplazar=True)
+        base = self.base
+        validos = self.instrumentos_validos(perfil, plazo)
+        scores = np.where(base.perfil_recomendado == perfil.value, 1.2, 1.0)
+        # Un factor de regla cada vez, en el mismo orden de productos que MotorHeuristico
+        for factores in motor_reglas.factores_activos(base):
+            scores *= factores
+        scores = scores[validos].tolist()
+        total = suma_secuencial(scores)
+        nombres = base.nombres
+        return {nombres[i]: score / total * monto for i, score in zip(validos, scores)}
+
+    def _pesos(self,
+               perfil: PerfilRiesgo,
+               plazo: int,
+               condiciones_mercado: List[str],
+               motor: MotorAsignacion) -> Tuple[Tuple[str, float], ...]:
+        """
+        Devuelve los pesos normalizados (nombre, peso) de la cartera recomendada
         
-        # Calcular score base para cada instrumento
-        for nombre, info in instrumentos_validos.items():
-            score = 1.0
-            
-            # Ajustar por perfil
-            if info['perfil_recomendado'] == perfil: # Si el perfil recomendado es igual al perfil del inversor, el score se multiplica por 1.2, porque es el perfil que más se ajusta al inversor y el 1.2 es un factor de ajuste determinado por el experto
-                score *= 1.2
-                
-            # Ajustar por condiciones de mercado
-            for condicion in condiciones_mercado:
-                if condicion in self.reglas_mercado:
-                    score *= (1 + self.reglas_mercado[condicion][nombre]) # Si la condición de mercado está en las reglas de mercado, el score se multiplica por 1 más el valor de la regla de mercado para el instrumento financiero, porque 
-            
-            recomendaciones[nombre] = score # Se guarda el score en el diccionario de recomendaciones
-            
-        # Normalizar para obtener porcentajes
-        total = sum(recomendaciones.values()) # Se calcula la suma de los scores de los instrumentos financieros
-        for instrumento in recomendaciones: # Se recorren los instrumentos financieros
-            recomendaciones[instrumento] = (recomendaciones[instrumento] / total) * monto # Se calcula el porcentaje de la inversión que se debe hacer en cada instrumento financiero
+        Los pesos solo dependen del perfil, del tramo de plazo (cuántos valores
+        distintos de `plazo_minimo` cubre el plazo), de las condiciones y del motor,
+        así que se guardan en `self.cache_pesos` y el monto se aplica con una sola
+        multiplicación.
+        """
+        base = self.base
+        sellos = self._sellos()
+        # La clave usa los sellos de versión de las condiciones: al cambiar una condición
+        # solo dejan de encontrarse las entradas que la usan
+        firma = tuple(sellos[condicion] for condicion in condiciones_mercado if condicion in sellos)
+        clave = (motor, perfil.value, bisect_right(base.plazos_distintos, plazo), firma, self.version_instrumentos)
+        pesos = self.cache_pesos.obtener(clave)
+        inst = self.instrumentacion
+        if pesos is None:
+            ids_condiciones = tuple(base.indice_condiciones[condicion]
+                                    for condicion in condiciones_mercado if condicion in base.indice_condiciones)
+            if inst is None:
+                pesos = motor.pesos(base, perfil, self.instrumentos_validos(perfil, plazo), ids_condiciones)
+            else:
+                # En un acierto de caché no hay filtrado ni puntuación que medir
+                inicio = perf_counter()
+                validos = self.instrumentos_validos(perfil, plazo)
+                filtrado = perf_counter()
+                pesos = motor.pesos(base, perfil, validos, ids_condiciones)
+                inst.registrar('filtrado', filtrado - inicio)
+                inst.registrar('puntuacion', perf_counter() - filtrado)
+                inst.contar('instrumentos_filtrados', len(validos))
+                inst.contar('cache_fallos')
+            self.cache_pesos.guardar(clave, pesos)
+        elif inst is not None:
+            inst.contar('cache_aciertos')
+        if inst is not None:
+            inst.contar('condiciones_aplicadas', len(firma))
+        return pesos
+
+    @property
+    def indice(self) -> IndiceInstrumentos:
+        """Índice por perfil y plazo mínimo, que se mantiene al modificar los instrumentos"""
+        if self._indice is None:
+            base = self.base
+            self._indice = IndiceInstrumentos.construir(base.nombres, base.plazo_minimo, base.perfil_recomendado)
+        return self._indice
+
+    def instrumentos_validos(self, perfil: PerfilRiesgo, plazo: int) -> List[int]:
+        """Ids de los instrumentos que cumplen el plazo mínimo y el perfil, en orden de la base"""
+        nombres = self.indice.validos(perfil.value + 1, plazo)
+        ids = self.base.indice
+        return [ids[nombre] for nombre in nombres]
+
+    def matriz_multiplicadores(self) -> np.ndarray:
+        """
+        Construye la matriz instrumento×condición con los factores (1 + ajuste)
+        
+        Las filas siguen el orden de `self.instrumentos` y las columnas el de
+        `self.reglas_mercado`. Es una vista de solo lectura de la base compilada.
+        """
+        return self.base.factores.T
+
+    def mascara_condiciones(self, condiciones_mercado: Sequence[List[str]]) -> np.ndarray:
+        """
+        Convierte listas de condiciones por inversor en una máscara booleana inversor×condición
+        
+        La máscara pierde el orden y las repeticiones: solo representa exactamente las
+        listas en orden canónico (ver `orden_canonico`).
+        """
+        columnas = self.base.indice_condiciones
+        mascara = np.zeros((len(condiciones_mercado), len(columnas)), dtype=bool)
+        for i, condiciones in enumerate(condiciones_mercado):
+            for condicion in condiciones:
+                if condicion in columnas: # Las condiciones desconocidas se ignoran igual que en recomendar_inversiones
+                    mascara[i, columnas[condicion]] = True
+        return mascara
+
+    @staticmethod
+    def _valores_perfil(perfiles: Union[Sequence[PerfilRiesgo], np.ndarray]) -> np.ndarray:
+        return np.asarray([p.value if isinstance(p, PerfilRiesgo) else p for p in perfiles]
+                          if not isinstance(perfiles, np.ndarray) else perfiles, dtype=np.int64)
+
+    def validos_lote(self,
+                     perfiles: Union[Sequence[PerfilRiesgo], np.ndarray],
+                     plazos: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """
+        Máscara inversor×instrumento de los instrumentos que recomendar_inversiones incluiría
+        
+        Un instrumento válido puede recibir un monto de 0.0 (por ejemplo, con un ajuste
+        de -1 o un monto nulo), así que para saber qué claves tendría el diccionario
+        del método escalar hay que usar esta máscara y no el valor del monto.
+        """
+        perfiles = self._valores_perfil(perfiles)
+        plazos = np.asarray(plazos, dtype=np.int64)
+        base = self.base
+        return ((base.plazo_minimo[None, :] <= plazos[:, None]) &
+                (base.perfil_recomendado.astype(np.int64)[None, :] <= perfiles[:, None] + 1))
+
+    def recomendar_inversiones_lote(self,
+                                    perfiles: Union[Sequence[PerfilRiesgo], np.ndarray],
+                                    montos: Union[Sequence[float], np.ndarray],
+                                    plazos: Union[Sequence[int], np.ndarray],
+                                    condiciones_mercado: np.ndarray) -> np.ndarray:
+        """
+        Genera recomendaciones para muchos inversores en una sola pasada de NumPy
+        
+        Args:
+            perfiles: Perfiles de riesgo (PerfilRiesgo o su valor entero) por inversor
+            montos: Cantidad a invertir por inversor
+            plazos: Plazo de inversión en años por inversor
+            condiciones_mercado: Máscara booleana inversor×condición, con las
+                columnas en el orden de `self.reglas_mercado` (ver `mascara_condiciones`)
             
-        return recomendaciones
+        Returns:
+            Matriz inversor×instrumento con los montos recomendados, con las columnas
+            en el orden de `self.instrumentos`. Los instrumentos que
+            `recomendar_inversiones` no incluiría valen 0.0 (ver `validos_lote`); el resto coincide
+            exactamente con el método escalar cuando las condiciones se pasan en el
+            orden de `self.reglas_mercado`.
+        """
+        perfiles = self._valores_perfil(perfiles)
+        montos = np.asarray(montos, dtype=np.float64)
+        mascara = np.asarray(condiciones_mercado, dtype=bool).reshape(len(perfiles), len(self.base.condiciones))
+        
+        # Atributos de los instrumentos desde la base compilada
+        base = self.base
+        perfil_recomendado = base.perfil_recomendado.astype(np.int64)
+        multiplicadores = base.factores.T
+        
+        # Filtrar instrumentos por plazo y perfil (inversor×instrumento)
+        validos = self.validos_lote(perfiles, plazos)
+        
+        # Score base con el ajuste por perfil
+        scores = np.where(perfil_recomendado[None, :] == perfiles[:, None], 1.2, 1.0)
+        
+        # Ajustar por condiciones de mercado en el mismo orden que el método escalar
+        for j in range(multiplicadores.shape[1]):
+            scores *= np.where(mascara[:, j:j + 1], multiplicadores[None, :, j], 1.0)
+        scores[~validos] = 0.0
+        
+        # Normalizar y repartir el monto; sin instrumentos válidos no se reparte nada
+        total = sumar_en_orden(scores)
+        np.divide(scores, total, out=scores, where=total != 0)
+        scores *= montos[:, None]
+        return scores
+
+    def orden_canonico(self, condiciones_mercado: Iterable[str]) -> bool:
+        """
+        Indica si las condiciones conocidas aparecen sin repetir y en el orden de `self.reglas_mercado`
+        
+        recomendar_inversiones aplica las condiciones en el orden recibido y una repetida
+        cuenta dos veces; una máscara solo da el mismo resultado para estas listas.
+        """
+        columnas = self.base.indice_condiciones
+        anterior = -1
+        for condicion in condiciones_mercado:
+            columna = columnas.get(condicion)
+            if columna is not None:
+                if columna <= anterior:
+                    return False
+                anterior = columna
+        return True
+
+    def recomendar_inversiones_listas(self,
+                                      perfiles: Union[Sequence[PerfilRiesgo], np.ndarray],
+                                      montos: Union[Sequence[float], np.ndarray],
+                                      plazos: Union[Sequence[int], np.ndarray],
+                                      condiciones_mercado: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        recomendar_inversiones_lote con una lista de condiciones por inversor
+        
+        Las filas cuyas condiciones no están en orden canónico (repetidas o en otro orden
+        que `self.reglas_mercado`) se calculan con recomendar_inversiones, así que cada
+        fila coincide exactamente con el método escalar.
+        
+        Returns:
+            Matriz inversor×instrumento como la de recomendar_inversiones_lote
+        """
+        distribucion = self.recomendar_inversiones_lote(perfiles, montos, plazos,
+                                                        self.mascara_condiciones(condiciones_mercado))
+        valores = None
+        ids = self.base.indice
+        for i, condiciones in enumerate(condiciones_mercado):
+            if self.orden_canonico(condiciones):
+                continue
+            if valores is None:
+                valores = self._valores_perfil(perfiles)
+            recomendaciones = self.recomendar_inversiones(PerfilRiesgo(int(valores[i])), float(montos[i]),
+                                                          int(plazos[i]), list(condiciones))
+            fila = distribucion[i]
+            fila[:] = 0.0
+            for nombre, monto in recomendaciones.items():
+                fila[ids[nombre]] = monto
+        return distribucion
 
     def explicar_recomendacion(self,  
                               recomendaciones: Dict[str, float],
                               perfil: PerfilRiesgo,
                               condiciones_mercado: List[str]) -> str:
         """Genera una explicación detallada de las recomendaciones"""
-        explicacion = f"Recomendación para perfil {perfil.name}:\n\n" # Se inicia la explicación con el perfil del inversor
+        inst = self.instrumentacion
+        if inst is None:
+            return ''.join(self.partes_explicacion(recomendaciones, perfil, condiciones_mercado))
+        
+        inicio = perf_counter()
+        partes = self.partes_explicacion(recomendaciones, perfil, condiciones_mercado)
+        explicacion = ''.join(partes)
+        inst.registrar('explicacion', perf_counter() - inicio)
+        inst.contar('explicaciones')
+        inst.contar('fragmentos_explicacion', len(partes))
+        return explicacion
+
+    def partes_explicacion(self,
+                           recomendaciones: Dict[str, float],
+                           perfil: PerfilRiesgo,
+                           condiciones_mercado: List[str]) -> List[str]:
+        """
+        Fragmentos de texto de la explicación, listos para unir o escribir en orden
+        
+        La parte fija de cada instrumento (rendimiento y riesgo) sale de la caché de
+        fragmentos de la base compilada; solo el monto se formatea en cada llamada.
+        """
+        fragmentos = self.base.fragmentos_explicacion
+        # Se inicia la explicación con el perfil del inversor
+        partes = [f"Recomendación para perfil {perfil.name}:\n\nDistribución recomendada:\n"]
         
         # Explicar distribución
-        explicacion += "Distribución recomendada:\n" 
         for instrumento, monto in recomendaciones.items():
-            info = self.instrumentos[instrumento]
-            explicacion += f"- {instrumento}: ${monto:,.2f}\n"
-            explicacion += f"  Rendimiento esperado: {info['rendimiento_esperado']*100:.1f}%\n"
-            explicacion += f"  Nivel de riesgo: {info['riesgo']*100:.1f}%\n\n"
+            partes.append(f"- {instrumento}: ${monto:,.2f}\n")
+            partes.append(fragmentos[instrumento])
         
         # Explicar condiciones de mercado
         if condiciones_mercado:
-            explicacion += "\nFactores de mercado considerados:\n"
+            partes.append("\nFactores de mercado considerados:\n")
             for condicion in condiciones_mercado:
-                explicacion += f"- {condicion}\n"
+                partes.append(f"- {condicion}\n")
                 
-        return explicacion
\ No newline at end of file
+        return partes
+
+    def escribir_explicaciones(self,
+                               archivo: TextIO,
+                               lote: Iterable[Tuple[Dict[str, float], PerfilRiesgo, List[str]]],
+                               separador: str = "\n") -> int:
+        """
+        Escribe en `archivo` la explicación de cada (recomendaciones, perfil, condiciones) del lote
+        
+        Las explicaciones no se materializan como cadenas completas: sus fragmentos se
+        escriben directamente en el archivo o flujo.
+        
+        Returns:
+            Número de explicaciones escritas
+        """
+        escritas = 0
+        for recomendaciones, perfil, condiciones_mercado in lote:
+            if escritas and separador:
+                archivo.write(separador)
+            archivo.writelines(self.partes_explicacion(recomendaciones, perfil, condiciones_mercado))
+            escritas += 1
+        return escritas
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""Utilidades compartidas por las pruebas del sistema experto"""
+import os
+import sys
+from typing import Dict, List
+
+import pytest
+
+# Permitir ejecutar las pruebas desde cualquier directorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos_sinteticos import generar_inversores, sistema_sintetico  # noqa: E402
+from sistema_inversion import PerfilRiesgo, SistemaInversion  # noqa: E402
+
+
+def recomendar_referencia(sistema: SistemaInversion,
+                          perfil: PerfilRiesgo,
+                          monto: float,
+                          plazo: int,
+                          condiciones_mercado: List[str]) -> Dict[str, float]:
+    """recomendar_inversiones tal como estaba escrito sobre las tablas de diccionarios"""
+    recomendaciones = {}
+    for nombre, info in sistema.instrumentos.items():
+        if info['plazo_minimo'] <= plazo and info['perfil_recomendado'].value <= perfil.value + 1:
+            score = 1.0
+            if info['perfil_recomendado'] == perfil:
+                score *= 1.2
+            for condicion in condiciones_mercado:
+                if condicion in sistema.reglas_mercado:
+                    score *= (1 + sistema.reglas_mercado[condicion][nombre])
+            recomendaciones[nombre] = score
+    # Suma de izquierda a derecha, como sum() antes de Python 3.12
+    total = 0.0
+    for score in recomendaciones.values():
+        total += score
+    for instrumento in recomendaciones:
+        recomendaciones[instrumento] = (recomendaciones[instrumento] / total) * monto
+    return recomendaciones
+
+
+def explicar_referencia(sistema: SistemaInversion,
+                        recomendaciones: Dict[str, float],
+                        perfil: PerfilRiesgo,
+                        condiciones_mercado: List[str]) -> str:
+    """explicar_recomendacion tal como estaba escrito sobre las tablas de diccionarios"""
+    explicacion = f"Recomendación para perfil {perfil.name}:\n\n"
+    explicacion += "Distribución recomendada:\n"
+    for instrumento, monto in recomendaciones.items():
+        info = sistema.instrumentos[instrumento]
+        explicacion += f"- {instrumento}: ${monto:,.2f}\n"
+        explicacion += f"  Rendimiento esperado: {info['rendimiento_esperado']*100:.1f}%\n"
+        explicacion += f"  Nivel de riesgo: {info['riesgo']*100:.1f}%\n\n"
+    if condiciones_mercado:
+        explicacion += "\nFactores de mercado considerados:\n"
+        for condicion in condiciones_mercado:
+            explicacion += f"- {condicion}\n"
+    return explicacion
+
+
+def como_lote(sistema: SistemaInversion, recomendaciones: Dict[str, float]) -> List[float]:
+    """Fila de montos en el orden de la base, con 0.0 en los instrumentos no recomendados"""
+    return [recomendaciones.get(nombre, 0.0) for nombre in sistema.base.nombres]
+
+
+@pytest.fixture
+def sistema():
+    return SistemaInversion()
+
+
+@pytest.fixture(params=[5, 50, 500], ids=lambda n: f'{n}_instrumentos')
+def sistema_grande(request):
+    """Catálogos sintéticos por encima y por debajo del bloque de la suma por pares de NumPy"""
+    return sistema_sintetico(request.param)
+
+
+@pytest.fixture
+def inversores(sistema_grande):
+    return generar_inversores(sistema_grande, 300, semilla=1)
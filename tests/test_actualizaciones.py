@@ -0,0 +1,129 @@
+"""API incremental de instrumentos y condiciones de mercado"""
+import numpy as np
+import pytest
+
+from conftest import recomendar_referencia, sistema_sintetico
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+
+def _reconstruido(sistema: SistemaInversion) -> SistemaInversion:
+    """Sistema nuevo con copias de las tablas, que lo deriva todo desde cero"""
+    nuevo = SistemaInversion()
+    nuevo.instrumentos = {nombre: dict(info) for nombre, info in sistema.instrumentos.items()}
+    nuevo.reglas_mercado = {condicion: dict(tabla) for condicion, tabla in sistema.reglas_mercado.items()}
+    return nuevo
+
+
+def _comparar(sistema: SistemaInversion, rng):
+    nuevo = _reconstruido(sistema)
+    base, esperada = sistema.base, nuevo.base
+    assert list(base.nombres) == list(esperada.nombres)
+    assert base.condiciones == esperada.condiciones
+    for atributo in ('riesgo', 'rendimiento_esperado', 'liquidez', 'plazo_minimo', 'perfil_recomendado', 'ajustes'):
+        assert np.array_equal(getattr(base, atributo), getattr(esperada, atributo)), atributo
+    red, red_esperada = sistema.red_decision, nuevo.red_decision
+    assert dict(red.nodes(data=True)) == dict(red_esperada.nodes(data=True))
+    assert set(red.edges) == set(red_esperada.edges)
+    for perfil in PerfilRiesgo:
+        for plazo in (0, 1, 5, 30):
+            assert sistema.indice.validos(perfil.value + 1, plazo) == nuevo.indice.validos(perfil.value + 1, plazo)
+    condiciones = list(base.condiciones)
+    for _ in range(5):
+        perfil = PerfilRiesgo(int(rng.integers(1, 4)))
+        plazo = int(rng.integers(0, 31))
+        activas = [c for c in condiciones if rng.random() < 0.5]
+        recomendaciones = sistema.recomendar_inversiones(perfil, 1000.0, plazo, activas)
+        assert recomendaciones == recomendar_referencia(sistema, perfil, 1000.0, plazo, activas)
+
+
+def test_secuencia_aleatoria_como_reconstruir():
+    rng = np.random.default_rng(7)
+    sistema = sistema_sintetico(30)
+    # Construir todo lo derivado para que las actualizaciones lo parcheen en el sitio
+    sistema.red_decision, sistema.indice, sistema.base.filas_factores
+    nuevos = 0
+    for paso in range(120):
+        nombres = list(sistema.instrumentos)
+        condiciones = list(sistema.reglas_mercado)
+        operacion = rng.integers(6)
+        if operacion == 0 or len(nombres) < 3:
+            nuevos += 1
+            info = {'riesgo': float(rng.random()), 'rendimiento_esperado': float(rng.random() / 5),
+                    'liquidez': float(rng.random()), 'plazo_minimo': int(rng.integers(0, 20)),
+                    'perfil_recomendado': PerfilRiesgo(int(rng.integers(1, 4)))}
+            sistema.agregar_instrumento(f'nuevo_{nuevos}', info,
+                                        {c: float(rng.uniform(-0.3, 0.3)) for c in condiciones if rng.random() < 0.5})
+        elif operacion == 1:
+            nombre = nombres[rng.integers(len(nombres))]
+            sistema.actualizar_instrumento(nombre, {c: float(rng.uniform(-0.3, 0.3)) for c in condiciones[:1]},
+                                           plazo_minimo=int(rng.integers(0, 20)),
+                                           perfil_recomendado=PerfilRiesgo(int(rng.integers(1, 4))))
+        elif operacion == 2:
+            sistema.eliminar_instrumento(nombres[rng.integers(len(nombres))])
+        elif operacion == 3:
+            nuevos += 1
+            sistema.agregar_condicion(f'condicion_{nuevos}', {n: float(rng.uniform(-0.3, 0.3)) for n in nombres[::3]})
+        elif operacion == 4 and condiciones:
+            sistema.actualizar_condicion(condiciones[rng.integers(len(condiciones))],
+                                         {n: float(rng.uniform(-0.3, 0.3)) for n in nombres[::4]})
+        elif condiciones:
+            sistema.eliminar_condicion(condiciones[rng.integers(len(condiciones))])
+        if paso % 10 == 0:
+            _comparar(sistema, rng)
+    _comparar(sistema, rng)
+
+
+def test_versiones_y_cache():
+    sistema = sistema_sintetico(20, capacidad_cache=64)
+    version = sistema.version
+    sello = sistema.version_condicion('recesion')
+    otro_sello = sistema.version_condicion('alta_inflacion')
+    sistema.recomendar_inversiones(PerfilRiesgo.MODERADO, 1000.0, 10, ['alta_inflacion'])
+
+    sistema.actualizar_condicion('recesion', {sistema.base.nombres[0]: 0.25})
+    assert sistema.version == version + 1
+    assert sistema.version_condicion('recesion') != sello
+    assert sistema.version_condicion('alta_inflacion') == otro_sello
+    # La entrada que no usa la condición cambiada sigue en la caché
+    aciertos = sistema.cache_pesos.estadisticas()['aciertos']
+    sistema.recomendar_inversiones(PerfilRiesgo.MODERADO, 1000.0, 10, ['alta_inflacion'])
+    assert sistema.cache_pesos.estadisticas()['aciertos'] == aciertos + 1
+
+    # Un cambio de instrumento invalida todas las entradas
+    version_instrumentos = sistema.version_instrumentos
+    sistema.actualizar_instrumento(sistema.base.nombres[1], riesgo=0.9)
+    assert sistema.version_instrumentos == version_instrumentos + 1
+    sistema.recomendar_inversiones(PerfilRiesgo.MODERADO, 1000.0, 10, ['alta_inflacion'])
+    assert sistema.cache_pesos.estadisticas()['aciertos'] == aciertos + 1
+
+
+def test_aristas_de_la_red():
+    sistema = sistema_sintetico(10)
+    red = sistema.red_decision
+    info = {'riesgo': 0.2, 'rendimiento_esperado': 0.05, 'liquidez': 0.9, 'plazo_minimo': 1,
+            'perfil_recomendado': PerfilRiesgo.CONSERVADOR}
+    sistema.agregar_instrumento('bono_nuevo', info)
+    assert set(red.predecessors('bono_nuevo')) == {'CONSERVADOR'} | set(sistema.reglas_mercado)
+    sistema.actualizar_instrumento('bono_nuevo', perfil_recomendado=PerfilRiesgo.AGRESIVO)
+    assert set(red.predecessors('bono_nuevo')) == {'AGRESIVO'} | set(sistema.reglas_mercado)
+    sistema.agregar_condicion('euforia', {})
+    assert set(red.successors('euforia')) == set(sistema.instrumentos)
+    sistema.eliminar_instrumento('bono_nuevo')
+    sistema.eliminar_condicion('euforia')
+    assert 'bono_nuevo' not in red and 'euforia' not in red
+
+
+@pytest.mark.parametrize('llamada', [
+    lambda s: s.agregar_instrumento(s.base.nombres[0], {}),
+    lambda s: s.agregar_instrumento('x', {'riesgo': 0.1}),
+    lambda s: s.agregar_instrumento('x', {'riesgo': 0.1, 'rendimiento_esperado': 0.1, 'liquidez': 0.1,
+                                          'plazo_minimo': 1, 'perfil_recomendado': 2}),
+    lambda s: s.agregar_condicion('recesion', {}),
+    lambda s: s.actualizar_condicion('recesion', {'no_existe': 0.1}),
+], ids=['repetido', 'incompleto', 'perfil_entero', 'condicion_repetida', 'instrumento_desconocido'])
+def test_errores(llamada):
+    sistema = sistema_sintetico(5)
+    version = sistema.version
+    with pytest.raises(ValueError):
+        llamada(sistema)
+    assert sistema.version == version
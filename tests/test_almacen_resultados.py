@@ -0,0 +1,70 @@
+"""Almacén persistente de resultados en SQLite"""
+import numpy as np
+import pytest
+
+from almacen_resultados import AlmacenResultados, recomendar_lote_con_almacen
+
+PREGUNTAS = ('edad', 'experiencia', 'tolerancia_perdida', 'objetivo')
+
+
+def _resultado(k: int):
+    return k % 3 + 1, np.arange(k % 5 + 1, dtype=np.int32) + k, np.full(k % 5 + 1, k / 7)
+
+
+def _vectores(almacen: AlmacenResultados) -> int:
+    return almacen._conexion.execute('SELECT COUNT(*) FROM vectores').fetchone()[0]
+
+
+def test_ida_y_vuelta_desde_un_generador():
+    with AlmacenResultados(':memory:') as almacen:
+        claves = [bytes([k % 256, k // 256]) for k in range(500)]
+        # Cada arreglo se libera en cuanto el generador avanza, así que sus id se reutilizan
+        almacen.guardar_muchos((clave, _resultado(k)) for k, clave in enumerate(claves))
+        guardados = almacen.obtener_muchos(claves)
+        assert len(guardados) == len(almacen) == 500
+        for k, clave in enumerate(claves):
+            perfil, ids, pesos = _resultado(k)
+            assert guardados[clave][0] == perfil
+            assert np.array_equal(guardados[clave][1], ids) and np.array_equal(guardados[clave][2], pesos)
+
+
+def test_arreglos_compartidos_se_guardan_una_vez():
+    with AlmacenResultados(':memory:') as almacen:
+        ids, pesos = np.array([0, 2], dtype=np.int32), np.array([0.25, 0.75])
+        almacen.guardar_muchos([(b'a', (1, ids, pesos)), (b'b', (2, ids, pesos)), (b'c', (2, ids, pesos.copy()))])
+        assert len(almacen) == 3 and _vectores(almacen) == 1
+
+
+def test_desalojo_lru_y_vectores_huerfanos():
+    with AlmacenResultados(':memory:', max_entradas=3) as almacen:
+        compartido = _resultado(0)
+        almacen.guardar_muchos([(b'0', compartido), (b'1', compartido), (b'2', _resultado(2))])
+        almacen.obtener_muchos([b'0'])
+        almacen.guardar_muchos([(b'3', _resultado(3)), (b'4', _resultado(4))])
+        assert len(almacen) == 3 and almacen.desalojos == 2
+        assert set(almacen.obtener_muchos([b'0', b'1', b'2', b'3', b'4'])) == {b'0', b'3', b'4'}
+        # El vector de '1' sigue en uso por '0'; el de '2' queda huérfano y se borra
+        assert _vectores(almacen) == 3
+    with pytest.raises(ValueError):
+        AlmacenResultados(':memory:', max_entradas=0)
+
+
+def test_lote_como_sin_almacen(tmp_path, sistema_grande):
+    rng = np.random.default_rng(3)
+    n = 400
+    respuestas = [dict(zip(PREGUNTAS, fila)) for fila in rng.integers(1, 4, size=(n, len(PREGUNTAS))).tolist()]
+    plazos = rng.integers(1, 31, size=n).tolist()
+    condiciones = [[c for c in sistema_grande.base.condiciones if rng.random() < 0.5] for _ in range(n)]
+    perfiles = [sistema_grande.evaluar_perfil(r) for r in respuestas]
+    mascara = sistema_grande.mascara_condiciones(condiciones)
+
+    ruta = str(tmp_path / 'resultados.sqlite')
+    for noche in range(2):
+        montos = rng.uniform(1_000, 1_000_000, size=n).round(2).tolist()
+        esperado = sistema_grande.recomendar_inversiones_lote(perfiles, montos, plazos, mascara)
+        with AlmacenResultados(ruta) as almacen:
+            obtenidos, matriz = recomendar_lote_con_almacen(sistema_grande, almacen, respuestas, montos, plazos,
+                                                             condiciones)
+            assert almacen.aciertos == (n if noche else 0)
+        assert obtenidos == perfiles
+        assert np.array_equal(matriz, esperado)
@@ -0,0 +1,86 @@
+"""Backtesting sobre series históricas de rendimientos"""
+import numpy as np
+import pytest
+
+from backtest import Backtester, cargar_condiciones, cargar_rendimientos
+from sistema_inversion import PerfilRiesgo
+
+
+def _escenario(sistema, dias=60, semilla=0):
+    rng = np.random.default_rng(semilla)
+    nombres = list(sistema.base.nombres)[::-1]  # columnas en otro orden que la base
+    rendimientos = rng.normal(0.0005, 0.01, size=(dias, len(nombres)))
+    fechas = [f'2020-{1 + d // 28:02d}-{1 + d % 28:02d}' for d in range(dias)]
+    condiciones = [(fechas[0], []), (fechas[10], ['recesion']), (fechas[25], ['alta_inflacion', 'recesion'])]
+    return fechas, nombres, rendimientos, condiciones
+
+
+def _curva_ingenua(sistema, fechas, nombres, rendimientos, condiciones, perfil, plazo, dias_rebalanceo):
+    """Valor diario de una cartera rebalanceada con recomendar_inversiones, día a día"""
+    columnas = {nombre: j for j, nombre in enumerate(nombres)}
+    inicios = [fecha for fecha, _ in condiciones]
+    curva, posiciones, efectivo = [1.0], {}, 1.0
+    for d in range(len(fechas)):
+        if d in dias_rebalanceo:
+            vigentes = condiciones[int(np.searchsorted(inicios, fechas[d], side='right')) - 1][1]
+            ordenadas = [c for c in sistema.base.condiciones if c in vigentes]
+            valor = curva[-1]
+            posiciones = {nombre: peso * valor
+                          for nombre, peso in sistema.recomendar_inversiones(perfil, 1.0, plazo, ordenadas).items()}
+            efectivo = valor - sum(posiciones.values())
+        posiciones = {nombre: monto * (1 + rendimientos[d, columnas[nombre]]) for nombre, monto in posiciones.items()}
+        curva.append(sum(posiciones.values()) + efectivo)
+    return np.array(curva)
+
+
+def test_curvas_como_un_bucle_diario(sistema):
+    fechas, nombres, rendimientos, condiciones = _escenario(sistema)
+    backtester = Backtester(sistema, fechas, nombres, rendimientos, condiciones)
+    perfiles = [PerfilRiesgo.CONSERVADOR, PerfilRiesgo.MODERADO, PerfilRiesgo.AGRESIVO, PerfilRiesgo.AGRESIVO]
+    plazos = [1, 4, 10, 0]
+    resultado = backtester.ejecutar(perfiles, [1.0] * 4, plazos, frecuencia=7)
+    assert set(resultado.dias_rebalanceo.tolist()) >= {0, 7, 10, 25}
+    for cliente, (perfil, plazo) in enumerate(zip(perfiles, plazos)):
+        esperada = _curva_ingenua(sistema, fechas, nombres, rendimientos, condiciones, perfil, plazo,
+                                  set(resultado.dias_rebalanceo.tolist()))
+        assert np.allclose(resultado.valores(np.array([cliente]))[0], esperada, rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize('frecuencia', [0, -5])
+def test_frecuencia_no_valida(sistema, frecuencia):
+    backtester = Backtester(sistema, *_escenario(sistema))
+    with pytest.raises(ValueError):
+        backtester.ejecutar([1], [1.0], [5], frecuencia=frecuencia)
+
+
+def test_metricas_moviles_como_ventanas_explicitas(sistema):
+    resultado = Backtester(sistema, *_escenario(sistema, dias=120)).ejecutar([1, 2, 3], [1.0] * 3, [3, 5, 10])
+    ventana = 20
+    caidas = resultado.drawdown_movil(ventana)
+    volatilidades = resultado.volatilidad_movil(ventana)
+    r = resultado.rendimientos_diarios()
+    for t in range(resultado.curvas.shape[1] - ventana):
+        tramo = resultado.curvas[:, t:t + ventana + 1]
+        assert np.array_equal(caidas[:, t], (tramo / np.maximum.accumulate(tramo, axis=1) - 1).min(axis=1))
+        assert np.allclose(volatilidades[:, t], r[:, t:t + ventana].std(axis=1, ddof=1) * np.sqrt(252), rtol=1e-6)
+    assert resultado.drawdown_movil(1_000).shape == (3, 0)
+
+
+def test_cargar_npz_y_csv(tmp_path):
+    fechas = np.array(['2021-01-04', '2021-01-05'])
+    rendimientos = np.array([[0.01, -0.02], [0.0, 0.03]])
+    np.savez(tmp_path / 'r.npz', rendimientos=rendimientos, nombres=np.array(['a', 'b']), fechas=fechas)
+    leidas, nombres, valores = cargar_rendimientos(str(tmp_path / 'r.npz'))
+    assert leidas.tolist() == fechas.tolist() and nombres == ['a', 'b'] and np.array_equal(valores, rendimientos)
+
+    (tmp_path / 'r.csv').write_text('fecha,a,b\n2021-01-04,0.01,-0.02\n2021-01-05,0.0,0.03\n')
+    leidas, nombres, valores = cargar_rendimientos(str(tmp_path / 'r.csv'))
+    assert leidas.tolist() == fechas.tolist() and nombres == ['a', 'b'] and np.array_equal(valores, rendimientos)
+
+    np.save(tmp_path / 'r.npy', rendimientos)
+    with pytest.raises(ValueError):
+        cargar_rendimientos(str(tmp_path / 'r.npy'))
+
+    (tmp_path / 'c.csv').write_text('fecha,condiciones\n2021-02-01,recesion;alta_inflacion\n2021-01-01,\n')
+    assert cargar_condiciones(str(tmp_path / 'c.csv')) == [('2021-01-01', []),
+                                                            ('2021-02-01', ['recesion', 'alta_inflacion'])]
@@ -0,0 +1,57 @@
+"""La base compilada frente a las tablas de diccionarios"""
+import random
+
+import pytest
+
+from conftest import recomendar_referencia
+from sistema_inversion import PerfilRiesgo
+
+
+def _consultas(sistema, n, semilla=0):
+    """Consultas aleatorias con condiciones desordenadas, repetidas o desconocidas"""
+    rng = random.Random(semilla)
+    condiciones = list(sistema.reglas_mercado) + ['desconocida']
+    for _ in range(n):
+        elegidas = [c for c in condiciones if rng.random() < 0.5]
+        rng.shuffle(elegidas)
+        if rng.random() < 0.1:
+            elegidas += elegidas
+        yield rng.choice(list(PerfilRiesgo)), rng.uniform(1, 1e6), rng.randint(0, 12), elegidas
+
+
+def test_recomendar_identico_a_la_referencia(sistema_grande):
+    for consulta in _consultas(sistema_grande, 500):
+        obtenido = sistema_grande.recomendar_inversiones(*consulta)
+        esperado = recomendar_referencia(sistema_grande, *consulta)
+        assert list(obtenido.items()) == list(esperado.items())
+
+
+def test_arreglos_reflejan_las_tablas(sistema):
+    base = sistema.base
+    assert base.nombres == tuple(sistema.instrumentos)
+    assert base.condiciones == tuple(sistema.reglas_mercado)
+    for i, (nombre, info) in enumerate(sistema.instrumentos.items()):
+        assert base.riesgo[i] == info['riesgo']
+        assert base.rendimiento_esperado[i] == info['rendimiento_esperado']
+        assert base.plazo_minimo[i] == info['plazo_minimo']
+        assert base.perfil_recomendado[i] == info['perfil_recomendado'].value
+        for j, ajustes in enumerate(sistema.reglas_mercado.values()):
+            assert base.ajustes[j, i] == ajustes[nombre]
+
+
+def test_arreglos_de_solo_lectura(sistema):
+    with pytest.raises(ValueError):
+        sistema.base.riesgo[0] = 1.0
+
+
+@pytest.mark.parametrize('modificar', [
+    lambda s: s.instrumentos['startups'].__setitem__('plazo_minimo', 1),
+    lambda s: s.reglas_mercado['recesion'].__setitem__('startups', 0.5),
+    lambda s: s.instrumentos.pop('bonos_gubernamentales'),
+])
+def test_modificar_las_tablas_recompila(sistema, modificar):
+    for consulta in _consultas(sistema, 50):
+        sistema.recomendar_inversiones(*consulta)
+    modificar(sistema)
+    for consulta in _consultas(sistema, 200, semilla=1):
+        assert sistema.recomendar_inversiones(*consulta) == recomendar_referencia(sistema, *consulta)
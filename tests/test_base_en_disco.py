@@ -0,0 +1,106 @@
+"""Base de conocimientos en disco, mapeada en memoria"""
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from base_en_disco import cargar_base, cargar_sistema, convertir_csv, convertir_json, guardar_base, main
+from conftest import recomendar_referencia
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+ATRIBUTOS = ('riesgo', 'rendimiento_esperado', 'liquidez', 'plazo_minimo', 'perfil_recomendado', 'ajustes')
+CONSULTAS = [(PerfilRiesgo.CONSERVADOR, 1_000.0, 1, []),
+             (PerfilRiesgo.MODERADO, 50_000.0, 5, ['recesion', 'alta_inflacion']),
+             (PerfilRiesgo.AGRESIVO, 250_000.0, 30, ['crecimiento_economico', 'recesion', 'recesion'])]
+
+
+def _mapeado(arreglo) -> bool:
+    while arreglo is not None:
+        if isinstance(arreglo, np.memmap):
+            return True
+        arreglo = getattr(arreglo, 'base', None)
+    return False
+
+
+def _misma_base(base, esperada):
+    assert list(base.nombres) == list(esperada.nombres)
+    assert base.condiciones == esperada.condiciones
+    for atributo in ATRIBUTOS:
+        assert np.array_equal(getattr(base, atributo), getattr(esperada, atributo)), atributo
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_ida_y_vuelta(tmp_path, sistema_grande, mmap):
+    guardar_base(sistema_grande.base, str(tmp_path))
+    base = cargar_base(str(tmp_path), mmap=mmap)
+    _misma_base(base, sistema_grande.base)
+    assert _mapeado(base.riesgo) == mmap
+    assert base.origen == str(tmp_path)
+    cargado = SistemaInversion(base=base)
+    for consulta in CONSULTAS:
+        assert cargado.recomendar_inversiones(*consulta) == sistema_grande.recomendar_inversiones(*consulta)
+    # Las tablas se materializan a partir de la base sin cambiar el resultado
+    assert cargado.instrumentos == sistema_grande.instrumentos
+    assert cargado.reglas_mercado == sistema_grande.reglas_mercado
+
+
+def test_formato_desconocido(tmp_path, sistema):
+    guardar_base(sistema.base, str(tmp_path))
+    (tmp_path / 'base.json').write_text(json.dumps({'formato': 99}))
+    with pytest.raises(ValueError):
+        cargar_base(str(tmp_path))
+
+
+def test_convertir_json(tmp_path, sistema):
+    catalogo = {
+        'instrumentos': {nombre: dict(info, perfil_recomendado=info['perfil_recomendado'].name)
+                         for nombre, info in sistema.instrumentos.items()},
+        'reglas_mercado': sistema.reglas_mercado,
+    }
+    (tmp_path / 'catalogo.json').write_text(json.dumps(catalogo))
+    main(['json', str(tmp_path / 'catalogo.json'), str(tmp_path / 'base')])
+    cargado = cargar_sistema(str(tmp_path / 'base'))
+    _misma_base(cargado.base, sistema.base)
+    for consulta in CONSULTAS:
+        assert cargado.recomendar_inversiones(*consulta) == recomendar_referencia(sistema, *consulta)
+
+
+def test_convertir_csv(tmp_path, sistema):
+    filas = ['nombre,riesgo,rendimiento_esperado,liquidez,plazo_minimo,perfil_recomendado']
+    for k, (nombre, info) in enumerate(sistema.instrumentos.items()):
+        # El perfil se acepta por nombre o por valor
+        perfil = info['perfil_recomendado'].name.lower() if k % 2 else info['perfil_recomendado'].value
+        filas.append(f"{nombre},{info['riesgo']!r},{info['rendimiento_esperado']!r},{info['liquidez']!r},"
+                     f"{info['plazo_minimo']},{perfil}")
+    (tmp_path / 'instrumentos.csv').write_text('\n'.join(filas) + '\n')
+    reglas = ['condicion,instrumento,ajuste'] + [f'{condicion},{nombre},{ajuste!r}'
+                                                 for condicion, tabla in sistema.reglas_mercado.items()
+                                                 for nombre, ajuste in tabla.items()]
+    (tmp_path / 'reglas.csv').write_text('\n'.join(reglas) + '\n')
+    base = convertir_csv(str(tmp_path / 'instrumentos.csv'), str(tmp_path / 'reglas.csv'), str(tmp_path / 'base'))
+    _misma_base(base, sistema.base)
+    _misma_base(cargar_base(str(tmp_path / 'base')), sistema.base)
+
+    sin_reglas = convertir_csv(str(tmp_path / 'instrumentos.csv'), None, str(tmp_path / 'sin_reglas'))
+    assert sin_reglas.condiciones == () and sin_reglas.ajustes.shape == (0, len(sistema.base))
+    assert cargar_base(str(tmp_path / 'sin_reglas')).condiciones == ()
+
+
+def test_pickle_solo_guarda_el_origen(tmp_path, sistema_grande):
+    guardar_base(sistema_grande.base, str(tmp_path))
+    cargado = cargar_sistema(str(tmp_path), capacidad_cache=32)
+    estado = cargado.__getstate__()
+    assert set(estado) == {'origen', 'capacidad_cache', 'motor'}
+    copia = pickle.loads(pickle.dumps(cargado))
+    assert copia.base.origen == str(tmp_path) and copia.cache_pesos.capacidad == 32
+    _misma_base(copia.base, sistema_grande.base)
+    for consulta in CONSULTAS:
+        assert copia.recomendar_inversiones(*consulta) == sistema_grande.recomendar_inversiones(*consulta)
+
+    # Una vez modificadas las tablas se serializan completas, con el cambio
+    cargado.instrumentos[cargado.base.nombres[0]]['riesgo'] = 0.99
+    estado = cargado.__getstate__()
+    assert 'origen' not in estado
+    copia = pickle.loads(pickle.dumps(cargado))
+    assert copia.base.riesgo[0] == 0.99
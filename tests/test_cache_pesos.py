@@ -0,0 +1,67 @@
+"""Caché de pesos normalizados de recomendar_inversiones"""
+import pytest
+
+from cache_lru import CacheLRU
+from conftest import recomendar_referencia
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+
+def test_acierto_con_otro_monto_y_plazo_del_mismo_tramo(sistema):
+    sistema.recomendar_inversiones(PerfilRiesgo.MODERADO, 1000.0, 5, ['recesion'])
+    # Los plazos 5 y 6 cubren los mismos plazos mínimos (1, 2, 3 y 5)
+    obtenido = sistema.recomendar_inversiones(PerfilRiesgo.MODERADO, 2500.0, 6, ['recesion'])
+    assert sistema.cache_pesos.aciertos == 1 and sistema.cache_pesos.fallos == 1
+    assert obtenido == recomendar_referencia(sistema, PerfilRiesgo.MODERADO, 2500.0, 6, ['recesion'])
+
+
+def test_fallo_al_cambiar_perfil_tramo_o_condiciones(sistema):
+    consultas = [
+        (PerfilRiesgo.MODERADO, 1000.0, 5, ['recesion']),
+        (PerfilRiesgo.AGRESIVO, 1000.0, 5, ['recesion']),
+        (PerfilRiesgo.MODERADO, 1000.0, 7, ['recesion']),
+        (PerfilRiesgo.MODERADO, 1000.0, 5, ['recesion', 'alta_inflacion']),
+    ]
+    for consulta in consultas:
+        assert sistema.recomendar_inversiones(*consulta) == recomendar_referencia(sistema, *consulta)
+    assert sistema.cache_pesos.aciertos == 0 and sistema.cache_pesos.fallos == len(consultas)
+
+
+@pytest.mark.parametrize('modificar', [
+    lambda s: s.reglas_mercado['recesion'].__setitem__('startups', 0.5),
+    lambda s: s.instrumentos['acciones_blue_chip'].__setitem__('plazo_minimo', 8),
+    lambda s: s.actualizar_condicion('recesion', {'startups': 0.5}),
+    lambda s: s.actualizar_instrumento('acciones_blue_chip', plazo_minimo=8),
+])
+def test_modificar_la_base_invalida(sistema, modificar):
+    consulta = (PerfilRiesgo.AGRESIVO, 1000.0, 10, ['recesion'])
+    sistema.recomendar_inversiones(*consulta)
+    modificar(sistema)
+    assert sistema.recomendar_inversiones(*consulta) == recomendar_referencia(sistema, *consulta)
+
+
+def test_cambiar_una_condicion_conserva_las_entradas_que_no_la_usan(sistema):
+    sin_recesion = (PerfilRiesgo.AGRESIVO, 1000.0, 10, ['alta_inflacion'])
+    sistema.recomendar_inversiones(*sin_recesion)
+    sistema.actualizar_condicion('recesion', {'startups': 0.5})
+    sistema.recomendar_inversiones(*sin_recesion)
+    assert sistema.cache_pesos.aciertos == 1
+
+
+def test_lru_descarta_la_entrada_menos_usada():
+    cache = CacheLRU(capacidad=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.obtener('a') == 1
+    cache.guardar('c', 3)
+    assert cache.obtener('b') is None
+    assert cache.estadisticas()['descartes'] == 1
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+
+def test_capacidad_acotada():
+    sistema = SistemaInversion(capacidad_cache=4)
+    for plazo in range(1, 11):
+        sistema.recomendar_inversiones(PerfilRiesgo.AGRESIVO, 1000.0, plazo, [])
+    assert len(sistema.cache_pesos) == 4
+    with pytest.raises(ValueError):
+        CacheLRU(capacidad=0)
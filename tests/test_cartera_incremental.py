@@ -0,0 +1,89 @@
+"""Cartera incremental frente a recalcular el lote completo"""
+import numpy as np
+import pytest
+
+from cartera_incremental import CarteraIncremental
+from conftest import recomendar_referencia, sistema_sintetico
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+
+def _esperado(cartera):
+    sistema = cartera.sistema
+    mascara = sistema.mascara_condiciones([cartera.condiciones] * len(cartera.montos))
+    return sistema.recomendar_inversiones_lote(cartera.perfiles, cartera.montos, cartera.plazos, mascara)
+
+
+def _comprobar(cartera):
+    esperado = _esperado(cartera)
+    assert np.allclose(cartera.asignaciones(), esperado, rtol=1e-10, atol=1e-9)
+    filas = np.arange(0, len(cartera.montos), 7)
+    assert np.allclose(cartera.pesos(filas) * cartera.montos[filas, None], esperado[filas], rtol=1e-10, atol=1e-9)
+
+
+def test_activar_y_desactivar(sistema_grande, inversores):
+    perfiles, montos, plazos, _ = inversores
+    cartera = CarteraIncremental(sistema_grande, perfiles, montos, plazos, ['recesion'])
+    _comprobar(cartera)
+    assert cartera.activar('alta_inflacion') and not cartera.activar('alta_inflacion')
+    assert not cartera.activar('desconocida')
+    _comprobar(cartera)
+    assert cartera.desactivar('recesion') and not cartera.desactivar('recesion')
+    _comprobar(cartera)
+    cartera.fijar_condiciones(['crecimiento_economico', 'recesion', 'crecimiento_economico'])
+    assert cartera.condiciones == ['crecimiento_economico', 'recesion']
+    _comprobar(cartera)
+    cartera.fijar_condiciones([])
+    _comprobar(cartera)
+
+
+def test_cambios_de_la_base(sistema_grande, inversores):
+    perfiles, montos, plazos, _ = inversores
+    cartera = CarteraIncremental(sistema_grande, perfiles, montos, plazos, ['recesion', 'alta_inflacion'])
+    nombres = sistema_grande.base.nombres
+    sistema_grande.actualizar_condicion('recesion', {nombres[0]: 0.5, nombres[-1]: -0.5})
+    _comprobar(cartera)
+    # Cambio de versión del catálogo: la cartera se reconstruye sola
+    sistema_grande.actualizar_instrumento(nombres[1], plazo_minimo=0, perfil_recomendado=PerfilRiesgo.CONSERVADOR)
+    _comprobar(cartera)
+    sistema_grande.reglas_mercado['alta_inflacion'][nombres[2]] = 0.9
+    _comprobar(cartera)
+    cartera.desactivar('alta_inflacion')
+    _comprobar(cartera)
+
+
+def test_ajuste_de_menos_uno_anula_el_instrumento():
+    sistema = SistemaInversion()
+    sistema.actualizar_condicion('recesion', {'startups': -1.0})
+    perfiles = [PerfilRiesgo.AGRESIVO] * 3
+    cartera = CarteraIncremental(sistema, perfiles, [1000.0, 0.0, 50.0], [10, 10, 1])
+    columna = sistema.base.indice['startups']
+    _comprobar(cartera)
+    cartera.activar('recesion')
+    _comprobar(cartera)
+    assert cartera.asignaciones()[0, columna] == 0.0
+    assert 0 in cartera.clientes_afectados('recesion').tolist()
+    esperado = recomendar_referencia(sistema, PerfilRiesgo.AGRESIVO, 1000.0, 10, ['recesion'])
+    assert np.allclose([cartera.asignaciones()[0, sistema.base.indice[n]] for n in esperado], list(esperado.values()))
+    cartera.desactivar('recesion')
+    _comprobar(cartera)
+    assert cartera.asignaciones()[0, columna] > 0.0
+
+
+def test_clientes_afectados():
+    sistema = sistema_sintetico(20)
+    nombres = sistema.base.nombres
+    sistema.reglas_mercado['neutra'] = {nombre: 0.0 for nombre in nombres}
+    sistema.reglas_mercado['solo_uno'] = {nombre: (0.3 if nombre == nombres[0] else 0.0) for nombre in nombres}
+    plazo_minimo = sistema.instrumentos[nombres[0]]['plazo_minimo']
+    perfil = sistema.instrumentos[nombres[0]]['perfil_recomendado'].value
+    cartera = CarteraIncremental(sistema, [perfil, perfil], [1.0, 1.0], [plazo_minimo, plazo_minimo - 1])
+    assert cartera.clientes_afectados('neutra').tolist() == []
+    assert cartera.clientes_afectados('solo_uno').tolist() == [0]
+    assert cartera.clientes_afectados('desconocida').tolist() == []
+
+
+def test_multiplicador_negativo_no_admitido():
+    sistema = SistemaInversion()
+    sistema.actualizar_condicion('recesion', {'startups': -1.5})
+    with pytest.raises(ValueError):
+        CarteraIncremental(sistema, [1], [1.0], [5])
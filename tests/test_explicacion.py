@@ -0,0 +1,39 @@
+"""Explicaciones construidas con fragmentos en caché"""
+import io
+import random
+
+from conftest import explicar_referencia
+from sistema_inversion import PerfilRiesgo
+
+
+def _lote(sistema, n, semilla=0):
+    rng = random.Random(semilla)
+    condiciones = list(sistema.reglas_mercado) + ['desconocida']
+    for _ in range(n):
+        perfil = rng.choice(list(PerfilRiesgo))
+        elegidas = [c for c in condiciones if rng.random() < 0.5]
+        recomendaciones = sistema.recomendar_inversiones(perfil, rng.uniform(0, 1e7), rng.randint(0, 12), elegidas)
+        yield recomendaciones, perfil, elegidas
+
+
+def test_explicacion_identica_a_la_referencia(sistema_grande):
+    for recomendaciones, perfil, condiciones in _lote(sistema_grande, 300):
+        assert (sistema_grande.explicar_recomendacion(recomendaciones, perfil, condiciones)
+                == explicar_referencia(sistema_grande, recomendaciones, perfil, condiciones))
+
+
+def test_escribir_explicaciones_en_un_flujo(sistema):
+    lote = list(_lote(sistema, 50))
+    salida = io.StringIO()
+    assert sistema.escribir_explicaciones(salida, lote) == len(lote)
+    assert salida.getvalue() == '\n'.join(explicar_referencia(sistema, *argumentos) for argumentos in lote)
+
+
+def test_fragmentos_siguen_a_la_base(sistema):
+    recomendaciones = sistema.recomendar_inversiones(PerfilRiesgo.AGRESIVO, 1000.0, 10, [])
+    sistema.explicar_recomendacion(recomendaciones, PerfilRiesgo.AGRESIVO, [])
+    sistema.actualizar_instrumento('startups', riesgo=0.55)
+    sistema.instrumentos['bienes_raices']['rendimiento_esperado'] = 0.2
+    recomendaciones = sistema.recomendar_inversiones(PerfilRiesgo.AGRESIVO, 1000.0, 10, [])
+    assert (sistema.explicar_recomendacion(recomendaciones, PerfilRiesgo.AGRESIVO, [])
+            == explicar_referencia(sistema, recomendaciones, PerfilRiesgo.AGRESIVO, []))
@@ -0,0 +1,67 @@
+"""Procesamiento en flujo frente a recomendar_inversiones"""
+import io
+import json
+
+import pytest
+
+from almacen_resultados import AlmacenResultados
+from flujo_recomendaciones import EscritorRecomendaciones, leer_filas_csv, procesar_filas
+
+FILAS = [
+    ('a', {'tolerancia_riesgo': 3, 'horizonte_temporal': 3}, 100_000.0, 10, ['recesion']),
+    ('b', {'tolerancia_riesgo': 1, 'horizonte_temporal': 2}, 2_500.0, 3, []),
+    ('c', {'tolerancia_riesgo': 2, 'horizonte_temporal': 2}, 0.0, 8, ['alta_inflacion', 'recesion']),
+    ('d', {'tolerancia_riesgo': 1, 'horizonte_temporal': 1}, 5_000.0, 0, []),
+    # Condiciones repetidas o fuera del orden de reglas_mercado
+    ('e', {'tolerancia_riesgo': 2, 'horizonte_temporal': 2}, 100_000.0, 10, ['recesion', 'recesion']),
+    ('f', {'tolerancia_riesgo': 3, 'horizonte_temporal': 3}, 123_456.78, 10,
+     ['crecimiento_economico', 'recesion', 'alta_inflacion']),
+    ('g', {'tolerancia_riesgo': 3, 'horizonte_temporal': 3}, 123_456.78, 10,
+     ['alta_inflacion', 'recesion', 'crecimiento_economico']),
+]
+
+
+def _escalar(sistema, fila):
+    _, respuestas, monto, plazo, condiciones = fila
+    return sistema.recomendar_inversiones(sistema.evaluar_perfil(respuestas), monto, plazo, condiciones)
+
+
+@pytest.mark.parametrize('con_almacen', [False, True], ids=['sin_almacen', 'con_almacen'])
+@pytest.mark.parametrize('tam_lote', [1, 3, 100])
+def test_jsonl_identico_al_escalar(sistema, tam_lote, con_almacen):
+    # Con un ajuste de -1 un instrumento válido recibe 0.0 y debe seguir apareciendo
+    sistema.actualizar_condicion('recesion', {'startups': -1.0})
+    almacen = AlmacenResultados(':memory:') if con_almacen else None
+    salida = io.StringIO()
+    escritor = EscritorRecomendaciones(salida, 'jsonl', sistema.base.nombres)
+    # Con almacén, la segunda pasada lee del almacén lo que guardó la primera
+    for _ in range(2 if con_almacen else 1):
+        salida.seek(0)
+        salida.truncate()
+        procesar_filas(FILAS, escritor, sistema, tam_lote, almacen)
+    registros = [json.loads(linea) for linea in salida.getvalue().splitlines()]
+    assert [r['id'] for r in registros] == [fila[0] for fila in FILAS]
+    for registro, fila in zip(registros, FILAS):
+        assert registro['recomendaciones'] == _escalar(sistema, fila)
+    assert registros[0]['recomendaciones']['startups'] == 0.0
+
+
+def test_csv_una_columna_por_instrumento(sistema):
+    salida = io.StringIO()
+    estadisticas = procesar_filas(FILAS, EscritorRecomendaciones(salida, 'csv', sistema.base.nombres), sistema, 2)
+    assert (estadisticas.filas, estadisticas.lotes) == (len(FILAS), (len(FILAS) + 1) // 2)
+    salida.seek(0)
+    lineas = salida.getvalue().splitlines()
+    assert lineas[0].split(',') == ['id', 'perfil'] + list(sistema.base.nombres)
+    for linea, fila in zip(lineas[1:], FILAS):
+        valores = [float(v) for v in linea.split(',')[2:]]
+        esperado = _escalar(sistema, fila)
+        assert valores == [esperado.get(nombre, 0.0) for nombre in sistema.base.nombres]
+
+
+def test_leer_csv():
+    archivo = io.StringIO('id,tolerancia_riesgo,monto,plazo,condiciones\nx,2,10.5,4,recesion;alta_inflacion\n,1,3,1,\n')
+    assert list(leer_filas_csv(archivo)) == [
+        ('x', {'tolerancia_riesgo': 2}, 10.5, 4, ['recesion', 'alta_inflacion']),
+        ('2', {'tolerancia_riesgo': 1}, 3.0, 1, []),
+    ]
@@ -0,0 +1,61 @@
+"""Índice de instrumentos por perfil y plazo mínimo"""
+import random
+
+import numpy as np
+import pytest
+
+from indice_instrumentos import IndiceInstrumentos
+
+
+def _reconstruido(tabla):
+    return IndiceInstrumentos.construir(list(tabla), [plazo for plazo, _ in tabla.values()],
+                                        [perfil for _, perfil in tabla.values()])
+
+
+def _comparar(indice, tabla):
+    esperado = _reconstruido(tabla)
+    assert len(indice) == len(esperado) == len(tabla)
+    for perfil_maximo in range(0, 5):
+        for plazo in range(-1, 22):
+            obtenidos = indice.validos(perfil_maximo, plazo)
+            assert obtenidos == esperado.validos(perfil_maximo, plazo)
+            # El mismo resultado, en el mismo orden, que recorrer la tabla
+            assert obtenidos == [nombre for nombre, (minimo, perfil) in tabla.items()
+                                 if perfil <= perfil_maximo and minimo <= plazo]
+
+
+@pytest.mark.parametrize('semilla', range(3))
+def test_operaciones_como_reconstruir(semilla):
+    rng = random.Random(semilla)
+    # Un dict conserva la posición al actualizar y pone al final lo que se vuelve a añadir,
+    # igual que las tablas de SistemaInversion
+    tabla = {f'i{k}': (rng.randint(0, 20), rng.randint(1, 3)) for k in range(40)}
+    indice = _reconstruido(tabla)
+    _comparar(indice, tabla)
+    for paso in range(400):
+        nombre = f'i{rng.randint(0, 60)}'
+        operacion = rng.random()
+        if operacion < 0.4:
+            tabla[nombre] = (rng.randint(0, 20), rng.randint(1, 3))
+            indice.agregar(nombre, *tabla[nombre])
+        elif operacion < 0.5 and nombre in tabla:
+            # Actualizar sin cambios no mueve nada
+            indice.agregar(nombre, *tabla[nombre])
+        else:
+            tabla.pop(nombre, None)
+            indice.eliminar(nombre)
+        assert (nombre in indice) == (nombre in tabla)
+        if paso % 20 == 0:
+            _comparar(indice, tabla)
+    _comparar(indice, tabla)
+
+
+def test_volver_a_anadir_va_al_final():
+    indice = IndiceInstrumentos.construir(['a', 'b', 'c'], np.array([1, 1, 1]), np.array([1, 1, 1]))
+    indice.eliminar('a')
+    indice.eliminar('no_existe')
+    indice.agregar('a', 1, 1)
+    indice.agregar('b', 0, 2)
+    assert indice.validos(3, 5) == ['b', 'c', 'a']
+    assert indice.validos(1, 5) == ['c', 'a']
+    assert indice.validos(3, 0) == ['b']
@@ -0,0 +1,46 @@
+"""Instrumentación de las etapas de SistemaInversion"""
+import threading
+
+from instrumentacion import Instrumentacion
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+
+def test_desglose_sin_etapas_de_una_recomendacion_anterior():
+    sistema = SistemaInversion(instrumentacion=Instrumentacion())
+    inst = sistema.instrumentacion
+    sistema.recomendar_inversiones(PerfilRiesgo.MODERADO, 1000.0, 5, ['recesion'])
+    assert {'filtrado', 'puntuacion', 'reparto', 'recomendar'} <= set(inst.ultima_ejecucion())
+    # Acierto de caché sin iniciar_ejecucion: no hay filtrado ni puntuación que mostrar
+    inst.registrar('evaluar_perfil', 0.001)
+    sistema.recomendar_inversiones(PerfilRiesgo.MODERADO, 2000.0, 5, ['recesion'])
+    assert set(inst.ultima_ejecucion()) == {'evaluar_perfil', 'recomendar', 'reparto'}
+    assert 'filtrado' not in inst.desglose()
+    assert inst.instantanea()['etapas']['filtrado']['llamadas'] == 1
+    assert inst.instantanea()['contadores']['cache_aciertos'] == 1
+
+
+def test_desglose_por_hilo():
+    inst = Instrumentacion()
+    inst.registrar('recomendar', 0.5)
+    otro = {}
+    hilo = threading.Thread(target=lambda: (inst.registrar('explicacion', 0.25), otro.update(inst.ultima_ejecucion())))
+    hilo.start()
+    hilo.join()
+    assert otro == {'explicacion': 0.25}
+    assert inst.ultima_ejecucion() == {'recomendar': 0.5}
+    assert inst.instantanea()['etapas']['explicacion']['llamadas'] == 1
+
+
+def test_sin_instrumentacion_no_mide():
+    sistema = SistemaInversion()
+    assert sistema.recomendar_inversiones(PerfilRiesgo.AGRESIVO, 1.0, 10, []) == \
+        SistemaInversion(instrumentacion=Instrumentacion()).recomendar_inversiones(PerfilRiesgo.AGRESIVO, 1.0, 10, [])
+
+
+def test_prometheus():
+    inst = Instrumentacion()
+    inst.registrar('recomendar', 0.5)
+    inst.contar('recomendaciones')
+    texto = inst.prometheus()
+    assert 'sistema_inversion_etapa_segundos_total{etapa="recomendar"} 0.5' in texto
+    assert 'sistema_inversion_recomendaciones_total 1' in texto
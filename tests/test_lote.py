@@ -0,0 +1,56 @@
+"""La API por lotes frente a recomendar_inversiones"""
+import numpy as np
+
+from conftest import como_lote, recomendar_referencia
+from motores_asignacion import suma_secuencial
+from sistema_inversion import PerfilRiesgo, sumar_en_orden
+
+
+def _argumentos(sistema, perfiles, montos, plazos, mascara):
+    condiciones = sistema.base.condiciones
+    for i in range(len(perfiles)):
+        yield (PerfilRiesgo(int(perfiles[i])), float(montos[i]), int(plazos[i]),
+               [c for c, activa in zip(condiciones, mascara[i]) if activa])
+
+
+def test_lote_identico_al_escalar(sistema_grande, inversores):
+    lote = sistema_grande.recomendar_inversiones_lote(*inversores)
+    for fila, argumentos in zip(lote.tolist(), _argumentos(sistema_grande, *inversores)):
+        assert fila == como_lote(sistema_grande, sistema_grande.recomendar_inversiones(*argumentos))
+
+
+def test_lote_identico_a_la_referencia(sistema_grande, inversores):
+    lote = sistema_grande.recomendar_inversiones_lote(*inversores)
+    for fila, argumentos in zip(lote.tolist(), _argumentos(sistema_grande, *inversores)):
+        assert fila == como_lote(sistema_grande, recomendar_referencia(sistema_grande, *argumentos))
+
+
+def test_lote_sin_instrumentos_validos(sistema):
+    lote = sistema.recomendar_inversiones_lote([PerfilRiesgo.CONSERVADOR], [1000.0], [0], np.zeros((1, 3), dtype=bool))
+    assert lote.tolist() == [[0.0] * len(sistema.base)]
+
+
+def test_sumas_sin_compensacion():
+    # Una suma compensada (sum() desde Python 3.12, math.fsum) daría 1.0
+    valores = [1e16, 1.0, -1e16]
+    assert suma_secuencial(valores) == 0.0
+    assert sumar_en_orden(np.array([valores]))[0, 0] == 0.0
+    rng = np.random.default_rng(0)
+    filas = rng.random((200, 50))
+    assert sumar_en_orden(filas)[:, 0].tolist() == [suma_secuencial(fila) for fila in filas.tolist()]
+
+
+def test_listas_con_condiciones_repetidas_o_desordenadas(sistema_grande):
+    condiciones = list(sistema_grande.base.condiciones)
+    listas = [condiciones, condiciones[::-1], condiciones[:1] * 2, [], ['desconocida'] + condiciones[1:],
+              condiciones[1:] + condiciones[:1] + ['desconocida']]
+    assert [sistema_grande.orden_canonico(lista) for lista in listas] == [True, False, False, True, True, False]
+    perfiles = [PerfilRiesgo.AGRESIVO] * len(listas)
+    montos = [123_456.78] * len(listas)
+    plazos = [30] * len(listas)
+    lote = sistema_grande.recomendar_inversiones_listas(perfiles, montos, plazos, listas)
+    for fila, lista in zip(lote.tolist(), listas):
+        esperado = sistema_grande.recomendar_inversiones(PerfilRiesgo.AGRESIVO, 123_456.78, 30, lista)
+        assert fila == como_lote(sistema_grande, esperado)
+        assert fila == como_lote(sistema_grande, recomendar_referencia(sistema_grande, PerfilRiesgo.AGRESIVO,
+                                                                       123_456.78, 30, lista))
@@ -0,0 +1,87 @@
+"""ModeloAsignacion: notificaciones a la vista al cambiar de cartera"""
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+from PyQt5.QtTest import QAbstractItemModelTester  # noqa: E402
+
+from main import ModeloAsignacion  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def aplicacion():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def modelo(aplicacion, sistema):
+    modelo = ModeloAsignacion()
+    # El tester comprueba la coherencia de cada señal de inserción, eliminación y cambio
+    modelo.tester = QAbstractItemModelTester(modelo, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    senales = {'insertadas': 0, 'eliminadas': 0, 'cambiadas': 0}
+
+    def contar(clave, primera, ultima):
+        senales[clave] += ultima - primera + 1
+
+    modelo.rowsInserted.connect(lambda _, primera, ultima: contar('insertadas', primera, ultima))
+    modelo.rowsRemoved.connect(lambda _, primera, ultima: contar('eliminadas', primera, ultima))
+    modelo.dataChanged.connect(lambda inicio, fin, *_: contar('cambiadas', inicio.row(), fin.row()))
+    modelo.senales = senales
+    modelo.actualizar(sistema.base, np.array([0, 2, 3, 4]), np.array([100.0, 200.0, 300.0, 400.0]))
+    for clave in senales:
+        senales[clave] = 0
+    return modelo
+
+
+def _contenido(modelo):
+    return [[modelo.data(modelo.index(fila, columna)) for columna in range(2)] for fila in range(modelo.rowCount())]
+
+
+def _esperado(base, ids, montos):
+    return [[base.nombres[i], f"${monto:,.2f}"] for i, monto in zip(ids, montos)]
+
+
+@pytest.mark.parametrize('ids, montos, insertadas, eliminadas, cambiadas', [
+    # Se inserta una fila con el mismo total: las demás no cambian
+    ([0, 1, 2, 3, 4], [100.0, 0.0, 200.0, 300.0, 400.0], 1, 0, 0),
+    # Se inserta una fila y cambia el total: cambian los pesos de las cuatro que se mantienen
+    ([0, 1, 2, 3, 4], [100.0, 50.0, 200.0, 300.0, 400.0], 1, 0, 4),
+    # Se eliminan dos filas; el total cambia, así que las que quedan también
+    ([0, 4], [100.0, 400.0], 0, 2, 2),
+    # Se elimina una y se inserta otra con el mismo total
+    ([0, 1, 2, 3], [100.0, 400.0, 200.0, 300.0], 1, 1, 0),
+    # Solo cambian montos
+    ([0, 2, 3, 4], [100.0, 300.0, 200.0, 400.0], 0, 0, 2),
+    # Nada cambia
+    ([0, 2, 3, 4], [100.0, 200.0, 300.0, 400.0], 0, 0, 0),
+])
+def test_filas_actualizadas(modelo, sistema, ids, montos, insertadas, eliminadas, cambiadas):
+    ids, montos = np.array(ids), np.array(montos)
+    modelo.actualizar(sistema.base, ids, montos)
+    assert modelo.senales == {'insertadas': insertadas, 'eliminadas': eliminadas, 'cambiadas': cambiadas}
+    assert modelo.filas_actualizadas == insertadas + eliminadas + cambiadas
+    assert _contenido(modelo) == _esperado(sistema.base, ids, montos)
+
+
+def test_secuencia(modelo, sistema):
+    rng = np.random.default_rng(7)
+    anteriores = dict(zip([0, 2, 3, 4], [100.0, 200.0, 300.0, 400.0]))
+    for _ in range(100):
+        ids = np.flatnonzero(rng.random(len(sistema.base)) < 0.6)
+        montos = rng.integers(0, 4, len(ids)) * 100.0
+        nuevos = dict(zip(ids.tolist(), montos.tolist()))
+        total_anterior, total = sum(anteriores.values()), sum(nuevos.values())
+        cambiadas = sum(1 for i in nuevos.keys() & anteriores.keys()
+                        if nuevos[i] != anteriores[i] or (total_anterior and total
+                                                          and nuevos[i] / total != anteriores[i] / total_anterior))
+        # Cada fila se notifica una sola vez: como insertada, eliminada o cambiada
+        esperadas = len(nuevos.keys() ^ anteriores.keys()) + cambiadas
+        for clave in modelo.senales:
+            modelo.senales[clave] = 0
+        modelo.actualizar(sistema.base, ids, montos)
+        assert _contenido(modelo) == _esperado(sistema.base, ids, montos)
+        assert modelo.filas_actualizadas == sum(modelo.senales.values()) == esperadas
+        anteriores = nuevos
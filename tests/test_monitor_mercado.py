@@ -0,0 +1,133 @@
+"""Monitor de mercado: condiciones con histéresis y alertas de rebalanceo"""
+import asyncio
+import io
+
+import numpy as np
+import pytest
+
+from cartera_incremental import CarteraIncremental
+from monitor_mercado import (MonitorMercado, Tick, UmbralCondicion, UMBRALES_PREDETERMINADOS, leer_ticks_csv,
+                             leer_ticks_jsonl)
+from sistema_inversion import PerfilRiesgo
+
+INFLACION = UmbralCondicion('alta_inflacion', 'inflacion', activar=5.0, desactivar=4.0)
+
+
+def _ticks(indicador, valores):
+    return [Tick(str(k), indicador, valor) for k, valor in enumerate(valores)]
+
+
+def _cartera(sistema, inversores, condiciones=()):
+    perfiles, montos, plazos, _ = inversores
+    return CarteraIncremental(sistema, perfiles, montos, plazos, condiciones)
+
+
+def _pesos_lote(sistema, cartera, condiciones):
+    mascara = sistema.mascara_condiciones([list(condiciones)] * len(cartera.montos))
+    return sistema.recomendar_inversiones_lote(cartera.perfiles, np.ones(len(cartera.montos)), cartera.plazos, mascara)
+
+
+@pytest.mark.parametrize('umbral, valores, estados', [
+    (INFLACION, [4.9, 5.0, 4.5, 4.01, 5.5, 4.0, 4.9, 3.0], [False, True, True, True, True, False, False, False]),
+    # Umbral inverso: se activa al bajar (recesión con el crecimiento del PIB)
+    (UmbralCondicion('recesion', 'crecimiento_pib', activar=-0.5, desactivar=0.5),
+     [0.0, -0.5, 0.0, 0.49, 0.5, -0.4], [False, True, True, True, False, False]),
+])
+def test_histeresis(umbral, valores, estados):
+    activa, obtenidos = False, []
+    for valor in valores:
+        activa = umbral.siguiente(activa, valor)
+        obtenidos.append(activa)
+    assert obtenidos == estados
+
+
+def test_oscilar_cerca_del_umbral_no_cambia_la_condicion(sistema_grande, inversores):
+    monitor = MonitorMercado(_cartera(sistema_grande, inversores), [INFLACION])
+    oscilacion = [4.9, 5.1, 4.8, 5.2, 4.5, 4.9, 4.1, 4.6, 3.9, 4.5, 4.9]
+    list(monitor.monitorizar(_ticks('inflacion', oscilacion)))
+    # Se activa en 5.1 y solo se desactiva al bajar de 4.0
+    assert monitor.estadisticas.cambios_condicion == 2
+    assert monitor.activas == {'alta_inflacion': False}
+    assert monitor.valores == {'inflacion': 4.9}
+    assert monitor.estadisticas.ticks == len(oscilacion)
+    # Los indicadores sin umbral solo se registran
+    assert monitor.procesar(Tick('x', 'desempleo', 9.0)) is None and monitor.valores['desempleo'] == 9.0
+
+
+def test_deriva_y_alertas(sistema_grande, inversores):
+    cartera = _cartera(sistema_grande, inversores)
+    monitor = MonitorMercado(cartera, [INFLACION], umbral_deriva=0.02)
+    referencia = monitor.referencia.copy()
+    assert np.allclose(referencia, _pesos_lote(sistema_grande, cartera, []), atol=1e-12)
+
+    alerta = monitor.procesar(Tick('t1', 'inflacion', 6.0))
+    objetivo = _pesos_lote(sistema_grande, cartera, ['alta_inflacion'])
+    derivas = 0.5 * np.abs(objetivo - referencia).sum(axis=1)
+    esperados = np.flatnonzero(derivas > 0.02)
+    assert alerta is not None and alerta.marca == 't1'
+    assert alerta.cambios == ('alta_inflacion',) and alerta.condiciones == ('alta_inflacion',)
+    assert alerta.clientes.tolist() == esperados.tolist()
+    assert np.allclose(alerta.derivas, derivas[esperados], atol=1e-12)
+    assert set(alerta.clientes.tolist()) <= set(cartera.clientes_afectados('alta_inflacion').tolist())
+    # Los alertados rebalancean; el resto conserva su referencia
+    assert np.allclose(monitor.referencia[esperados], objetivo[esperados], atol=1e-12)
+    resto = np.setdiff1d(np.arange(len(referencia)), esperados)
+    assert np.array_equal(monitor.referencia[resto], referencia[resto])
+    assert (monitor.estadisticas.alertas, monitor.estadisticas.clientes_alertados) == (1, len(esperados))
+
+    # Un tick que no cambia ninguna condición no alerta
+    assert monitor.procesar(Tick('t2', 'inflacion', 7.0)) is None
+
+
+def test_sin_rebalancear_volver_atras_no_alerta(sistema_grande, inversores):
+    monitor = MonitorMercado(_cartera(sistema_grande, inversores), [INFLACION], umbral_deriva=0.0, rebalancear=False)
+    referencia = monitor.referencia.copy()
+    assert monitor.procesar(Tick('1', 'inflacion', 6.0)) is not None
+    assert np.array_equal(monitor.referencia, referencia)
+    # De vuelta a las condiciones iniciales la cartera recomendada es la de referencia
+    assert monitor.procesar(Tick('2', 'inflacion', 3.0)) is None
+
+
+def test_umbral_de_deriva_alto_no_alerta(sistema_grande, inversores):
+    monitor = MonitorMercado(_cartera(sistema_grande, inversores), umbral_deriva=1.0)
+    assert list(monitor.monitorizar(_ticks('inflacion', [6.0, 3.0]) + _ticks('crecimiento_pib', [3.0, -1.0]))) == []
+    # El PIB de 3.0 a -1.0 desactiva crecimiento_economico y activa recesion en el mismo tick
+    assert monitor.estadisticas.cambios_condicion == 5 and monitor.estadisticas.alertas == 0
+
+
+def test_asincrono_como_sincrono(sistema_grande, inversores):
+    ticks = (_ticks('inflacion', [4.0, 5.5, 4.5, 3.5, 6.0]) + _ticks('crecimiento_pib', [1.0, 3.0, -1.0, 0.0, 2.0]))
+    sincrono = list(MonitorMercado(_cartera(sistema_grande, inversores)).monitorizar(ticks))
+
+    async def fuente():
+        for tick in ticks:
+            yield tick
+
+    async def consumir():
+        monitor = MonitorMercado(_cartera(sistema_grande, inversores))
+        return [alerta async for alerta in monitor.monitorizar_async(fuente())]
+
+    asincrono = asyncio.run(consumir())
+    assert len(asincrono) == len(sincrono) > 0
+    for a, b in zip(asincrono, sincrono):
+        assert (a.marca, a.cambios, a.condiciones) == (b.marca, b.cambios, b.condiciones)
+        assert np.array_equal(a.clientes, b.clientes) and np.array_equal(a.derivas, b.derivas)
+
+
+def test_estado_inicial_y_errores(sistema, inversores):
+    cartera = CarteraIncremental(sistema, [PerfilRiesgo.MODERADO], [1.0], [5], ['recesion'])
+    assert MonitorMercado(cartera).activas == {'alta_inflacion': False, 'recesion': True,
+                                               'crecimiento_economico': False}
+    with pytest.raises(ValueError):
+        MonitorMercado(cartera, umbral_deriva=1.5)
+    with pytest.raises(ValueError):
+        MonitorMercado(cartera, [UmbralCondicion('desconocida', 'x', 1.0, 0.0)])
+    with pytest.raises(ValueError):
+        MonitorMercado(cartera, UMBRALES_PREDETERMINADOS + (INFLACION,))
+
+
+def test_leer_ticks():
+    assert list(leer_ticks_csv(io.StringIO('indicador,valor,marca\ninflacion,5.5,t1\n\n'))) == [
+        Tick('t1', 'inflacion', 5.5)]
+    assert list(leer_ticks_jsonl(io.StringIO('{"indicador": "inflacion", "valor": 4}\n\n'))) == [
+        Tick('1', 'inflacion', 4.0)]
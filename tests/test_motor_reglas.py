@@ -0,0 +1,95 @@
+"""Motor de reglas con red de tipo Rete"""
+import random
+
+import pytest
+
+from motor_reglas import Condicion, MotorReglas, Regla
+from sistema_inversion import PerfilRiesgo
+
+
+def test_operador_en_con_lista():
+    motor = MotorReglas([
+        Regla('arriesgado', [('perfil', 'en', ['MODERADO', 'AGRESIVO'])], concluye={'arriesgado': True}),
+        Regla('corto', [Condicion('plazo', 'en', {1, 2})]),
+    ])
+    motor.actualizar({'perfil': 'AGRESIVO', 'plazo': 2})
+    assert list(motor.activas) == ['arriesgado', 'corto']
+    assert motor.hechos['arriesgado'] is True
+    motor.actualizar({'perfil': 'CONSERVADOR', 'plazo': 5})
+    assert not motor.activas and 'arriesgado' not in motor.hechos
+
+
+def test_operador_en_sobre_instrumentos(sistema):
+    regla = Regla('no_conservadores', [('recesion', '==', True)], ajuste=-0.5,
+                  sobre_instrumentos=[('perfil_recomendado', 'en', [2, 3])])
+    factores = regla.factores(sistema.base)
+    assert factores.tolist() == [1.0 if info['perfil_recomendado'] is PerfilRiesgo.CONSERVADOR else 0.5
+                                 for info in sistema.instrumentos.values()]
+
+
+def test_condiciones_iguales_comparten_nodo():
+    motor = MotorReglas([
+        Regla('a', [('perfil', 'en', ['MODERADO', 'AGRESIVO'])]),
+        Regla('b', [('perfil', 'en', ('MODERADO', 'AGRESIVO'))]),
+    ])
+    assert motor.estadisticas()['nodos_alfa'] == 1
+
+
+def test_sin_activaciones_espurias():
+    # El nodo beta (v<3, v>3) y su padre (v<3) cambian con el mismo hecho: si el hijo se
+    # evaluara antes que el padre, la regla se activaría un instante
+    motor = MotorReglas([
+        Regla('imposible', [('v', '<', 3), ('v', '>', 3)], concluye={'alerta': True}),
+        Regla('bajo', [('v', '<', 3)]),
+    ])
+    activadas = []
+    activar = motor._activar
+    motor._activar = lambda regla: activadas.append(regla.nombre) or activar(regla)
+    motor.actualizar({'v': 1})
+    motor.actualizar({'v': 5})
+    assert activadas == ['bajo']
+    assert not motor.activas and 'alerta' not in motor.hechos
+
+
+def test_orden_de_activacion_sigue_a_los_hechos(sistema):
+    motor = MotorReglas.desde_reglas_mercado(sistema.reglas_mercado)
+    motor.actualizar({'recesion': True, 'alta_inflacion': True, 'crecimiento_economico': True})
+    assert list(motor.activas) == ['recesion', 'alta_inflacion', 'crecimiento_economico']
+
+
+def test_encadenamiento_y_retirada():
+    motor = MotorReglas([
+        Regla('inflacion_alta', [('inflacion', '>', 5)], concluye={'alta_inflacion': True}),
+        Regla('refugio', [('alta_inflacion', '==', True), ('perfil', '==', 'CONSERVADOR')]),
+    ])
+    motor.actualizar({'inflacion': 7, 'perfil': 'CONSERVADOR'})
+    assert list(motor.activas) == ['inflacion_alta', 'refugio']
+    motor.retirar('inflacion')
+    assert not motor.activas and 'alta_inflacion' not in motor.hechos
+
+
+def test_retirar_hecho_con_valor_none():
+    motor = MotorReglas([Regla('sin_dato', [('dato', '==', None)], concluye={'falta_dato': True}),
+                         Regla('aviso', [('falta_dato', '==', True)])])
+    motor.actualizar({'dato': None})
+    assert list(motor.activas) == ['sin_dato', 'aviso']
+    motor.retirar('dato', 'dato', 'no_afirmado')
+    assert not motor.activas and 'dato' not in motor.hechos and 'falta_dato' not in motor.hechos
+
+
+def test_regla_sin_condiciones():
+    with pytest.raises(ValueError):
+        Regla('vacia', [])
+
+
+def test_recomendar_con_reglas_identico_al_escalar(sistema_grande):
+    motor = MotorReglas.desde_reglas_mercado(sistema_grande.reglas_mercado)
+    condiciones = list(sistema_grande.reglas_mercado)
+    rng = random.Random(5)
+    for _ in range(500):
+        perfil, monto, plazo = rng.choice(list(PerfilRiesgo)), rng.uniform(1, 1e6), rng.randint(0, 12)
+        elegidas = [c for c in condiciones if rng.random() < 0.5]
+        rng.shuffle(elegidas)
+        obtenido = sistema_grande.recomendar_con_reglas(perfil, monto, plazo, motor, dict.fromkeys(elegidas, True))
+        esperado = sistema_grande.recomendar_inversiones(perfil, monto, plazo, list(motor.activas))
+        assert list(obtenido.items()) == list(esperado.items())
@@ -0,0 +1,81 @@
+"""Motores de asignación"""
+import numpy as np
+import pytest
+
+from conftest import recomendar_referencia
+from motores_asignacion import MotorAsignacion, MotorHeuristico, MotorMediaVarianza
+from sistema_inversion import PerfilRiesgo
+
+
+def _kkt(motor, mu, sigma, aversion, w, tolerancia=1e-7):
+    """Comprueba las condiciones de optimalidad de max w·μ - (γ/2)wᵀΣw con Σw = 1 y 0 ≤ w ≤ cota"""
+    covarianza = motor.correlacion * np.outer(sigma, sigma)
+    np.fill_diagonal(covarianza, sigma ** 2)
+    gradiente = mu - aversion * (covarianza @ w)
+    interiores = (w > tolerancia) & (w < motor.peso_maximo - tolerancia)
+    nu = gradiente[interiores].mean() if interiores.any() else None
+    assert abs(w.sum() - 1.0) < 1e-9
+    assert (w >= 0).all() and (w <= motor.peso_maximo + 1e-12).all()
+    if nu is not None:
+        assert np.allclose(gradiente[interiores], nu, atol=1e-7)
+        assert (gradiente[w <= tolerancia] <= nu + 1e-7).all()
+        assert (gradiente[w >= motor.peso_maximo - tolerancia] >= nu - 1e-7).all()
+
+
+@pytest.mark.parametrize('correlacion', [0.0, 0.3, 0.8])
+@pytest.mark.parametrize('peso_maximo', [1.0, 0.2])
+def test_media_varianza_cumple_kkt(correlacion, peso_maximo):
+    rng = np.random.default_rng(3)
+    mu = rng.uniform(0.01, 0.3, size=200)
+    sigma = rng.uniform(0.05, 0.9, size=200)
+    motor = MotorMediaVarianza(correlacion=correlacion, peso_maximo=peso_maximo)
+    for aversion in (0.5, 2.0, 10.0, 100.0):
+        _kkt(motor, mu, sigma, aversion, motor.optimizar(mu, sigma, aversion))
+
+
+def test_media_varianza_respeta_filtros_y_cotas(sistema_grande):
+    motor = MotorMediaVarianza(peso_maximo=0.5)
+    for perfil in PerfilRiesgo:
+        for plazo in (1, 4, 10):
+            validos = set(sistema_grande.base.nombres[i] for i in sistema_grande.instrumentos_validos(perfil, plazo))
+            if len(validos) < 2:
+                continue
+            recomendaciones = sistema_grande.recomendar_inversiones(perfil, 1000.0, plazo, ['recesion'], motor=motor)
+            assert set(recomendaciones) <= validos
+            assert sum(recomendaciones.values()) == pytest.approx(1000.0)
+            assert max(recomendaciones.values()) <= 500.0 + 1e-9
+
+
+def test_riesgo_objetivo(sistema_grande):
+    motor = MotorMediaVarianza(riesgo_objetivo=0.25)
+    base = sistema_grande.base
+    validos = np.asarray(sistema_grande.instrumentos_validos(PerfilRiesgo.AGRESIVO, 10))
+    pesos = dict(motor.pesos(base, PerfilRiesgo.AGRESIVO, validos, ()))
+    w = np.array([pesos.get(base.nombres[i], 0.0) for i in validos])
+    sigma = motor.volatilidades(base, validos)
+    if sigma.min() <= 0.25 <= sigma.max():
+        assert motor.volatilidad_cartera(w, sigma) == pytest.approx(0.25, abs=1e-6)
+
+
+def test_motor_por_llamada_no_comparte_cache(sistema):
+    consulta = (PerfilRiesgo.MODERADO, 1000.0, 10, ['crecimiento_economico'])
+    heuristico = sistema.recomendar_inversiones(*consulta)
+    media_varianza = sistema.recomendar_inversiones(*consulta, motor=MotorMediaVarianza())
+    assert heuristico == recomendar_referencia(sistema, *consulta)
+    assert media_varianza != heuristico
+    assert sistema.recomendar_inversiones(*consulta, motor=MotorHeuristico()) == heuristico
+
+
+def test_peso_maximo_insuficiente():
+    with pytest.raises(ValueError):
+        MotorMediaVarianza(peso_maximo=0.1).optimizar(np.array([0.1, 0.2]), np.array([0.2, 0.3]), 2.0)
+
+
+def test_motor_sin_pesos_no_se_puede_crear():
+    class MotorIncompleto(MotorAsignacion):
+        pass
+
+    with pytest.raises(TypeError):
+        MotorIncompleto()
+    with pytest.raises(TypeError):
+        MotorAsignacion()
@@ -0,0 +1,20 @@
+"""Modo multiproceso frente a recomendar_inversiones_lote"""
+import numpy as np
+
+from paralelo import recomendar_inversiones_paralelo
+from sistema_inversion import SistemaInversion
+
+
+def test_paralelo_identico_al_lote(sistema_grande, inversores):
+    esperado = sistema_grande.recomendar_inversiones_lote(*inversores)
+    obtenido = recomendar_inversiones_paralelo(sistema_grande, *inversores, trabajadores=2, tam_bloque=64)
+    assert np.array_equal(obtenido, esperado)
+
+
+def test_catalogo_vacio():
+    sistema = SistemaInversion()
+    sistema.instrumentos = {}
+    sistema.reglas_mercado = {}
+    resultado = recomendar_inversiones_paralelo(sistema, [1, 2, 3], [10.0, 20.0, 30.0], [5, 5, 5],
+                                                np.zeros((3, 0), dtype=bool), trabajadores=2, tam_bloque=1)
+    assert resultado.shape == (3, 0)
@@ -0,0 +1,56 @@
+"""Red de decisión construida de forma diferida"""
+import os
+import subprocess
+import sys
+
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _aristas(sistema):
+    return set(sistema.red_decision.edges)
+
+
+def _esperadas(sistema):
+    aristas = {(info['perfil_recomendado'].name, nombre) for nombre, info in sistema.instrumentos.items()}
+    return aristas | {(condicion, nombre) for condicion in sistema.reglas_mercado for nombre in sistema.instrumentos}
+
+
+def test_crear_y_recomendar_no_importa_networkx():
+    codigo = ("import sys\n"
+              "from sistema_inversion import PerfilRiesgo, SistemaInversion\n"
+              "sistema = SistemaInversion()\n"
+              "sistema.recomendar_inversiones(PerfilRiesgo.MODERADO, 1000.0, 5, ['recesion'])\n"
+              "sistema.actualizar_condicion('recesion', {'startups': -0.5})\n"
+              "assert 'networkx' not in sys.modules, 'networkx importado'\n"
+              "sistema.red_decision\n"
+              "assert 'networkx' in sys.modules\n")
+    subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, check=True)
+
+
+def test_modificar_tablas_reconstruye_la_red():
+    sistema = SistemaInversion()
+    red = sistema.red_decision
+    assert _aristas(sistema) == _esperadas(sistema)
+    sistema.reglas_mercado['euforia'] = {nombre: 0.1 for nombre in sistema.instrumentos}
+    assert sistema.red_decision is not red
+    assert _aristas(sistema) == _esperadas(sistema)
+    red = sistema.red_decision
+    sistema.instrumentos['startups']['perfil_recomendado'] = PerfilRiesgo.MODERADO
+    assert sistema.red_decision is not red
+    assert ('MODERADO', 'startups') in sistema.red_decision.edges
+    assert ('AGRESIVO', 'startups') not in sistema.red_decision.edges
+
+
+def test_api_incremental_mantiene_la_red():
+    sistema = SistemaInversion()
+    red = sistema.red_decision
+    sistema.actualizar_condicion('recesion', {'startups': -1.0})
+    sistema.agregar_condicion('euforia', {'startups': 0.5})
+    sistema.actualizar_instrumento('startups', perfil_recomendado=PerfilRiesgo.MODERADO)
+    assert sistema.red_decision is red
+    assert _aristas(sistema) == _esperadas(sistema)
+    assert red.nodes['euforia']['tipo'] == 'condicion_mercado'
+    sistema.eliminar_condicion('euforia')
+    assert 'euforia' not in red and _aristas(sistema) == _esperadas(sistema)
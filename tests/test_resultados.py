@@ -0,0 +1,77 @@
+"""Contenedor columnar de resultados por lotes"""
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from conftest import recomendar_referencia
+from resultados import ResultadosLote
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+
+def test_vistas_como_recomendar_inversiones(sistema, inversores):
+    perfiles, montos, plazos, mascara = inversores
+    resultados = ResultadosLote.calcular(sistema, perfiles, montos, plazos, mascara)
+    condiciones = list(sistema.base.condiciones)
+    for k in range(0, len(resultados), 17):
+        activas = [c for c, activa in zip(condiciones, mascara[k]) if activa]
+        esperado = recomendar_referencia(sistema, PerfilRiesgo(int(perfiles[k])), montos[k], plazos[k], activas)
+        asignacion = resultados[k]
+        assert dict(asignacion) == esperado
+        assert asignacion.perfil == PerfilRiesgo(int(perfiles[k])) and asignacion.id == str(k)
+    assert resultados.a_dicts()[-1] == dict(resultados[-1])
+    with pytest.raises(IndexError):
+        resultados[len(resultados)]
+
+
+def test_instrumentos_validos_con_monto_cero():
+    sistema = SistemaInversion()
+    sistema.actualizar_condicion('recesion', {'startups': -1.0})
+    consultas = [(PerfilRiesgo.AGRESIVO, 0.0, 5, []), (PerfilRiesgo.AGRESIVO, 1000.0, 10, ['recesion']),
+                 (PerfilRiesgo.CONSERVADOR, 500.0, 0, [])]
+    perfiles, montos, plazos, condiciones = zip(*consultas)
+    resultados = ResultadosLote.calcular(sistema, perfiles, montos, plazos, sistema.mascara_condiciones(condiciones))
+    esperados = [sistema.recomendar_inversiones(*consulta) for consulta in consultas]
+    assert len(esperados[0]) == 4 and esperados[1]['startups'] == 0.0 and esperados[2] == {}
+    assert resultados.a_dicts() == esperados
+    for k, esperado in enumerate(esperados):
+        assert dict(resultados[k]) == esperado and len(resultados[k]) == len(esperado)
+    assert resultados[1]['startups'] == 0.0
+    with pytest.raises(KeyError):
+        resultados[0]['bienes_raices']  # plazo mínimo de 7 años
+    assert resultados[1:].a_dicts() == esperados[1:]
+
+
+@pytest.mark.parametrize('tramo', [slice(2, 7), slice(None, None, 3), slice(-4, None), slice(8, 1, -2),
+                                   slice(50, 60)])
+def test_tramos_conservan_ids(tramo):
+    montos = np.arange(30.0).reshape(10, 3)
+    sin_ids = ResultadosLote(('a', 'b', 'c'), montos)
+    con_ids = ResultadosLote(('a', 'b', 'c'), montos, [f'c{k}' for k in range(10)])
+    posiciones = list(range(10))[tramo]
+    assert sin_ids[tramo].ids == [str(k) for k in posiciones]
+    assert con_ids[tramo].ids == [f'c{k}' for k in posiciones]
+    assert np.shares_memory(sin_ids[tramo].montos, montos) or not posiciones
+
+
+def test_tramo_sin_ids_no_recorre_el_lote():
+    resultados = ResultadosLote((), np.empty((1_000_000, 0)))
+    tracemalloc.start()
+    try:
+        tramo = resultados[5:8]
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert tramo.ids == ['5', '6', '7']
+    assert pico < 100_000
+
+
+def test_guardar_y_cargar_npy(tmp_path, sistema, inversores):
+    resultados = ResultadosLote.calcular(sistema, *inversores, ids=[f'x{k}' for k in range(len(inversores[0]))])
+    resultados.guardar_npy(str(tmp_path / 'lote'))
+    cargados = ResultadosLote.cargar_npy(str(tmp_path / 'lote'))
+    assert cargados.nombres == resultados.nombres and cargados.ids == resultados.ids
+    assert np.array_equal(cargados.montos, resultados.montos)
+    assert np.array_equal(cargados.perfiles, resultados.perfiles)
+    assert np.array_equal(cargados.validos, resultados.validos)
+    assert cargados.a_dicts() == resultados.a_dicts()
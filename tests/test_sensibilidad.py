@@ -0,0 +1,47 @@
+"""Barrido de sensibilidad sobre subconjuntos de condiciones y plazos"""
+import numpy as np
+import pytest
+
+from conftest import como_lote, recomendar_referencia
+from sensibilidad import barrido_sensibilidad
+from sistema_inversion import PerfilRiesgo
+
+
+def test_cada_escenario_como_recomendar_inversiones(sistema_grande):
+    perfiles = [PerfilRiesgo.CONSERVADOR, PerfilRiesgo.AGRESIVO, PerfilRiesgo.MODERADO]
+    montos = [1_000.0, 250_000.0, 12_345.67]
+    plazos = [0, 1, 3, 7, 30]
+    resultado = barrido_sensibilidad(sistema_grande, perfiles, montos, plazos)
+    tensor = resultado.tensor()
+    assert tensor.shape == (3, resultado.n_escenarios, len(sistema_grande.base))
+    for indice in range(resultado.n_escenarios):
+        condiciones, plazo = resultado.escenario(indice)
+        assert resultado.indice_escenario(condiciones[::-1], plazo) == indice
+        for cliente, (perfil, monto) in enumerate(zip(perfiles, montos)):
+            esperado = sistema_grande.recomendar_inversiones(perfil, monto, plazo, condiciones)
+            assert tensor[cliente, indice].tolist() == como_lote(sistema_grande, esperado)
+
+
+def test_subconjunto_de_condiciones(sistema):
+    resultado = barrido_sensibilidad(sistema, [2], [1000.0], [5], condiciones=['recesion'])
+    assert resultado.n_escenarios == 2
+    for indice in range(2):
+        condiciones, plazo = resultado.escenario(indice)
+        esperado = recomendar_referencia(sistema, PerfilRiesgo.MODERADO, 1000.0, plazo, condiciones)
+        assert resultado.tensor()[0, indice].tolist() == como_lote(sistema, esperado)
+
+
+def test_estadisticas_sin_tensor(sistema_grande):
+    resultado = barrido_sensibilidad(sistema_grande, [1, 2, 3, 3], [1.0, 2.0, 3.0, 4.0], [2, 10])
+    tensor = resultado.tensor()
+    estadisticas = resultado.estadisticas(sistema_grande)
+    assert np.allclose(estadisticas['monto_minimo'], tensor.min(axis=1))
+    assert np.allclose(estadisticas['monto_maximo'], tensor.max(axis=1))
+    assert np.allclose(estadisticas['monto_medio'], tensor.mean(axis=1))
+    montos = np.array([1.0, 2.0, 3.0, 4.0])[:, None]
+    assert np.allclose(estadisticas['rendimiento'], tensor @ sistema_grande.base.rendimiento_esperado / montos)
+
+
+def test_demasiadas_condiciones(sistema):
+    with pytest.raises(ValueError):
+        barrido_sensibilidad(sistema, [1], [1.0], condiciones=list(sistema.base.condiciones) * 7)
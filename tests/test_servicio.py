@@ -0,0 +1,95 @@
+"""Servicio HTTP de recomendaciones"""
+import asyncio
+import json
+
+import pytest
+
+from servicio import ServicioRecomendaciones
+from sistema_inversion import PerfilRiesgo, SistemaInversion
+
+
+async def _enviar(servicio, datos: bytes):
+    """Envía bytes crudos y devuelve (estado, cuerpo JSON) de la primera respuesta"""
+    lector, escritor = await asyncio.open_connection(servicio.host, servicio.puerto)
+    try:
+        escritor.write(datos)
+        await escritor.drain()
+        estado = int((await lector.readline()).split()[1])
+        longitud = 0
+        while (linea := await lector.readline()) not in (b'\r\n', b''):
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            if nombre.lower() == 'content-length':
+                longitud = int(valor)
+        return estado, json.loads(await lector.readexactly(longitud))
+    finally:
+        escritor.close()
+
+
+def _post(cuerpo: dict) -> bytes:
+    datos = json.dumps(cuerpo).encode('utf-8')
+    return (f"POST /recomendar HTTP/1.1\r\nContent-Length: {len(datos)}\r\nConnection: close\r\n\r\n"
+            .encode('latin-1') + datos)
+
+
+def _con_servicio(sistema, corrutina):
+    async def ejecutar():
+        servicio = ServicioRecomendaciones(sistema, puerto=0, max_espera=0.001)
+        await servicio.iniciar()
+        try:
+            return await corrutina(servicio)
+        finally:
+            await servicio.cerrar()
+    return asyncio.run(ejecutar())
+
+
+def test_recomendar_identico_al_escalar():
+    sistema = SistemaInversion()
+    # Con un ajuste de -1 un instrumento válido recibe 0.0 y debe seguir en la respuesta
+    sistema.actualizar_condicion('recesion', {'startups': -1.0})
+    solicitudes = [
+        {'id': 'a', 'respuestas': {'tolerancia_riesgo': 3}, 'monto': 50_000, 'plazo': 10, 'condiciones': ['recesion']},
+        {'id': 'b', 'respuestas': {'tolerancia_riesgo': 1}, 'monto': 1_000, 'plazo': 2, 'explicar': False},
+        {'id': 'c', 'respuestas': {'tolerancia_riesgo': 2}, 'monto': 0, 'plazo': 5,
+         'condiciones': ['alta_inflacion']},
+        # Repetidas o en otro orden que reglas_mercado: se aplican tal como llegan
+        {'id': 'd', 'respuestas': {'tolerancia_riesgo': 2}, 'monto': 100_000, 'plazo': 10,
+         'condiciones': ['recesion', 'recesion']},
+        {'id': 'e', 'respuestas': {'tolerancia_riesgo': 3}, 'monto': 123_456.78, 'plazo': 10,
+         'condiciones': ['crecimiento_economico', 'recesion', 'alta_inflacion', 'desconocida']},
+    ]
+
+    async def enviar_todas(servicio):
+        return await asyncio.gather(*(_enviar(servicio, _post(s)) for s in solicitudes))
+
+    for (estado, respuesta), solicitud in zip(_con_servicio(sistema, enviar_todas), solicitudes):
+        perfil = sistema.evaluar_perfil(solicitud['respuestas'])
+        esperado = sistema.recomendar_inversiones(perfil, float(solicitud['monto']), solicitud['plazo'],
+                                                  solicitud.get('condiciones', []))
+        assert estado == 200
+        assert (respuesta['id'], respuesta['perfil']) == (solicitud['id'], perfil.name)
+        assert respuesta['recomendaciones'] == esperado
+        assert ('explicacion' in respuesta) == solicitud.get('explicar', True)
+    assert 'startups' in _con_servicio(sistema, lambda s: _enviar(s, _post(solicitudes[0])))[1]['recomendaciones']
+
+
+@pytest.mark.parametrize('datos, estado', [
+    (b'GET /' + b'x' * 100_000 + b' HTTP/1.1\r\n\r\n', 400),
+    (b'GET /salud HTTP/1.1\r\nX-Relleno: ' + b'x' * 100_000 + b'\r\n\r\n', 431),
+    (b'GET /salud\r\n\r\n', 400),
+    (b'POST /recomendar HTTP/1.1\r\nContent-Length: 5\r\n\r\n{"a":', 400),
+    (b'GET /recomendar HTTP/1.1\r\n\r\n', 405),
+    (b'GET /nada HTTP/1.1\r\nConnection: close\r\n\r\n', 404),
+], ids=['linea_larga', 'cabecera_larga', 'sin_version', 'json_no_valido', 'metodo', 'ruta'])
+def test_solicitudes_no_validas(datos, estado):
+    assert _con_servicio(SistemaInversion(), lambda s: _enviar(s, datos))[0] == estado
+
+
+def test_campo_obligatorio():
+    estado, respuesta = _con_servicio(SistemaInversion(), lambda s: _enviar(s, _post({'monto': 1, 'plazo': 1})))
+    assert estado == 400 and 'respuestas' in respuesta['error']
+
+
+def test_perfil_evaluado_en_el_servicio():
+    estado, respuesta = _con_servicio(SistemaInversion(), lambda s: _enviar(
+        s, _post({'respuestas': {'tolerancia_riesgo': 3, 'experiencia_previa': 3}, 'monto': 1, 'plazo': 1})))
+    assert estado == 200 and respuesta['perfil'] == PerfilRiesgo.AGRESIVO.name
@@ -0,0 +1,62 @@
+"""Simulación Monte Carlo de la cartera recomendada"""
+import numpy as np
+import pytest
+
+from simulacion import SimuladorMonteCarlo
+from sistema_inversion import PerfilRiesgo
+
+
+@pytest.fixture
+def recomendaciones(sistema):
+    return sistema.recomendar_inversiones(PerfilRiesgo.AGRESIVO, 100_000.0, 10, ['alta_inflacion'])
+
+
+def test_misma_semilla_mismo_resultado(sistema, recomendaciones):
+    simulador = SimuladorMonteCarlo(sistema, correlacion=0.4)
+    a = simulador.simular(recomendaciones, 5, trayectorias=5_000, semilla=42)
+    b = simulador.simular(recomendaciones, 5, trayectorias=5_000, semilla=42)
+    c = simulador.simular(recomendaciones, 5, trayectorias=5_000, semilla=43)
+    assert np.array_equal(a.valores_finales, b.valores_finales) and a.percentiles == b.percentiles
+    assert not np.array_equal(a.valores_finales, c.valores_finales)
+
+
+@pytest.mark.parametrize('correlacion', [0.0, 0.6])
+def test_independiente_del_tamano_de_bloque(sistema, recomendaciones, correlacion):
+    completo = SimuladorMonteCarlo(sistema, correlacion).simular(recomendaciones, 7, trayectorias=3_001, semilla=1)
+    for memoria in (1, 7 * 6 * 8 * 3 * 100, 10**6):
+        por_bloques = SimuladorMonteCarlo(sistema, correlacion, memoria_maxima=memoria).simular(
+            recomendaciones, 7, trayectorias=3_001, semilla=1)
+        assert np.allclose(por_bloques.valores_finales, completo.valores_finales, rtol=1e-13, atol=0)
+
+
+@pytest.mark.parametrize('plazo', [1, 4])
+def test_media_y_varianza_lognormales(sistema, plazo):
+    info = sistema.instrumentos['acciones_blue_chip']
+    simulador = SimuladorMonteCarlo(sistema)
+    resultado = simulador.simular({'acciones_blue_chip': 1.0}, plazo, trayectorias=400_000, semilla=0)
+    media = 1 + info['rendimiento_esperado']
+    varianza_anual = info['riesgo'] ** 2
+    # Producto de `plazo` crecimientos anuales independientes con esa media y varianza
+    esperada = media ** plazo
+    varianza = (varianza_anual + media ** 2) ** plazo - media ** (2 * plazo)
+    assert resultado.valor_esperado == pytest.approx(esperada, rel=5e-3)
+    assert resultado.valores_finales.var() == pytest.approx(varianza, rel=2e-2)
+    mu, sigma = simulador.parametros_lognormales(['acciones_blue_chip'])
+    logaritmos = np.log(resultado.valores_finales)
+    assert logaritmos.mean() == pytest.approx(plazo * mu[0], abs=3e-3)
+    assert logaritmos.std() == pytest.approx(np.sqrt(plazo) * sigma[0], rel=1e-2)
+
+
+def test_resumen_y_errores(sistema, recomendaciones):
+    simulador = SimuladorMonteCarlo(sistema)
+    resultado = simulador.simular(recomendaciones, 3, trayectorias=1_000, semilla=0)
+    assert resultado.monto_inicial == pytest.approx(100_000.0)
+    assert 0.0 <= resultado.probabilidad_perdida <= 1.0
+    assert list(resultado.percentiles) == [5, 25, 50, 75, 95]
+    assert 'Percentil 50' in resultado.resumen()
+    with pytest.raises(ValueError):
+        simulador.simular(recomendaciones, 0)
+    with pytest.raises(ValueError):
+        simulador.simular(recomendaciones, 1, trayectorias=0)
+    with pytest.raises(ValueError):
+        SimuladorMonteCarlo(sistema, correlacion=1.5)